@@ -0,0 +1,290 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+import os
+import pygame
+from collections import OrderedDict
+
+
+class Image_cache(object):
+
+    def __init__(self):
+
+        """
+        Process wide cache for decoded images. Every image file is loaded from disk once, converted to the pixel format
+        of the display and then handed out as a shared surface. Surfaces returned by the cache must therefore never be
+        modified in place; use pygame.transform or Surface.copy() to derive new images from them.
+
+        The hit and miss counters can be used to confirm that no image is loaded from disk while the game is running.
+        """
+
+        self.__images = {}
+        self.__hits = 0
+        self.__misses = 0
+
+    def load(self, path):
+
+        """
+        Returns the surface for the image at path, loading and converting it on the first request.
+
+        :param path : path to the image file
+        :type path  : str
+
+        :returns: pygame.Surface
+        """
+
+        image = self.__images.get(path)
+        if image is not None:
+            self.__hits += 1
+            return image
+
+        self.__misses += 1
+        image = pygame.image.load(path)
+        # convert_alpha() needs a display mode. Images loaded before the window is opened are kept as decoded.
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            image = image.convert_alpha()
+        self.__images[path] = image
+        return image
+
+    def preload(self, directory):
+
+        """
+        Loads all png images below directory into the cache, so they are available before the game loop starts.
+
+        :param directory : media directory
+        :type directory  : str
+
+        :returns: number of images in the cache
+        """
+
+        for root, dirs, files in os.walk(directory):
+            for name in sorted(files):
+                if name.lower().endswith(".png"):
+                    path = root.replace(os.sep, "/") + "/" + name
+                    if path not in self.__images:
+                        self.load(path)
+        return len(self.__images)
+
+    def get_stats(self):
+        return {"hits": self.__hits, "misses": self.__misses, "images": len(self.__images)}
+
+    def reset_stats(self):
+        self.__hits = 0
+        self.__misses = 0
+
+    def clear(self):
+        self.__images = {}
+        self.reset_stats()
+
+
+class Rotation_cache(object):
+
+    def __init__(self, image, resolution=2, max_bytes=16 * 1024 * 1024):
+
+        """
+        Cache for rotated versions of one image. Angles are quantized to the angular resolution and every rotation is
+        rendered once and then kept, together with the offset from the top left corner of the rotated image to its
+        center. If the memory used by the cached rotations exceeds max_bytes, the least recently used rotations are
+        dropped and rendered again when needed.
+
+        :param image        : image to be rotated
+        :param resolution   : angular resolution in degrees
+        :param max_bytes    : memory cap for all rotated images in bytes
+        :type image         : pygame.Surface
+        :type resolution    : int
+        :type max_bytes     : int
+
+        :returns:
+        """
+
+        self.__image = image
+        self.__resolution = resolution
+        self.__max_bytes = max_bytes
+        self.__rotations = OrderedDict()
+        self.__pinned = {}
+        self.__bytes = 0
+        self.__hits = 0
+        self.__misses = 0
+
+    def quantize(self, angle):
+        return int(round(angle / float(self.__resolution))) * self.__resolution % 360
+
+    def get(self, angle):
+
+        """
+        Returns the image rotated clockwise by angle degrees (bearing) and the offset of its center.
+
+        :param angle : rotation as bearing in degrees
+        :type angle  : int
+
+        :returns: pygame.Surface, (x offset, y offset)
+        """
+
+        key = self.quantize(angle)
+        rotation = self.__pinned.get(key)
+        if rotation is not None:
+            self.__hits += 1
+            return rotation
+        rotation = self.__rotations.get(key)
+        if rotation is not None:
+            self.__hits += 1
+            self.__rotations.move_to_end(key)
+            return rotation
+
+        self.__misses += 1
+        rotation = self.__render(key)
+        self.__rotations[key] = rotation
+        self.__bytes += self.__size_of(rotation[0])
+        while self.__bytes > self.__max_bytes and len(self.__rotations) > 1:
+            old_key, old_rotation = self.__rotations.popitem(last=False)
+            self.__bytes -= self.__size_of(old_rotation[0])
+        return rotation
+
+    def warm(self, angles):
+
+        """
+        Renders the rotations for the given angles and pins them, so they are never dropped from the cache. Used for
+        angles that are known in advance, like the directions the destroyer tower can point to. Pinned rotations don't
+        count towards the memory cap.
+
+        :param angles : angles in degrees
+        :type angles  : list of int
+        """
+
+        for angle in angles:
+            key = self.quantize(angle)
+            if key in self.__pinned:
+                continue
+            rotation = self.__rotations.pop(key, None)
+            if rotation is None:
+                rotation = self.__render(key)
+            else:
+                self.__bytes -= self.__size_of(rotation[0])
+            self.__pinned[key] = rotation
+
+    def __render(self, key):
+        image = pygame.transform.rotate(self.__image, -key)
+        return image, (image.get_width() / 2, image.get_height() / 2)
+
+    def fill(self):
+
+        """
+        Renders the rotations for all angles at the cache resolution, as far as the memory cap allows.
+        """
+
+        for angle in range(0, 360, self.__resolution):
+            self.get(angle)
+
+    def get_stats(self):
+        return {"hits": self.__hits, "misses": self.__misses, "rotations": len(self.__rotations),
+                "pinned": len(self.__pinned), "bytes": self.__bytes}
+
+    @staticmethod
+    def __size_of(image):
+        return image.get_width() * image.get_height() * image.get_bytesize()
+
+
+class Font_cache(object):
+
+    def __init__(self, max_texts=512):
+
+        """
+        Registry of the fonts used in the game and cache for rendered texts. Fonts are created once per name and size.
+        Rendered texts are kept by text, font and color in a least recently used cache of max_texts surfaces, so
+        repeating texts like HUD labels and point popups are rendered once. Like the images of the Image_cache, the
+        returned surfaces are shared and must not be modified in place.
+
+        :param max_texts : maximum number of rendered texts kept in the cache
+        :type max_texts  : int
+        """
+
+        self.__fonts = {}
+        self.__texts = OrderedDict()
+        self.__max_texts = max_texts
+        self.__font_hits = 0
+        self.__font_misses = 0
+        self.__text_hits = 0
+        self.__text_misses = 0
+
+    def get_font(self, name, size):
+        key = (name, size)
+        font = self.__fonts.get(key)
+        if font is not None:
+            self.__font_hits += 1
+            return font
+
+        self.__font_misses += 1
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.SysFont(name, size)
+        self.__fonts[key] = font
+        return font
+
+    def render(self, text, name, size, color=(255, 255, 255)):
+
+        """
+        Returns the text rendered with antialiasing in the font name at size in color.
+
+        :param text     : text to render
+        :param name     : font name
+        :param size     : font size
+        :param color    : text color as r,g,b
+        :type text      : str
+        :type name      : str
+        :type size      : int
+        :type color     : set
+
+        :returns: pygame.Surface
+        """
+
+        key = (text, name, size, color)
+        image = self.__texts.get(key)
+        if image is not None:
+            self.__text_hits += 1
+            self.__texts.move_to_end(key)
+            return image
+
+        self.__text_misses += 1
+        image = self.get_font(name, size).render(text, True, color)
+        self.__texts[key] = image
+        if len(self.__texts) > self.__max_texts:
+            self.__texts.popitem(last=False)
+        return image
+
+    def get_stats(self):
+        text_requests = self.__text_hits + self.__text_misses
+        return {"fonts": len(self.__fonts), "font_hits": self.__font_hits, "font_misses": self.__font_misses,
+                "texts": len(self.__texts), "text_hits": self.__text_hits, "text_misses": self.__text_misses,
+                "text_hit_rate": self.__text_hits / float(text_requests) if text_requests > 0 else 0.0}
+
+    def reset_stats(self):
+        self.__font_hits = 0
+        self.__font_misses = 0
+        self.__text_hits = 0
+        self.__text_misses = 0
+
+
+#The game wide image and font cache instances
+images = Image_cache()
+fonts = Font_cache()
+
+
+def load_image(path):
+    return images.load(path)
+
+
+def render_text(text, font_name, font_size, color=(255, 255, 255)):
+    return fonts.render(text, font_name, font_size, color)
@@ -0,0 +1,242 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+"""
+Batch runner for level balancing. Runs many headless games with different seeds and a scripted player in a pool of
+worker processes, streams the result of every game back as soon as it is finished and aggregates survival time, score
+and the enemies spawned and sunk per level. Finished games are appended to a checkpoint file, a batch started again
+with the same checkpoint only runs the missing seeds.
+
+Run from anywhere:
+
+    python batch.py --games 1000 --checkpoint balance.jsonl --output balance.json
+"""
+
+import os
+import sys
+import json
+import argparse
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import pygame
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+#Player scripts, looked up by name in the worker processes
+def sweep(tick, period=240):
+    if (tick // period) % 2 == 0:
+        return pygame.K_RIGHT, pygame.K_SPACE
+    return pygame.K_LEFT, pygame.K_SPACE
+
+
+def hold_fire(tick):
+    return pygame.K_RIGHT,
+
+
+SCRIPTS = {"turn_and_fire": None, "sweep": sweep, "hold_fire": hold_fire}
+
+
+def init_worker():
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    os.chdir(ROOT)
+
+
+def run_game(settings):
+
+    """
+    Runs one headless game with the given settings and returns its result. Runs in a worker process.
+
+    :param settings : seed, max_ticks, init_game_level, tick_rate, bullet_store and script of the game
+    :type settings  : dict
+
+    :returns: dictionary with the seed, survival time, score, level reached and the per level statistics
+    """
+
+    from game import Destroyer_game
+    from inputs import Scripted_input
+
+    game = Destroyer_game(init_game_level=settings["init_game_level"], bullet_store=settings["bullet_store"],
+                          tick_rate=settings["tick_rate"], headless=True, max_ticks=settings["max_ticks"],
+                          seed=settings["seed"], input_source=Scripted_input(SCRIPTS[settings["script"]]),
+                          show_fps=False, profile=False)
+    stats = game.run_headless()
+    return {"seed": settings["seed"], "survival_time_s": stats["game_time_s"], "survived": stats["survived"],
+            "score": stats["score"], "level": stats["level"], "total_enemies": stats["total_enemies"],
+            "ticks": stats["ticks"], "elapsed_s": stats["elapsed_s"],
+            "levels": {str(level): counts for level, counts in stats["levels"].items()},
+            "settings": {key: value for key, value in settings.items() if key != "seed"}}
+
+
+def load_checkpoint(path):
+
+    """
+    Reads the results of a checkpoint file, one JSON object per line. A line cut off by an interrupted batch is
+    skipped.
+
+    :returns: dictionary of seed to result
+    """
+
+    results = {}
+    if path is None or not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            results[result["seed"]] = result
+    return results
+
+
+def run_batch(seeds, settings, workers=None, checkpoint=None):
+
+    """
+    Runs one game per seed in a pool of worker processes and yields the results in the order the games finish.
+    Games are independent, so the throughput grows with the number of workers. Only a few games per worker are
+    submitted at a time, which keeps the memory use flat for large batches. Results already in the checkpoint file are
+    yielded first without running the games again, unless they were run with other settings. New results are
+    appended to the file as they arrive.
+
+    :param seeds        : seeds of the games
+    :param settings     : game settings without the seed, see run_game()
+    :param workers      : number of worker processes, default the number of CPUs
+    :param checkpoint   : path of the checkpoint file, None for no checkpoint
+    :type seeds         : list of int
+    :type settings      : dict
+    :type workers       : int
+    :type checkpoint    : str
+    """
+
+    done = load_checkpoint(checkpoint)
+    pending = []
+    for seed in seeds:
+        if seed in done and done[seed].get("settings") == settings:
+            yield done[seed]
+        else:
+            pending.append(seed)
+    if not pending:
+        return
+
+    workers = workers or os.cpu_count() or 1
+    checkpoint_file = open(checkpoint, "a") if checkpoint is not None else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            seeds = iter(pending)
+            running = set()
+            while True:
+                for seed in seeds:
+                    game_settings = dict(settings, seed=seed)
+                    running.add(executor.submit(run_game, game_settings))
+                    if len(running) >= workers * 2:
+                        break
+                if not running:
+                    break
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result = future.result()
+                    if checkpoint_file is not None:
+                        checkpoint_file.write(json.dumps(result) + "\n")
+                        checkpoint_file.flush()
+                    yield result
+    finally:
+        if checkpoint_file is not None:
+            checkpoint_file.close()
+
+
+def summarize(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {"mean": sum(ordered) / len(ordered), "min": ordered[0], "p50": ordered[len(ordered) // 2],
+            "p95": ordered[int((len(ordered) - 1) * 0.95)], "max": ordered[-1]}
+
+
+def aggregate(results):
+
+    """
+    Aggregates game results: survival time, score and level reached over all games, and per level the number of
+    games reaching the level, the time spent in it and the enemies spawned and sunk per game, in total and per ship
+    class.
+
+    :returns: dictionary
+    """
+
+    levels = {}
+    for result in results:
+        for level, counts in result["levels"].items():
+            for key, value in counts.items():
+                levels.setdefault(int(level), {}).setdefault(key, []).append(value)
+
+    level_stats = {}
+    for level in sorted(levels):
+        games = len(levels[level]["time_s"])
+        level_stats[level] = {"games": games}
+        for key, values in sorted(levels[level].items()):
+            #Ship classes that did not spawn in a game count as zero
+            level_stats[level][key] = summarize(values + [0] * (games - len(values)))
+
+    reached = {}
+    for result in results:
+        reached[result["level"]] = reached.get(result["level"], 0) + 1
+    return {"games": len(results), "survived": sum(1 for r in results if r["survived"]),
+            "survival_time_s": summarize([r["survival_time_s"] for r in results]),
+            "score": summarize([r["score"] for r in results]),
+            "level_reached": {level: reached[level] for level in sorted(reached)}, "levels": level_stats}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Destroyer batch simulation for level balancing")
+    parser.add_argument("--games", type=int, default=100, help="number of games")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game, the others count up")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, default the number of CPUs")
+    parser.add_argument("--ticks", type=int, default=120 * 600,
+                        help="simulation steps after which a game ends, 0 for no limit")
+    parser.add_argument("--tick-rate", type=int, default=120, help="simulation steps per second")
+    parser.add_argument("--level", type=int, default=0, help="initial game level")
+    parser.add_argument("--bullet-store", choices=("list", "numpy"), default="list", help="bullet container")
+    parser.add_argument("--script", choices=sorted(SCRIPTS), default="turn_and_fire", help="player script")
+    parser.add_argument("--checkpoint", default=None, help="JSON lines file the finished games are appended to")
+    parser.add_argument("--output", default=None, help="JSON output file of the aggregate, default stdout")
+    parser.add_argument("--quiet", action="store_true", help="do not print a line per finished game")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    settings = {"max_ticks": args.ticks or None, "init_game_level": args.level, "tick_rate": args.tick_rate,
+                "bullet_store": args.bullet_store, "script": args.script}
+    seeds = list(range(args.seed, args.seed + args.games))
+    results = []
+    start = perf_counter()
+    for result in run_batch(seeds, settings, args.workers, args.checkpoint):
+        results.append(result)
+        if not args.quiet:
+            sys.stderr.write("{:>6}/{} seed {:>8} level {} score {:>6} survived {:8.1f} s\n".format(
+                len(results), len(seeds), result["seed"], result["level"], result["score"],
+                result["survival_time_s"]))
+    report = aggregate(results)
+    report["settings"] = dict(settings, games=len(seeds), first_seed=args.seed)
+    report["elapsed_s"] = perf_counter() - start
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
@@ -0,0 +1,103 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+"""
+Micro benchmark comparing the per blit cost of translucent drawing with a temporary surface per blit (the former
+gfx.blit_alpha) and with the Alpha_blitter, for 100 and 1000 translucent objects per frame.
+
+Run from the repository root: python benchmarks/bench_alpha_blit.py
+"""
+
+import os
+import sys
+from time import perf_counter
+from random import Random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pygame
+from gfx import Alpha_blitter
+
+
+def temp_surface_blit_alpha(screen, image, rect, opacity):
+    x = rect[0]
+    y = rect[1]
+    temp = pygame.Surface((image.get_width(), image.get_height())).convert()
+    temp.blit(screen, (-x, -y))
+    temp.blit(image, (0, 0))
+    temp.set_alpha(opacity)
+    screen.blit(temp, rect)
+
+
+def make_objects(count, images, window_size, rng):
+    objects = []
+    for i in range(count):
+        image = images[i % len(images)]
+        rect = pygame.Rect(rng.randrange(0, window_size[0] - image.get_width()),
+                           rng.randrange(0, window_size[1] - image.get_height()),
+                           image.get_width(), image.get_height())
+        objects.append((image, rect, rng.randrange(0, 256)))
+    return objects
+
+
+def time_frames(draw_frame, frames):
+    start = perf_counter()
+    for i in range(frames):
+        draw_frame()
+    return perf_counter() - start
+
+
+def run(counts=(100, 1000), frames=20, window_size=(1280, 1024)):
+    pygame.init()
+    screen = pygame.display.set_mode(window_size)
+    font = pygame.font.SysFont("Arial", 16)
+    images = [font.render("+{}".format(p), True, (0, 0, 0)) for p in (10, 100, 300, 500)]
+    images.append(pygame.image.load("./media/submarine.png").convert_alpha())
+    rng = Random(0)
+    results = []
+
+    for count in counts:
+        objects = make_objects(count, images, window_size, rng)
+
+        def legacy_frame():
+            for image, rect, opacity in objects:
+                temp_surface_blit_alpha(screen, image, rect, opacity)
+
+        blitter = Alpha_blitter()
+
+        def blitter_frame():
+            for image, rect, opacity in objects:
+                blitter.queue(image, rect, opacity)
+            blitter.flush(screen)
+
+        #One untimed frame each, so the translucent copies are in the cache like during the game
+        legacy_frame()
+        blitter_frame()
+
+        legacy = time_frames(legacy_frame, frames) / (frames * count)
+        batched = time_frames(blitter_frame, frames) / (frames * count)
+        results.append({"objects": count, "temp_surface_us": legacy * 1e6, "alpha_blitter_us": batched * 1e6})
+
+    pygame.quit()
+    return results
+
+
+if __name__ == "__main__":
+    for r in run():
+        print("{objects:>5} objects: temporary surface {temp_surface_us:8.2f} us/blit, "
+              "alpha blitter {alpha_blitter_us:8.2f} us/blit".format(**r))
@@ -0,0 +1,87 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+"""
+Benchmark of the bullet/target collision pass with nested loops over all pairs and with the Spatial_hash broadphase,
+for 10, 100 and 1000 bullets and targets. Both passes must find the same collisions.
+
+Run from the repository root: python benchmarks/bench_collisions.py
+"""
+
+import os
+import sys
+from time import perf_counter
+from random import Random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pygame
+from spatial_hash import Spatial_hash
+
+
+def make_rects(count, size, window_size, rng):
+    return [pygame.Rect(rng.randrange(0, window_size[0] - size[0]), rng.randrange(0, window_size[1] - size[1]),
+                        size[0], size[1]) for i in range(count)]
+
+
+def nested_loops(bullet_rects, target_rects):
+    hits = []
+    for b, bullet_rect in enumerate(bullet_rects):
+        for t, target_rect in enumerate(target_rects):
+            if bullet_rect.colliderect(target_rect):
+                hits.append((b, t))
+    return hits
+
+
+def spatial_hash(grid, bullet_rects, target_rects):
+    hits = []
+    grid.rebuild(target_rects)
+    for b, bullet_rect in enumerate(bullet_rects):
+        for t in grid.query(bullet_rect):
+            if bullet_rect.colliderect(target_rects[t]):
+                hits.append((b, t))
+    return hits
+
+
+def best_of(function, repeats, *args):
+    best = None
+    for i in range(repeats):
+        start = perf_counter()
+        function(*args)
+        elapsed = perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def run(counts=(10, 100, 1000), window_size=(1280, 1024), repeats=5):
+    rng = Random(0)
+    grid = Spatial_hash()
+    results = []
+    for count in counts:
+        bullet_rects = make_rects(count, (8, 25), window_size, rng)
+        target_rects = make_rects(count, (107, 20), window_size, rng)
+        assert nested_loops(bullet_rects, target_rects) == spatial_hash(grid, bullet_rects, target_rects)
+        results.append({"entities": count,
+                        "nested_loops_ms": best_of(nested_loops, repeats, bullet_rects, target_rects) * 1e3,
+                        "spatial_hash_ms": best_of(spatial_hash, repeats, grid, bullet_rects, target_rects) * 1e3})
+    return results
+
+
+if __name__ == "__main__":
+    for r in run():
+        print("{entities:>5} per side: nested loops {nested_loops_ms:9.3f} ms, "
+              "spatial hash {spatial_hash_ms:9.3f} ms".format(**r))
@@ -0,0 +1,112 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+"""
+Accuracy check and throughput benchmark of the scalar project_point and get_bearing functions against the vectorized
+project_points and get_bearings functions and the Trig_table. The accuracy check fails with an AssertionError if a
+batch result differs from the scalar result by more than the tolerance.
+
+Run from the repository root: python benchmarks/bench_geometry.py
+"""
+
+import os
+import sys
+from math import sin, radians
+from time import perf_counter
+from random import Random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy
+from units import project_point, get_bearing, project_points, get_bearings, Trig_table
+
+
+def make_samples(count, rng):
+    origins = [(rng.uniform(0, 1280), rng.uniform(0, 1024)) for i in range(count)]
+    targets = [(rng.uniform(0, 1280), rng.uniform(0, 1024)) for i in range(count)]
+    #Include the axis aligned cases and identical points
+    for i, (dx, dy) in enumerate(((0, -10), (0, 10), (-10, 0), (10, 0), (0, 0))):
+        targets[i] = (origins[i][0] + dx, origins[i][1] + dy)
+    bearings = [rng.uniform(0, 360) for i in range(count)]
+    bearings[:4] = [0, 90, 180, 270]
+    distances = [rng.uniform(0, 800) for i in range(count)]
+    return origins, targets, bearings, distances
+
+
+def check_accuracy(origins, targets, bearings, distances, table, tolerance=1e-6):
+    xs = numpy.array([o[0] for o in origins])
+    ys = numpy.array([o[1] for o in origins])
+    batch_x, batch_y = project_points(xs, ys, numpy.array(bearings), numpy.array(distances))
+    table_error = 0.0
+    for i in range(len(origins)):
+        scalar = project_point(origins[i][0], origins[i][1], bearings[i], distances[i])
+        assert abs(scalar[0] - batch_x[i]) < tolerance and abs(scalar[1] - batch_y[i]) < tolerance, i
+        fast = table.project_point(origins[i][0], origins[i][1], bearings[i], distances[i])
+        table_error = max(table_error, abs(scalar[0] - fast[0]), abs(scalar[1] - fast[1]))
+    #Rounding the bearing to the table resolution moves the point by at most 2*sin(resolution/4)*distance
+    assert table_error <= 2 * sin(radians(table.get_resolution() / 4)) * max(distances) + tolerance
+
+    batch_bearings, batch_distances = get_bearings(numpy.array(origins), numpy.array(targets))
+    for i in range(len(origins)):
+        bearing, distance = get_bearing(origins[i], targets[i])
+        assert isinstance(bearing, float) and isinstance(distance, float), i
+        assert abs(bearing - batch_bearings[i]) < tolerance and abs(distance - batch_distances[i]) < tolerance, i
+    return table_error
+
+
+def time_it(function, repeats=3):
+    best = None
+    for i in range(repeats):
+        start = perf_counter()
+        function()
+        elapsed = perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def run(count=100000, resolution=0.25):
+    rng = Random(0)
+    origins, targets, bearings, distances = make_samples(count, rng)
+    table = Trig_table(resolution)
+    table_error = check_accuracy(origins, targets, bearings, distances, table)
+
+    xs = numpy.array([o[0] for o in origins])
+    ys = numpy.array([o[1] for o in origins])
+    np_bearings = numpy.array(bearings)
+    np_distances = numpy.array(distances)
+    np_origins = numpy.array(origins)
+    np_targets = numpy.array(targets)
+
+    timings = {
+        "project_point": time_it(lambda: [project_point(o[0], o[1], b, d)
+                                          for o, b, d in zip(origins, bearings, distances)]),
+        "trig_table.project_point": time_it(lambda: [table.project_point(o[0], o[1], b, d)
+                                                     for o, b, d in zip(origins, bearings, distances)]),
+        "project_points": time_it(lambda: project_points(xs, ys, np_bearings, np_distances)),
+        "get_bearing": time_it(lambda: [get_bearing(o, t) for o, t in zip(origins, targets)]),
+        "get_bearings": time_it(lambda: get_bearings(np_origins, np_targets)),
+    }
+    return {"count": count, "trig_table_resolution": resolution, "trig_table_max_error_px": table_error,
+            "million_calls_per_second": {name: count / t / 1e6 for name, t in timings.items()}}
+
+
+if __name__ == "__main__":
+    result = run()
+    print("accuracy ok, trig table max error {:.4f} px at {} deg resolution".format(
+        result["trig_table_max_error_px"], result["trig_table_resolution"]))
+    for name, rate in result["million_calls_per_second"].items():
+        print("{:<26} {:8.2f} M points/s".format(name, rate))
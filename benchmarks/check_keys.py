@@ -0,0 +1,87 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+
+"""
+Check of the keys handled by Destroyer_game.handle_events while playing. A windowed game is run on SDL's dummy video
+driver, key presses are posted as pygame events from a scripted input, and the states they switch are checked. The
+check fails with an AssertionError if a key does not switch its state.
+
+    F2 : dirty rect rendering
+    F3 : frame rate cap
+
+Run from anywhere: python benchmarks/check_keys.py
+"""
+
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+from game import Destroyer_game
+from inputs import Scripted_input
+
+
+def post_key(key):
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0))
+
+
+def run(presses=2, interval=10):
+
+    """
+    Runs a game in which every interval simulation steps the checked keys are pressed, presses times in total. After
+    every press the states are compared with the states before it. The game is ended with a QUIT event.
+
+    :returns: list of the states after every press
+    """
+
+    history = []
+
+    def get_states():
+        return {"dirty_rects": game.get_graphics().get_dirty_rects(), "frame_cap": game.get_frame_cap()}
+
+    def script(tick):
+        #The keys posted in a step are handled in the next frame
+        if tick % interval == 0:
+            states = get_states()
+            if history:
+                for name, state in states.items():
+                    assert state != history[-1][name], name
+            history.append(states)
+            if len(history) > presses:
+                pygame.event.post(pygame.event.Event(pygame.QUIT))
+            else:
+                post_key(pygame.K_F2)
+                post_key(pygame.K_F3)
+        return ()
+
+    game = Destroyer_game(profile=False, input_source=Scripted_input(script))
+    try:
+        game.run()
+    except SystemExit:
+        pass
+    assert len(history) == presses + 1, history
+    return history
+
+
+if __name__ == "__main__":
+    for states in run():
+        print(states)
+    print("key check ok")
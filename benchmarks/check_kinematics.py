@@ -0,0 +1,83 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+
+"""
+Check of the packed movement of enemy ships and torpedos under a real enemy load. The same seeded headless games are
+run with the Kinematics store and with every unit moving itself. The check fails with an AssertionError if the
+results differ, or if the ships were never moved packed.
+
+The games start in the high levels, where up to 10 ships are on the screen, more than the pack limit of the store.
+
+Run from anywhere: python benchmarks/check_kinematics.py
+"""
+
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import unit_handling
+from kinematics import Kinematics
+from game import Destroyer_game
+
+
+class Counting_kinematics(Kinematics):
+
+    """
+    Kinematics store counting its packed and unpacked steps.
+    """
+
+    steps = {True: 0, False: 0}
+
+    def step(self, time_delta, level=0):
+        Counting_kinematics.steps[self.is_packed()] += 1
+        Kinematics.step(self, time_delta, level)
+
+
+def play(seed, level, ticks, kinematics):
+    unit_handling.Kinematics = kinematics
+    try:
+        game = Destroyer_game(init_game_level=level, headless=True, max_ticks=ticks, seed=seed, profile=False)
+        stats = game.run()
+    finally:
+        unit_handling.Kinematics = Kinematics
+    return game.get_result(), stats["levels"]
+
+
+def run(seeds=(1, 2), levels=(6, 9), ticks=12000):
+    results = []
+    for seed in seeds:
+        for level in levels:
+            Counting_kinematics.steps = {True: 0, False: 0}
+            packed = play(seed, level, ticks, Counting_kinematics)
+            steps = Counting_kinematics.steps
+            unpacked = play(seed, level, ticks, None)
+            assert packed == unpacked, (seed, level, packed, unpacked)
+            results.append({"seed": seed, "level": level, "result": packed[0], "packed_steps": steps[True],
+                            "unpacked_steps": steps[False]})
+    assert sum(r["packed_steps"] for r in results) > 0, results
+    return results
+
+
+if __name__ == "__main__":
+    for r in run():
+        print("seed {seed} level {level}: {packed_steps} packed and {unpacked_steps} unpacked steps, "
+              "{result}".format(**r))
+    print("kinematics check ok")
@@ -0,0 +1,250 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+
+"""
+Benchmark suite of the per cycle hot paths. For every entity count a synthetic world is built in which every
+container holds that many entities: enemies, bullets, torpedos, crates, fades, texts and explosions. Then one call of
+each hot path is timed in a fresh copy of the world, several times. The micro benchmarks of this directory run as
+well. The results are written as JSON together with the environment they were measured in.
+
+Runs under SDL's dummy video driver. Run from anywhere:
+
+    python benchmarks/run_benchmarks.py --output results.json
+
+Cases that take longer than the timeout are reported with "timed_out" instead of timings. On platforms without
+signal.setitimer there is no timeout.
+"""
+
+import os
+import sys
+import json
+import signal
+import argparse
+import platform
+import subprocess
+from time import perf_counter
+from random import Random
+from datetime import datetime
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+
+import pygame
+import assets
+from game import Timer, Game_level
+from gfx import Explosion_atlas, Explosions, Fades, Texts, Trails, Destroyer_gfx
+from logic import Points, Destroyer_logic
+from units import Destroyer_options, Destroyer, Submarine, Gunboat, Torpedoboat, Torpedo_0, Destroyer_bullet_1, \
+    Standard_enemy_bullet, Repair_crate
+from unit_handling import Enemies, Torpedos, Bullets, Crates
+
+WINDOW_SIZE = (1280, 1024)
+FONT_SIZE = 16
+TICK = 1.0 / 120
+
+
+class Case_timeout(Exception):
+    pass
+
+
+def make_world(count, seed=0):
+
+    """
+    Builds a world with count entities in every container, at random positions in the window. Returns the game
+    objects as a dictionary.
+    """
+
+    rng = Random(seed)
+    screen = pygame.display.get_surface()
+    timer = Timer()
+    timer.start()
+    timer.set_delta(TICK)
+    center = (WINDOW_SIZE[0] / 2, WINDOW_SIZE[1] / 2)
+
+    game_level = Game_level(0)
+    points = Points()
+    texts = Texts(timer)
+    explosions = Explosions(timer)
+    options = Destroyer_options(timer)
+    destroyer = Destroyer(0, 5000, options, WINDOW_SIZE)
+    trails = Trails(timer)
+    bullets = Bullets(timer, center, WINDOW_SIZE, trails)
+    torpedos = Torpedos(timer, WINDOW_SIZE)
+    crates = Crates(timer, WINDOW_SIZE, FONT_SIZE + 20, destroyer, game_level, rng=rng)
+    #One free enemy slot, so add_enemy() places a new ship
+    enemies = Enemies(timer, (1, 3), count + 1, torpedos, crates, bullets, game_level, WINDOW_SIZE, FONT_SIZE,
+                      rng=rng)
+    crates.set_enemies(enemies)
+    fades = Fades(timer)
+
+    def position():
+        return rng.randrange(0, WINDOW_SIZE[0]), rng.randrange(FONT_SIZE + 20, WINDOW_SIZE[1])
+
+    ship_classes = (Submarine, Gunboat, Torpedoboat)
+    for i in range(count):
+        ship_class = ship_classes[i % len(ship_classes)]
+        ship = ship_class(ship_class.get_params()["min_speed"], position(), 1 if i % 2 else 3)
+        enemies.add_ship(ship)
+        bullet_class = Destroyer_bullet_1 if i % 2 else Standard_enemy_bullet
+        bullets.fire(bullet_class, position(), rng.randrange(0, 360))
+        torpedos.add_torpedo(Torpedo_0(Torpedo_0.get_params()["min_speed"], position(), 0 if i % 2 else 2))
+        crates.add_crate(Repair_crate(position(), 100, 100))
+        fades.add_fade(ship.get_image()[0], ship.get_image()[1], 0.5)
+        texts.add_text(position(), "+{}".format(ship.get_params()["points"]))
+        explosions.create_explosion(position(), 20)
+
+    logic = Destroyer_logic(timer, destroyer, options, enemies, bullets, torpedos, explosions, fades, texts, points,
+                            crates, WINDOW_SIZE, rng=rng)
+    graphics = Destroyer_gfx(screen, destroyer, enemies, bullets, torpedos, explosions, fades, texts, points, crates,
+                             game_level, FONT_SIZE, "./media/background.png", trails)
+    return {"timer": timer, "enemies": enemies, "bullets": bullets, "torpedos": torpedos, "crates": crates,
+            "fades": fades, "texts": texts, "explosions": explosions, "logic": logic, "graphics": graphics}
+
+
+def make_crate(world):
+    #The crate spawn wait is at most 25 s, a long step makes the next call spawn a crate
+    timer = world["timer"]
+    timer.set_delta(30.0)
+    try:
+        world["crates"].make_crate(timer)
+    finally:
+        timer.set_delta(TICK)
+
+
+def run_scheduler(world):
+    #After 10 s of game time the first shot of every gun and the expiry of every crate are due
+    timer = world["timer"]
+    timer.set_delta(10.0)
+    timer.advance()
+    timer.set_delta(TICK)
+    timer.get_scheduler().run()
+
+
+CASES = [
+    ("Destroyer_logic.check", lambda w: w["logic"].check()),
+    ("Bullets.move", lambda w: w["bullets"].move()),
+    ("Enemies.move", lambda w: w["enemies"].move()),
+    ("Enemies.shoot", lambda w: w["enemies"].shoot()),
+    ("Scheduler.run", run_scheduler),
+    ("Torpedos.move", lambda w: w["torpedos"].move()),
+    ("Enemies.add_enemy", lambda w: w["enemies"].add_enemy()),
+    ("Crates.make_crate", make_crate),
+    ("Fades.fade", lambda w: w["fades"].fade()),
+    ("Texts.move", lambda w: w["texts"].move()),
+    ("Explosions.change_frames", lambda w: w["explosions"].change_frames()),
+    ("Destroyer_gfx.draw", lambda w: w["graphics"].draw()),
+]
+
+
+def on_timeout(signum, frame):
+    raise Case_timeout()
+
+
+def time_case(function, count, samples, timeout):
+
+    """
+    Times one call of function in samples fresh worlds of count entities.
+
+    :returns: dictionary with the timings in ms, or with timed_out set
+    """
+
+    times = []
+    use_alarm = timeout and hasattr(signal, "setitimer")
+    for sample in range(samples):
+        world = make_world(count, seed=sample)
+        if use_alarm:
+            signal.signal(signal.SIGALRM, on_timeout)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            start = perf_counter()
+            function(world)
+            times.append(perf_counter() - start)
+        except Case_timeout:
+            return {"entities": count, "timed_out": True, "timeout_s": timeout}
+        finally:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    times.sort()
+    return {"entities": count, "samples": samples, "min_ms": times[0] * 1e3,
+            "median_ms": times[len(times) // 2] * 1e3, "max_ms": times[-1] * 1e3}
+
+
+def get_environment():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT,
+                                         stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {"timestamp": datetime.now().isoformat(), "git_commit": commit, "python": sys.version,
+            "implementation": platform.python_implementation(), "platform": platform.platform(),
+            "machine": platform.machine(), "processor": platform.processor(), "cpu_count": os.cpu_count(),
+            "pygame": pygame.version.ver, "sdl": ".".join(str(v) for v in pygame.get_sdl_version()),
+            "numpy": numpy_version, "video_driver": pygame.display.get_driver(), "window_size": list(WINDOW_SIZE)}
+
+
+def run(counts=(10, 100, 1000, 10000), samples=5, timeout=30.0, micro=True, cases=None):
+    pygame.init()
+    pygame.display.set_mode(WINDOW_SIZE)
+    assets.images.preload("./media")
+    Explosion_atlas.build()
+
+    results = {}
+    for name, function in CASES:
+        if cases and name not in cases:
+            continue
+        results[name] = [time_case(function, count, samples, timeout) for count in counts]
+
+    report = {"environment": get_environment(), "settings": {"counts": list(counts), "samples": samples,
+                                                             "timeout_s": timeout}, "hot_paths": results}
+    if micro:
+        import bench_alpha_blit
+        import bench_collisions
+        import bench_geometry
+        report["micro"] = {"alpha_blit": bench_alpha_blit.run(), "collisions": bench_collisions.run(),
+                           "geometry": bench_geometry.run()}
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Destroyer hot path benchmark suite")
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 100, 1000, 10000],
+                        help="entity counts of the synthetic worlds")
+    parser.add_argument("--samples", type=int, default=5, help="timed calls per case and entity count")
+    parser.add_argument("--timeout", type=float, default=30.0, help="time limit of one call in seconds, 0 for none")
+    parser.add_argument("--case", action="append", default=None, help="only run the named case, can be repeated")
+    parser.add_argument("--no-micro", action="store_true", help="skip the micro benchmarks")
+    parser.add_argument("--output", default=None, help="JSON output file, default stdout")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run(args.counts, args.samples, args.timeout, not args.no_micro, args.case)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
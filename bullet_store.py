@@ -0,0 +1,392 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+from math import floor
+import pygame
+from units import unit_vector
+from pool import Pool
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Bullet_view(object):
+    def __init__(self, store, index):
+
+        """
+        Stand-in for a Bullet object of the Array_bullets store. It has the same getters as the Bullet class, but
+        reads the values from the store arrays at its index. Views are bound to a position in the store, not to a
+        bullet, so they must not be kept beyond the cycle they were taken from get_bullets().
+        """
+
+        self.__store = store
+        self.__index = index
+
+    def get_image(self):
+        return self.__store.get_image(self.__index)
+
+    def get_position(self):
+        return self.__store.get_position(self.__index)
+
+    def get_draw_rect(self, alpha):
+        return self.__store.get_draw_rect(self.__index, alpha)
+
+    def get_damage(self):
+        return self.__store.get_damage(self.__index)
+
+    def is_friendly(self):
+        return self.__store.is_friendly(self.__index)
+
+    def get_direction(self):
+        return self.__store.get_direction(self.__index)
+
+    def get_trail(self):
+        return self.__store.get_trail(self.__index)
+
+
+class Array_bullets(object):
+
+    def __init__(self, timer, origin, window_size, trails=None, capacity=1024, pool_size=16):
+
+        """
+        Drop-in replacement for the Bullets class that keeps the bullet state in NumPy arrays instead of a list of
+        Bullet objects. Position, direction, speed, damage, friendliness and half extents of all bullets are stored in
+        contiguous arrays and moved together in one vectorized step per cycle. Bullets that have left the window are
+        found with one mask and removed in the same step.
+
+        Bullets are still created as Bullet objects, add_bullet() copies their values into the arrays. get_bullets()
+        returns Bullet_view objects, so collision checks and drawing work as with the Bullets class. Bullets created
+        with fire() are only needed while their values are copied, so they are taken from a small pool per bullet class
+        and returned right away.
+
+        The collision checks work on the arrays as a whole: collide() finds the bullets overlapping a list of
+        rectangles from the rectangle arrays without creating Bullet_view rectangles, see get_rect_arrays().
+
+        Every bullet gets a handle when it is added. Handles are never reused, so they stay valid as long as the
+        bullet exists and identify it across the array compactions. remove_bullets() marks bullets by handle and
+        apply_removals() removes all marked bullets with one mask.
+
+        Requires numpy.
+
+        :param timer        : timer game instance
+        :param origin       : origin of the destroyer bullets as x,y
+        :param window_size  : window size as x,y
+        :param trails       : Trails game instance the trail segments are handed to
+        :param capacity     : initial array size, the arrays grow when needed
+        :param pool_size    : number of unused bullet objects kept per bullet class
+        :type window_size   : list
+        :type trails        : Trails
+        :type capacity      : int
+        :type pool_size     : int
+        """
+
+        if numpy is None:
+            raise ImportError("Array_bullets requires numpy")
+
+        self.__timer = timer
+        self.__origin = origin
+        self.__window_size = window_size
+        self.__trails = trails
+        self.__count = 0
+        self.__views = []
+        self.__images = []
+        self.__arrays = {}
+        self.__pool_size = pool_size
+        self.__pools = {}
+        self.__handles = []
+        self.__next_handle = 0
+        self.__pending = set()
+        self.__allocate(capacity)
+
+    def __allocate(self, capacity):
+        old_count = self.__count
+        arrays = {}
+        for name in ("x", "y", "dx", "dy", "speed", "half_w", "half_h", "trail_offset", "step", "direction"):
+            arrays[name] = numpy.zeros(capacity, dtype=numpy.float64)
+        arrays["damage"] = numpy.zeros(capacity, dtype=numpy.int64)
+        arrays["size_w"] = numpy.zeros(capacity, dtype=numpy.int64)
+        arrays["size_h"] = numpy.zeros(capacity, dtype=numpy.int64)
+        arrays["friendly"] = numpy.zeros(capacity, dtype=numpy.bool_)
+        arrays["trail"] = numpy.zeros(capacity, dtype=numpy.bool_)
+        arrays["handle"] = numpy.zeros(capacity, dtype=numpy.int64)
+
+        if old_count > 0:
+            for name, array in arrays.items():
+                array[:old_count] = self.__arrays[name][:old_count]
+        self.__arrays = arrays
+        self.__capacity = capacity
+
+    def add_bullet(self, bullet):
+        i = self.__count
+        if i == self.__capacity:
+            self.__allocate(self.__capacity * 2)
+
+        image = bullet.get_image()[0]
+        position = bullet.get_position()
+        direction = bullet.get_direction()
+        self.__arrays["x"][i] = position[0]
+        self.__arrays["y"][i] = position[1]
+        self.__arrays["dx"][i], self.__arrays["dy"][i] = unit_vector(direction)
+        self.__arrays["direction"][i] = direction
+        self.__arrays["speed"][i] = bullet.get_speed()
+        self.__arrays["damage"][i] = bullet.get_damage()
+        self.__arrays["friendly"][i] = bool(bullet.is_friendly())
+        self.__arrays["size_w"][i] = image.get_width()
+        self.__arrays["size_h"][i] = image.get_height()
+        self.__arrays["half_w"][i] = image.get_width() / 2.0
+        self.__arrays["half_h"][i] = image.get_height() / 2.0
+        self.__arrays["trail"][i] = bullet.has_trail()
+        self.__arrays["trail_offset"][i] = bullet.get_trail_offset()
+        self.__arrays["step"][i] = 0
+        handle = self.__next_handle
+        self.__next_handle += 1
+        self.__arrays["handle"][i] = handle
+
+        self.__images.append(image)
+        self.__handles.append(handle)
+        self.__views.append(Bullet_view(self, i))
+        self.__count += 1
+        return handle
+
+    def fire(self, bullet_class, origin, direction, **kwargs):
+        pool = self.__pools.get(bullet_class)
+        if pool is None:
+            pool = Pool(bullet_class, self.__pool_size)
+            self.__pools[bullet_class] = pool
+        bullet = pool.acquire(self.__timer, origin, direction, **kwargs)
+        handle = self.add_bullet(bullet)
+        pool.release(bullet)
+        return handle
+
+    def move(self):
+
+        """
+        Moves all bullets by the timer delta and removes the bullets outside of the game window.
+
+        :returns: handles of the removed bullets
+        """
+
+        n = self.__count
+        if n == 0:
+            return []
+
+        step = self.__arrays["step"][:n]
+        numpy.multiply(self.__arrays["speed"][:n], self.__timer.get_delta(), out=step)
+        x = self.__arrays["x"][:n]
+        y = self.__arrays["y"][:n]
+        x += self.__arrays["dx"][:n] * step
+        y += self.__arrays["dy"][:n] * step
+
+        if self.__trails is not None:
+            for i in numpy.flatnonzero(self.__arrays["trail"][:n]):
+                trail = self.get_trail(i)
+                self.__trails.add_segment(self.__handles[i], trail)
+
+        #Same bounds as Out_window.check_bullets of the list store, which tests get_position()
+        x, y = self.get_position_arrays()
+        out = (x < 0) | (x > self.__window_size[0]) | (y < 0) | (y > self.__window_size[1])
+        if not out.any():
+            return []
+        removed = self.__arrays["handle"][:n][out].tolist()
+        self.__compact(~out)
+        return removed
+
+    def get_bullets(self):
+        return self.__views
+
+    def get_handles(self):
+        return self.__handles
+
+    def get_out_of_window(self):
+
+        """
+        Returns the bullets outside of the game window. move() already removes them, so the list is always empty.
+        """
+
+        return []
+
+    def get_friendly_mask(self):
+
+        """
+        Returns a boolean array marking the friendly bullets, in the order of get_bullets().
+        """
+
+        return self.__arrays["friendly"][:self.__count]
+
+    def get_rect_arrays(self):
+
+        """
+        Returns the rectangles of all bullets as arrays of left, top, width and height. The values are the ones of
+        the rectangles returned by get_image().
+        """
+
+        n = self.__count
+        left = numpy.trunc(self.__arrays["x"][:n] - self.__arrays["half_w"][:n]).astype(numpy.int64)
+        top = numpy.trunc(self.__arrays["y"][:n] - self.__arrays["half_h"][:n]).astype(numpy.int64)
+        return left, top, self.__arrays["size_w"][:n], self.__arrays["size_h"][:n]
+
+    def get_position_arrays(self):
+
+        """
+        Returns the positions of all bullets as arrays of x and y, rounded down like get_position().
+        """
+
+        n = self.__count
+        return (numpy.floor(self.__arrays["x"][:n]).astype(numpy.int64),
+                numpy.floor(self.__arrays["y"][:n]).astype(numpy.int64))
+
+    def collide(self, rects, friendly=True, cell_size=64):
+
+        """
+        Finds the friendly or the hostile bullets that collide with rects, like pygame.Rect.colliderect.
+
+        The bullets are sorted by the grid cell of their top left corner. A bullet can only reach a rectangle from the
+        cells up to one bullet size left of and above it, so the candidates of every row of cells a rectangle covers
+        are one contiguous range of the sorted bullets, found with a binary search. All rectangles and rows are
+        searched at once and the candidates are tested exactly with one mask.
+
+        :param rects        : rectangles to test the bullets against
+        :param friendly     : test the friendly bullets if True, the hostile ones otherwise
+        :param cell_size    : edge length of the grid cells in px
+        :type rects         : list of pygame.Rect
+        :type friendly      : bool
+        :type cell_size     : int
+
+        :returns: list of (bullet index, rect index), sorted by bullet index and then by rect index
+        """
+
+        n = self.__count
+        if n == 0 or not rects:
+            return []
+        index = numpy.flatnonzero(self.get_friendly_mask() == friendly)
+        if index.size == 0:
+            return []
+        left, top, width, height = (array[index] for array in self.get_rect_arrays())
+        targets = numpy.array([tuple(rect) for rect in rects], dtype=numpy.int64).reshape(-1, 4)
+
+        #Grid cells of the bullets, numbered row by row
+        cell_x = left // cell_size
+        cell_y = top // cell_size
+        x_min, x_max = int(cell_x.min()), int(cell_x.max())
+        y_min, y_max = int(cell_y.min()), int(cell_y.max())
+        columns = x_max - x_min + 1
+        keys = (cell_y - y_min) * columns + (cell_x - x_min)
+        order = numpy.argsort(keys, kind="stable")
+        keys = keys[order]
+
+        #Cells a bullet overlapping a rectangle can start in
+        t_left, t_top, t_width, t_height = targets.T
+        low_x = numpy.maximum((t_left - int(width.max()) + 1) // cell_size, x_min)
+        high_x = numpy.minimum((t_left + t_width - 1) // cell_size, x_max)
+        low_y = numpy.maximum((t_top - int(height.max()) + 1) // cell_size, y_min)
+        high_y = numpy.minimum((t_top + t_height - 1) // cell_size, y_max)
+        rows = numpy.where((low_x <= high_x) & (t_width > 0) & (t_height > 0), high_y - low_y + 1, 0)
+        rows = numpy.maximum(rows, 0)
+        total = int(rows.sum())
+        if total == 0:
+            return []
+
+        #One binary search per rectangle and row of cells
+        row_target = numpy.repeat(numpy.arange(len(targets)), rows)
+        row_y = low_y[row_target] + numpy.arange(total) - numpy.repeat(numpy.cumsum(rows) - rows, rows)
+        row_start = (row_y - y_min) * columns - x_min
+        start = numpy.searchsorted(keys, row_start + low_x[row_target], "left")
+        end = numpy.searchsorted(keys, row_start + high_x[row_target], "right")
+        counts = end - start
+        candidates = int(counts.sum())
+        if candidates == 0:
+            return []
+
+        target = numpy.repeat(row_target, counts)
+        bullet = order[numpy.repeat(start - (numpy.cumsum(counts) - counts), counts) + numpy.arange(candidates)]
+        hit = ((left[bullet] < t_left[target] + t_width[target]) & (left[bullet] + width[bullet] > t_left[target]) &
+               (top[bullet] < t_top[target] + t_height[target]) & (top[bullet] + height[bullet] > t_top[target]))
+        bullet = index[bullet[hit]]
+        target = target[hit]
+        sort = numpy.lexsort((target, bullet))
+        return list(zip(bullet[sort].tolist(), target[sort].tolist()))
+
+    def remove_bullets(self, handles):
+        self.__pending.update(handles)
+
+    def apply_removals(self):
+        if self.__pending:
+            pending = numpy.fromiter(self.__pending, dtype=numpy.int64, count=len(self.__pending))
+            self.__pending.clear()
+            keep = ~numpy.isin(self.__arrays["handle"][:self.__count], pending)
+            if not keep.all():
+                self.__compact(keep)
+
+    def __compact(self, keep):
+        n = self.__count
+        m = int(numpy.count_nonzero(keep))
+        for array in self.__arrays.values():
+            array[:m] = array[:n][keep]
+        keep = keep.tolist()
+        self.__images = [image for image, k in zip(self.__images, keep) if k]
+        self.__handles = [handle for handle, k in zip(self.__handles, keep) if k]
+        del self.__views[m:]
+        self.__count = m
+
+    def count(self):
+        return self.__count
+
+    def get_pool_stats(self):
+        return {bullet_class.__name__: pool.get_stats() for bullet_class, pool in self.__pools.items()}
+
+    def get_image(self, i):
+        return self.__images[i], pygame.Rect(self.__arrays["x"][i] - self.__arrays["half_w"][i],
+                                             self.__arrays["y"][i] - self.__arrays["half_h"][i],
+                                             self.__arrays["size_w"][i], self.__arrays["size_h"][i])
+
+    def get_draw_rect(self, i, alpha):
+
+        """
+        Returns the rectangle of bullet i moved back along its last step by 1 - alpha, like Bullet.get_draw_rect().
+        """
+
+        back = (1 - alpha) * self.__arrays["step"][i] if alpha < 1 else 0
+        return pygame.Rect(self.__arrays["x"][i] - self.__arrays["dx"][i] * back - self.__arrays["half_w"][i],
+                           self.__arrays["y"][i] - self.__arrays["dy"][i] * back - self.__arrays["half_h"][i],
+                           self.__arrays["size_w"][i], self.__arrays["size_h"][i])
+
+    def get_position(self, i):
+        return [int(floor(self.__arrays["x"][i])), int(floor(self.__arrays["y"][i]))]
+
+    def get_damage(self, i):
+        return int(self.__arrays["damage"][i])
+
+    def is_friendly(self, i):
+        return bool(self.__arrays["friendly"][i])
+
+    def get_direction(self, i):
+        return float(self.__arrays["direction"][i])
+
+    def get_trail(self, i):
+
+        """
+        Returns the trail segment of the last movement of bullet i like Bullet.get_trail(), or None.
+        """
+
+        if not self.__arrays["trail"][i]:
+            return None
+        step = self.__arrays["step"][i]
+        distance = self.__arrays["trail_offset"][i] + floor(step / 2)
+        return (float(self.__arrays["x"][i] - self.__arrays["dx"][i] * distance),
+                float(self.__arrays["y"][i] - self.__arrays["dy"][i] * distance),
+                float(step + 2), float(self.__arrays["direction"][i]))
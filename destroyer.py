@@ -15,9 +15,41 @@
 ########################################################################################################################
 
 from game import *
+import argparse
 import sys
 
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Destroyer - a small boat shooter game.")
+    parser.add_argument("--headless", action="store_true",
+                        help="run the simulation without a window and print the run statistics")
+    parser.add_argument("--render", action="store_true",
+                        help="with --headless, draw every step to SDL's dummy display")
+    parser.add_argument("--ticks", type=int, default=None,
+                        help="number of simulation steps of a headless run, default until the destroyer is sunk")
+    parser.add_argument("--tick-rate", type=int, default=120, help="simulation steps per second")
+    parser.add_argument("--fps", type=int, default=60, help="frame rate cap, 0 for uncapped rendering")
+    parser.add_argument("--level", type=int, default=0, help="initial game level")
+    parser.add_argument("--bullet-store", choices=("list", "numpy"), default="list", help="bullet container")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the random number generator")
+    parser.add_argument("--record", default=None, help="record the input of the run to a replay file")
+    parser.add_argument("--replay", default=None,
+                        help="play back a replay file and print the frame time statistics")
+    parser.add_argument("--no-profile", action="store_true", help="disable the stage profiler")
+    parser.add_argument("--profile-csv", default=None, help="write the per frame stage times to a CSV file")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    myGame = Destroyer_game()
-    if myGame.run():
+    args = parse_args()
+    headless = ("render" if args.render else True) if args.headless else False
+    myGame = Destroyer_game(init_game_level=args.level, bullet_store=args.bullet_store, tick_rate=args.tick_rate,
+                            target_fps=args.fps, headless=headless, max_ticks=args.ticks, seed=args.seed,
+                            record=args.record, replay=args.replay, profile=not args.no_profile,
+                            profile_csv=args.profile_csv)
+    result = myGame.run()
+    if headless or args.replay is not None:
+        for name, value in result.items():
+            print("{:<18} {}".format(name, value))
+    if result:
         sys.exit()
@@ -1,3 +1,5 @@
+import os
+import random
 import pygame
 import sys
 from units import *
@@ -5,41 +7,197 @@ from gfx import *
 from menus import *
 from logic import *
 from unit_handling import *
-from time import sleep
-import datetime
+from bullet_store import Array_bullets
+from inputs import Keyboard_input, Scripted_input
+from replay import Replay_recorder, Replay_input
+from profiler import Stage_profiler, Profiler_overlay
+from scheduler import Scheduler
+import assets
+from time import sleep, perf_counter
 
 #Timer类用于测量游戏周期之间的时间差，并将此差返回给需要它的其他游戏对象。
 class Timer(object):
     """This class is used as a time tracker for the game. Each cykle through the main loop the time difference is
     measure. The object is then passed into different game objects that require time deltas and their calculations are
     based on the time delta received from the Timer game instance.
+
+    With a fixed step loop the simulation timer is not measured, the loop sets the tick length with set_delta() and
+    a second timer measures the wall clock time of the frames. advance() adds the delta to the game time once per
+    simulation step.
+
+    Timed game events, for example crate expiry and weapon buffs, are registered on the Scheduler of the timer, see
+    get_scheduler(). They run on the game time and stop with it while the game is paused.
     """
-    #定义三个私有属性
+    #定义私有属性
     def __init__(self):
         self.__old_time = None
         self.__new_time = None
         self.__delta = None
+        self.__game_time = 0.0
+        self.__scheduler = Scheduler(self.get_time)
 
     #开始计时
     def start(self):
-        self.__old_time = datetime.datetime.now()
+        self.__old_time = perf_counter()
         self.__delta = 0
 
     #更新计时
     def time(self):
-        new_time = datetime.datetime.now()
-        self.__delta = (new_time-self.__old_time).total_seconds()
+        new_time = perf_counter()
+        self.__delta = new_time-self.__old_time
         self.__old_time = new_time
 
     #返回时间差
     def get_delta(self):
         return self.__delta
 
+    #设置固定时间差
+    def set_delta(self, delta):
+        self.__delta = delta
+
+    #游戏时间前进一个时间差
+    def advance(self):
+        self.__game_time += self.__delta
+
+    #返回游戏时间
+    def get_time(self):
+        return self.__game_time
+
+    #返回游戏时间的定时器
+    def get_scheduler(self):
+        return self.__scheduler
+
     #重置时间
     def reset(self):
-        self.__old_time = datetime.datetime.now()
+        self.__old_time = perf_counter()
         self.__delta = 0
 
+
+#Rate_meter类统计每秒的次数，用于分别报告模拟频率和渲染频率
+class Rate_meter(object):
+    def __init__(self, window=1.0):
+
+        """
+        Counts events, for example simulation ticks or rendered frames, and computes their rate per second over
+        windows of the given length in seconds.
+        """
+
+        self.__window = window
+        self.__count = 0
+        self.__total = 0
+        self.__start = None
+        self.__rate = 0.0
+
+    def count(self, now, events=1):
+        if self.__start is None:
+            self.__start = now
+        self.__count += events
+        self.__total += events
+        elapsed = now - self.__start
+        if elapsed >= self.__window:
+            self.__rate = self.__count / elapsed
+            self.__count = 0
+            self.__start = now
+            return True
+        return False
+
+    def reset(self, now):
+        self.__count = 0
+        self.__start = now
+
+    def get_rate(self):
+        return self.__rate
+
+    def get_total(self):
+        return self.__total
+
+#Frame_limiter类把帧率限制在目标FPS，先睡眠再忙等待以获得精确的帧间隔
+class Frame_limiter(object):
+    def __init__(self, target_fps=60, spin_time=0.002):
+
+        """
+        Limits the frame rate to target_fps. wait() is called once per frame and returns at the start of the next
+        frame. Most of the remaining time is slept, the last spin_time seconds are spun on perf_counter, because
+        sleep() may wake up several milliseconds late. The frame start times follow a fixed schedule, so early and
+        late frames even out. If a frame is late by more than a whole frame, the schedule starts over from now.
+
+        :param target_fps   : frames per second, None or 0 for uncapped frames (benchmark mode)
+        :param spin_time    : time in seconds before the frame start that is spun instead of slept
+        :type target_fps    : int
+        :type spin_time     : float
+        """
+
+        self.__spin_time = spin_time
+        self.__next_frame = None
+        self.__frame_start = None
+        self.__frame_time = 0.0
+        self.__max_frame_time = 0.0
+        self.set_target_fps(target_fps)
+
+    def set_target_fps(self, target_fps):
+        self.__target_fps = target_fps
+        self.__period = 1.0 / target_fps if target_fps else 0.0
+        self.__next_frame = None
+
+    def get_target_fps(self):
+        return self.__target_fps
+
+    def wait(self):
+        now = perf_counter()
+        if self.__frame_start is not None:
+            self.__frame_time = now - self.__frame_start
+            if self.__frame_time > self.__max_frame_time:
+                self.__max_frame_time = self.__frame_time
+
+        if self.__period > 0:
+            if self.__next_frame is None or now - self.__next_frame > self.__period:
+                self.__next_frame = now + self.__period
+            else:
+                self.__next_frame += self.__period
+            sleep_time = self.__next_frame - now - self.__spin_time
+            if sleep_time > 0:
+                sleep(sleep_time)
+            while perf_counter() < self.__next_frame:
+                pass
+            now = perf_counter()
+        self.__frame_start = now
+
+    def get_frame_time(self):
+        return self.__frame_time
+
+    def pop_max_frame_time(self):
+
+        """
+        Returns the longest frame time since the last call and starts over.
+        """
+
+        max_frame_time = self.__max_frame_time
+        self.__max_frame_time = 0.0
+        return max_frame_time
+
+
+#不使用性能分析器时的空标记函数
+def skip_mark(name):
+    pass
+
+
+def frame_time_stats(frame_times):
+
+    """
+    Returns mean, median, 95th and 99th percentile and maximum of a list of frame times in seconds, in ms.
+    """
+
+    if not frame_times:
+        return {}
+    ordered = sorted(frame_times)
+    last = len(ordered) - 1
+    return {"frame_time_mean_ms": sum(ordered) / len(ordered) * 1000.0,
+            "frame_time_p50_ms": ordered[int(last * 0.50)] * 1000.0,
+            "frame_time_p95_ms": ordered[int(last * 0.95)] * 1000.0,
+            "frame_time_p99_ms": ordered[int(last * 0.99)] * 1000.0,
+            "frame_time_max_ms": ordered[last] * 1000.0}
+
+
 class Game_level(object):
     def __init__(self, init_level=0):
         self.__game_level = init_level
@@ -53,6 +211,11 @@ class Game_level(object):
 
 class Destroyer_game(object):
 
+    #主循环各阶段的名称，用于性能分析
+    STAGES = ("wait", "events", "level", "keys", "regenerate_power", "enemies.add_enemy", "enemies.move",
+              "enemies.shoot", "torpedos.move", "bullets.move", "explosions", "fades", "trails", "texts",
+              "crates.make_crate", "scheduler", "logic.check", "options", "draw")
+
     #类变量，每个级别内需要击败多少才能进入下一等级
     __game_level_breaks = {
         0:20,
@@ -95,7 +258,10 @@ class Destroyer_game(object):
         9:(1,2),
     }
 
-    def __init__(self, window_size=(1280, 1024), init_game_level=0, font_size=16):
+    def __init__(self, window_size=(1280, 1024), init_game_level=0, font_size=16, dirty_rects=False,
+                 bullet_store="list", tick_rate=120, max_ticks_per_frame=8, target_fps=60, show_fps=True,
+                 headless=False, input_source=None, max_ticks=None, seed=None, record=None, replay=None,
+                 profile=True, profile_csv=None):
         """
         Main class for the game creating and managing all game object class instances.
 
@@ -103,12 +269,62 @@ class Destroyer_game(object):
         :param init_game_level  : the initial game level
         :param enemy_wait_range : range of spawn waiting times between enemies in seconds
         :param font_size        : font size for HUD
+        :param dirty_rects      : start with dirty rect rendering, can be switched with F2 while playing
+        :param bullet_store     : "list" for the Bullets class, "numpy" for the vectorized Array_bullets store
+        :param tick_rate        : simulation steps per second. The simulation always advances in steps of
+                                  1/tick_rate seconds, independent of the render rate
+        :param max_ticks_per_frame : maximum number of simulation steps run before a frame is drawn. If a frame took
+                                  longer than that, the remaining time is dropped and the game runs slower instead of
+                                  trying to catch up
+        :param target_fps       : frame rate cap, None or 0 for uncapped rendering. F3 switches between the cap
+                                  and uncapped rendering while playing
+        :param show_fps         : show the measured frame rate, frame time and tick rate in the window caption
+        :param headless         : False for a normal game window. True runs the simulation without graphics on SDL's
+                                  dummy video driver, "render" also draws every step to the dummy display. Headless
+                                  games run uncapped, see run_headless()
+        :param input_source     : object with a get_keys(tick) method returning the key state of a simulation step.
+                                  Defaults to Keyboard_input, or Scripted_input in headless mode
+        :param max_ticks        : number of simulation steps after which a headless run ends, None for no limit
+        :param seed             : seed of the random number generator of the game, None for a random seed
+        :param record           : path of a replay file the input of every simulation step is recorded to
+        :param replay           : path of a replay file to play back. The settings stored in the file replace the
+                                  window size, level, bullet store, tick rate and seed, run() plays the file back
+                                  with run_replay()
+        :param profile          : time the stages of the main loop. F4 shows the profiler overlay, F5 starts and
+                                  stops the CSV export
+        :param profile_csv      : path of the per frame CSV export of the profiler. The export starts right away if
+                                  given, otherwise F5 writes to profile.csv
         :type window_size       : set
         :type init_game_level   : set
         :type font_size         : int
+        :type dirty_rects       : bool
+        :type bullet_store      : str
+        :type tick_rate         : int
+        :type max_ticks_per_frame : int
+        :type target_fps        : int
+        :type show_fps          : bool
+        :type headless          : bool or str
+        :type max_ticks         : int
+        :type seed              : int
+        :type record            : str
+        :type replay            : str
+        :type profile           : bool
+        :type profile_csv       : str
 
         :returns:
         """
+        if replay is not None:
+            input_source = Replay_input(replay)
+            settings = input_source.get_settings()
+            window_size = tuple(settings["window_size"])
+            init_game_level = settings["init_game_level"]
+            font_size = settings["font_size"]
+            bullet_store = settings["bullet_store"]
+            tick_rate = settings["tick_rate"]
+            seed = settings["seed"]
+        self.__replay = replay
+        self.__seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.__rng = random.Random(self.__seed)
         self.__window_size = window_size
         self.__center = (self.__window_size[0]/2, self.__window_size[1]/2)
         self.__enemies = []#敌人列表
@@ -122,6 +338,31 @@ class Destroyer_game(object):
         self.__wait_time_range = self.__enemy_wait_time_ranges[init_game_level]#停留时间
         self.__init_game_level = init_game_level#初始级别
         #self.__font_size = font_size
+        self.__dirty_rects = dirty_rects
+        self.__bullet_store = bullet_store
+        self.__tick_rate = tick_rate
+        self.__max_ticks_per_frame = max_ticks_per_frame
+        self.__tick_meter = Rate_meter()
+        self.__frame_meter = Rate_meter()
+        self.__target_fps = target_fps
+        self.__frame_limiter = Frame_limiter(target_fps)
+        self.__show_fps = show_fps
+        self.__max_frame_time = 0.0
+        self.__headless = headless
+        self.__max_ticks = max_ticks
+        if input_source is None:
+            input_source = Scripted_input() if headless else Keyboard_input()
+        self.__profiler = Stage_profiler(self.STAGES) if profile or profile_csv else None
+        self.__mark = self.__profiler.mark if self.__profiler is not None else skip_mark
+        self.__profile_csv = profile_csv
+        if profile_csv is not None:
+            self.__profiler.start_csv(profile_csv)
+        self.__record = record
+        if record is not None:
+            input_source = Replay_recorder(input_source)
+        self.__input = input_source
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
         self.__screen = pygame.display.set_mode(window_size)
 
     #等级控制
@@ -135,17 +376,56 @@ class Destroyer_game(object):
                 enemies.set_wait_time_range(enemy_wait_time_ranges[game_level.get_level()])
                 next_level_in = game_level_breaks[game_level.get_level()]
                 texts.add_text((window_size[0] / 2, window_size[1] / 2), "LEVEL UP!", font_size=50, positive=True)
-            return next_level_in
+                return next_level_in
+        return None
+
+    #返回模拟频率和渲染频率
+    def get_loop_stats(self):
+        render_rate = self.__frame_meter.get_rate()
+        return {"tick_rate": self.__tick_meter.get_rate(), "render_rate": render_rate,
+                "frame_time_ms": 1000.0 / render_rate if render_rate > 0 else 0.0,
+                "max_frame_time_ms": self.__max_frame_time * 1000.0,
+                "ticks": self.__tick_meter.get_total(), "frames": self.__frame_meter.get_total()}
+
+    #切换帧率限制和不限帧率模式
+    def toggle_frame_cap(self):
+        if self.__frame_limiter.get_target_fps():
+            self.__frame_limiter.set_target_fps(None)
+        else:
+            self.__frame_limiter.set_target_fps(self.__target_fps)
+
+    #当前的帧率限制，不限帧率时为None
+    def get_frame_cap(self):
+        return self.__frame_limiter.get_target_fps()
+
+    #开始或停止导出性能分析CSV
+    def toggle_profile_export(self):
+        if self.__profiler.is_exporting():
+            self.__profiler.stop_csv()
         else:
-            return None
+            self.__profiler.start_csv(self.__profile_csv if self.__profile_csv is not None else "profile.csv")
 
-    #键盘控制游戏事件
-    def handle_events(self, ingame_menu, timer, destroyer_options=None):
+    def get_profiler(self):
+        return self.__profiler
+
+    def get_graphics(self):
+        return self.__graphics
+
+    #在窗口标题显示帧率
+    def show_loop_stats(self):
+        stats = self.get_loop_stats()
+        pygame.display.set_caption("Destroyer - {:.0f} FPS, {:.1f} ms/frame (max {:.1f} ms), {:.0f} ticks/s".format(
+            stats["render_rate"], stats["frame_time_ms"], stats["max_frame_time_ms"], stats["tick_rate"]))
+
+    #键盘控制游戏事件，在菜单中选择退出游戏时返回True
+    def handle_events(self, ingame_menu, timer, destroyer_options=None, graphics=None):
+        exit_game = False
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                self.finish_run()
                 sys.exit()
 
-            if event.type is pygame.KEYDOWN:
+            if event.type == pygame.KEYDOWN:
                 key = pygame.key.name(event.key)
 
                 if key == "escape":
@@ -153,12 +433,27 @@ class Destroyer_game(object):
                         exit_game = True
                     else:
                         timer.reset()
+                    if graphics is not None:
+                        graphics.invalidate()
+
+                if key == "f2" and graphics is not None:
+                    graphics.toggle_dirty_rects()
 
-                if key == "b":
+                if key == "f3":
+                    self.toggle_frame_cap()
+
+                if key == "f4" and graphics is not None and self.__profiler is not None:
+                    graphics.get_overlay().toggle()
+
+                if key == "f5" and self.__profiler is not None:
+                    self.toggle_profile_export()
+
+                if key == "b" and destroyer_options is not None:
                     destroyer_options.set_reload_time(100, 10)
                     destroyer_options.set_power_reduction(0, 10)
                     destroyer_options.set_power_refill(500, 10)
                     destroyer_options.set_text_timer(10)
+        return exit_game
 
     #键盘控制游戏角色
     def handle_keys(self, keys, destroyer, fades, bullets, timer):
@@ -173,90 +468,324 @@ class Destroyer_game(object):
                 fades.add_fade(destroyer.get_flash()[0], destroyer.get_flash()[1], 0.15)
                 bullet_pos = project_point(self.__center[0], self.__center[1], destroyer.get_direction(),
                                            destroyer.get_tower_height() + 3)
-                bullets.add_bullet(Destroyer_bullet_1(timer, bullet_pos, destroyer.get_direction()))
+                bullets.fire(Destroyer_bullet_1, bullet_pos, destroyer.get_direction())
+
+    def __init_objects(self, render=True):
+
+        """
+        Creates all game objects of a run. Without render, no graphics, trails and menus are created.
+        """
 
-    def run(self):
         #Initializing all game objects
         timer = Timer()
         pygame.init()#初始化库，不写没法用这个库
         pygame.font.init()#初始化字体模块
-        game_level = Game_level(self.__init_game_level)
-        points = Points()
-        texts = Texts(timer)
-        explosions = Explosions(timer)
-        destroyer_options = Destroyer_options(timer)
-        destroyer = Destroyer(0, 5000, destroyer_options, self.__window_size)
-        bullets = Bullets(timer, (self.__window_size[0]/2, self.__window_size[1]/2), self.__window_size)
-        torpedos = Torpedos(timer)
-        crates = Crates(timer, self.__window_size, self.__font_size + 20, destroyer, game_level)
-        enemies = Enemies(timer, self.__wait_time_range, self.__max_enemies_ff, torpedos, crates, bullets, game_level,
-                          self.__window_size, self.__font_size)
-        crates.set_enemies(enemies)
-        fades = Fades(timer)
+        assets.images.preload("./media")#预加载所有图像，游戏中不再从磁盘读取
+        Explosion_atlas.build()#生成爆炸动画图集
+        Destroyer_bullet_1.warm_rotations(range(0, 360, 2))#预先旋转炮塔所有方向的子弹图像
+        self.__game_level = Game_level(self.__init_game_level)
+        self.__points = Points()
+        self.__texts = Texts(timer)
+        self.__explosions = Explosions(timer)
+        self.__destroyer_options = Destroyer_options(timer)
+        self.__destroyer = Destroyer(0, 5000, self.__destroyer_options, self.__window_size)
+        self.__trails = Trails(timer) if render else None
+        if self.__bullet_store == "numpy":
+            self.__bullets = Array_bullets(timer, self.__center, self.__window_size, self.__trails)
+        else:
+            self.__bullets = Bullets(timer, self.__center, self.__window_size, self.__trails)
+        self.__torpedos = Torpedos(timer, self.__window_size)
+        self.__crates = Crates(timer, self.__window_size, self.__font_size + 20, self.__destroyer, self.__game_level,
+                               rng=self.__rng)
+        self.__enemies = Enemies(timer, self.__wait_time_range, self.__max_enemies_ff, self.__torpedos, self.__crates,
+                                 self.__bullets, self.__game_level, self.__window_size, self.__font_size,
+                                 rng=self.__rng)
+        self.__crates.set_enemies(self.__enemies)
+        self.__fades = Fades(timer)
         timer.start()
-        enemies.add_enemy()
+        self.__timer = timer
+        self.__enemies.add_enemy()
 
         #Initializing game logic
-        logic = Destroyer_logic(timer, destroyer, destroyer_options, enemies, bullets, torpedos, explosions, fades,
-                                texts, points, crates,  self.__window_size)
+        self.__logic = Destroyer_logic(timer, self.__destroyer, self.__destroyer_options, self.__enemies, self.__bullets,
+                                       self.__torpedos, self.__explosions, self.__fades, self.__texts, self.__points,
+                                       self.__crates, self.__window_size, rng=self.__rng)
+
+        self.__graphics = None
+        self.__ingame_menu = None
+        if render:
+            #Initializing game graphics
+            self.__graphics = Destroyer_gfx(self.__screen, self.__destroyer, self.__enemies, self.__bullets,
+                                            self.__torpedos, self.__explosions, self.__fades, self.__texts,
+                                            self.__points, self.__crates, self.__game_level, self.__font_size,
+                                            "./media/background.png", self.__trails, dirty_rects=self.__dirty_rects)
+            if self.__profiler is not None:
+                self.__graphics.set_overlay(Profiler_overlay(self.__profiler))
+
+            #Initializing game menus
+            kwargs = {"add_text":[0,"Hello","Hallo"]}
+            self.__ingame_menu = Ingame_menu(self.__screen, self.__window_size, "Titel", "Background", **kwargs)
+
+        self.__tick = 1.0 / self.__tick_rate
+        timer.set_delta(self.__tick)
+        self.__entity_ticks = 0
+        self.__max_entities = 0
+        self.__level_ticks = {}
+
+    def __update(self, keys):
+
+        """
+        Runs one simulation step of 1/tick_rate seconds with the given key state.
+
+        :returns: False if the destroyer has been sunk, otherwise True
+        """
 
-        #Initializing game graphics
-        graphics = Destroyer_gfx(self.__screen, destroyer, enemies, bullets, torpedos, explosions, fades, texts, points,
-                                 crates, game_level, self.__font_size, "./media/background.png")
+        timer = self.__timer
+        enemies = self.__enemies
+        texts = self.__texts
+        mark = self.__mark#每个阶段结束时记录耗时
+        timer.advance()
+
+        #处理等级
+        next_level_in = self.handle_level_up(self.__game_level, enemies, texts, self.__max_level, self.__max_enemies,
+                                             self.__enemy_wait_time_ranges, self.__game_level_breaks,
+                                             self.__window_size)
+        if next_level_in is not None:
+            self.__next_level_in = next_level_in
+        level = self.__game_level.get_level()
+        self.__level_ticks[level] = self.__level_ticks.get(level, 0) + 1
+        mark("level")
+
+        #控制游戏角色
+        self.handle_keys(keys, self.__destroyer, self.__fades, self.__bullets, timer)
+        mark("keys")
+
+        self.__destroyer.regenerate_power()#恢复主角能量
+        mark("regenerate_power")
+        enemies.add_enemy()#增加敌人
+        mark("enemies.add_enemy")
+        enemies.move()#移动敌人
+        mark("enemies.move")
+        enemies.shoot()#敌人发射鱼雷，火炮由定时器发射
+        mark("enemies.shoot")
+        self.__torpedos.move()#移动鱼雷
+        mark("torpedos.move")
+        self.__bullets.move()#移动子弹
+        mark("bullets.move")
+        self.__explosions.change_frames()#改变爆炸效果的帧数
+        mark("explosions")
+        self.__fades.fade()#淡出对象
+        mark("fades")
+        if self.__trails is not None:
+            self.__trails.fade()#淡出子弹尾迹
+        mark("trails")
+        texts.move()#移动文字
+        mark("texts")
+        self.__crates.make_crate(timer)#制造补给
+        mark("crates.make_crate")
+        timer.get_scheduler().run()#运行到期的定时器：补给过期、武器加成、敌人射击
+        mark("scheduler")
+        self.__logic.check()#检查游戏逻辑
+        mark("logic.check")
+        destroyer_check = self.__destroyer_options.check()#检查主角选项
+        if destroyer_check is not None:
+            texts.add_text((self.__window_size[0]/2, self.__window_size[1]/2), "{}...".format(destroyer_check), font_size=18)
+
+        self.__total_enemies = enemies.get_total_enemies()
+
+        #统计模拟的实体数量
+        entities = self.count_entities()
+        self.__entity_ticks += entities
+        if entities > self.__max_entities:
+            self.__max_entities = entities
+        mark("options")
+
+        return self.__destroyer.get_hp() > 0
+
+    #当前模拟的实体数量
+    def count_entities(self):
+        return len(self.__enemies.get_enemies()) + self.__torpedos.count() + self.__bullets.count() + \
+               len(self.__crates.get_crates())
+
+    #用于比较录像和回放的运行结果
+    def get_result(self):
+        return {"ticks": self.__tick_meter.get_total(), "score": self.__points.get_points(),
+                "hp": self.__destroyer.get_hp(), "level": self.__game_level.get_level(),
+                "total_enemies": self.__enemies.get_total_enemies()}
+
+    #保存录像文件
+    #运行结束时保存录像并关闭性能分析导出
+    def finish_run(self):
+        self.save_recording()
+        if self.__profiler is not None:
+            self.__profiler.stop_csv()
+
+    def save_recording(self):
+        if self.__record is None or self.__input.count() == 0:
+            return
+        settings = {"seed": self.__seed, "tick_rate": self.__tick_rate, "init_game_level": self.__init_game_level,
+                    "bullet_store": self.__bullet_store, "window_size": list(self.__window_size),
+                    "font_size": self.__font_size}
+        self.__input.save(self.__record, settings, self.get_result())
+
+    #运行结束时的统计数据
+    def get_run_stats(self, elapsed):
+        ticks = self.__tick_meter.get_total()
+        return {"ticks": ticks, "frames": self.__frame_meter.get_total(), "elapsed_s": elapsed,
+                "ticks_per_second": ticks / elapsed if elapsed > 0 else 0.0,
+                "game_time_s": ticks * self.__tick, "entity_ticks": self.__entity_ticks,
+                "max_entities": self.__max_entities, "score": self.__points.get_points(),
+                "level": self.__game_level.get_level(), "total_enemies": self.__enemies.get_total_enemies(),
+                "hp": self.__destroyer.get_hp(), "survived": self.__destroyer.get_hp() > 0,
+                "levels": self.get_level_stats(), "scheduler": self.__timer.get_scheduler().get_stats()}
+
+    #每个等级的游戏时间和敌人数量
+    def get_level_stats(self):
+        counts = self.__enemies.get_level_counts()
+        stats = {}
+        for level in sorted(set(self.__level_ticks) | set(counts)):
+            level_stats = {"time_s": self.__level_ticks.get(level, 0) * self.__tick, "spawned": 0, "sunk": 0}
+            level_stats.update(counts.get(level, {}))
+            stats[level] = level_stats
+        return stats
 
-        #Initializing game menus
-        kwargs = {"add_text":[0,"Hello","Hallo"]}
-        ingame_menu = Ingame_menu(self.__screen, self.__window_size, "Titel", "Background", **kwargs)
+    def run(self):
+
+        """
+        Runs the game until the destroyer is sunk. In headless mode the game runs without a window, see run_headless().
+
+        :returns: True when the destroyer has been sunk, False when the game is left from the in-game menu, the run
+                  statistics in headless mode
+        """
 
+        if self.__replay is not None:
+            return self.run_replay()
+        if self.__headless:
+            return self.run_headless()
+
+        self.__init_objects()
+        graphics = self.__graphics
         graphics.draw()
-        exit_game = False
-        counter = 0
-        oldtime = datetime.datetime.now()
-
-        while not exit_game:
-
-            #处理等级
-            next_level_in = self.handle_level_up(game_level, enemies, texts, self.__max_level, self.__max_enemies,
-                                            self.__enemy_wait_time_ranges, self.__game_level_breaks, self.__window_size)
-            if next_level_in is not None:
-                self.__next_level_in = next_level_in
-
-            destroyer.regenerate_power()#恢复主角能量
-            enemies.add_enemy()#增加敌人
-            enemies.move()#移动敌人
-            enemies.shoot()#敌人射击
-            torpedos.move()#移动鱼雷
-            bullets.move()#移动子弹
-            explosions.change_frames()#改变爆炸效果的帧数
-            fades.fade()#淡出对象
-            texts.move()#移动文字
-            crates.make_crate(timer)#制造补给
-            crates.check()#检查补给是否被获得
-            logic.check()#检查游戏逻辑
-            destroyer_check = destroyer_options.check()#检查主角选项
-            if destroyer_check is not None:
-                texts.add_text((self.__window_size[0]/2, self.__window_size[1]/2), "{}...".format(destroyer_check), font_size=18)
-
-            self.__total_enemies = enemies.get_total_enemies()
-
-            if destroyer.get_hp() <= 0:
-                return True
-
-            #控制游戏角色
-            keys = pygame.key.get_pressed()
-            self.handle_keys(keys, destroyer, fades, bullets, timer)
-
-            #控制游戏事件
-            self.handle_events(ingame_menu, timer)
-
-            #作图
-            graphics.draw()
-            timer.time()
-            new_time = datetime.datetime.now()
-            if (new_time-oldtime).total_seconds() >= 1:
-                counter=0
-                oldtime = new_time
-            else:
-                counter += 1
+        tick = self.__tick
+        frame_timer = Timer()
+        frame_timer.start()
+        accumulator = 0.0
+
+        profiler = self.__profiler
+        mark = self.__mark
+
+        while True:
+            if profiler is not None:
+                profiler.start_frame()
+            #固定步长：按经过的时间运行所需的模拟步数
+            #限制帧率
+            self.__frame_limiter.wait()
+            mark("wait")
+            frame_timer.time()
+            accumulator += frame_timer.get_delta()
+            now = perf_counter()
+            if self.__frame_meter.count(now):
+                self.__max_frame_time = self.__frame_limiter.pop_max_frame_time()
+                if self.__show_fps:
+                    self.show_loop_stats()
+
+            #控制游戏事件，菜单打开时重置帧计时器
+            if self.handle_events(self.__ingame_menu, frame_timer, self.__destroyer_options, graphics):
+                self.finish_run()
+                return False
+            mark("events")
+
+            ticks = 0
+            while accumulator >= tick:
+                if ticks == self.__max_ticks_per_frame:
+                    #追赶步数过多时丢弃剩余时间，防止越来越慢
+                    accumulator = 0.0
+                    break
+
+                keys = self.__input.get_keys(self.__tick_meter.get_total() + ticks)
+                if not self.__update(keys):
+                    self.__tick_meter.count(now, ticks + 1)
+                    self.finish_run()
+                    return True
+
+                accumulator -= tick
+                ticks += 1
+            self.__tick_meter.count(now, ticks)
+
+            #作图，按剩余时间在上一个和当前状态之间插值
+            graphics.draw(accumulator / tick)
+            mark("draw")
+            if profiler is not None:
+                profiler.end_frame()
+
+    def run_headless(self, max_ticks=None):
+
+        """
+        Runs the simulation without frame limit and without waiting for the wall clock. Every loop runs one simulation
+        step. The input comes from the input source of the game, by default a Scripted_input. If the game has been
+        created with headless="render", every step is also drawn to the dummy display.
+
+        :param max_ticks : number of simulation steps after which the run ends. None runs until the destroyer is
+                           sunk or the max_ticks given to the constructor are reached.
+        :type max_ticks  : int
+
+        :returns: run statistics, see get_run_stats()
+        """
+
+        if max_ticks is None:
+            max_ticks = self.__max_ticks
+        render = self.__headless == "render"
+        self.__init_objects(render)
+        start = perf_counter()
+        self.__run_ticks(max_ticks, render)
+        stats = self.get_run_stats(perf_counter() - start)
+        self.finish_run()
+        return stats
 
+    def run_replay(self):
+
+        """
+        Plays back the replay file given to the constructor, one simulation step per frame without frame limit. Unless
+        the game is headless, every step is drawn. Returns the run statistics together with the frame time statistics
+        of the replayed workload and whether the result matches the recorded one.
+
+        :returns: dictionary
+        """
 
+        render = self.__headless != True
+        self.__init_objects(render)
+        frame_times = []
+        start = perf_counter()
+        self.__run_ticks(self.__input.count(), render, frame_times)
+        stats = self.get_run_stats(perf_counter() - start)
+        stats.update(frame_time_stats(frame_times))
+        stats["matches_recording"] = self.get_result() == self.__input.get_result()
+        if self.__profiler is not None:
+            self.__profiler.stop_csv()
+        return stats
+
+    def __run_ticks(self, max_ticks, render, frame_times=None):
+        profiler = self.__profiler
+        mark = self.__mark
+        ticks = 0
+        while max_ticks is None or ticks < max_ticks:
+            frame_start = perf_counter()
+            if profiler is not None:
+                profiler.start_frame()
+            pygame.event.pump()
+            mark("events")
+            alive = self.__update(self.__input.get_keys(ticks))
+            ticks += 1
+            if render:
+                self.__graphics.draw()
+                mark("draw")
+            if profiler is not None:
+                profiler.end_frame()
+            now = perf_counter()
+            self.__tick_meter.count(now, 1)
+            if render:
+                self.__frame_meter.count(now)
+            if frame_times is not None:
+                frame_times.append(now - frame_start)
+            if not alive:
+                break
@@ -17,6 +17,116 @@
 
 import pygame
 import datetime
+from collections import OrderedDict
+from assets import load_image, render_text
+from pool import Pool
+
+def merge_rects(rects):
+
+    """
+    Function for merging overlapping rectangles into their union, so every screen area is in at most one of the
+    returned rectangles. Empty rectangles are dropped.
+
+    :returns: list of pygame.Rect
+    """
+
+    merged = []
+    for r in rects:
+        if r.width == 0 or r.height == 0:
+            continue
+        r = pygame.Rect(r)
+        i = r.collidelist(merged)
+        while i != -1:
+            r.union_ip(merged.pop(i))
+            i = r.collidelist(merged)
+        merged.append(r)
+    return merged
+
+
+class Alpha_blitter(object):
+    def __init__(self, levels=32, max_images=1024):
+
+        """
+        Class for blit:ing objects with a specified opacity onto the game window without creating a temporary surface
+        per blit. The opacity is quantized to a number of levels and for every image and level a translucent copy is
+        made once, using BLEND_RGBA_MULT on images with per pixel alpha and the surface alpha on all others. The copies
+        are kept in a least recently used cache.
+
+        Translucent draws can either be blitted directly or queued and drawn together in one batched blit by flush().
+
+        :param levels       : number of opacity levels
+        :param max_images   : maximum number of translucent copies kept in the cache
+        :type levels        : int
+        :type max_images    : int
+        """
+
+        self.__levels = levels
+        self.__max_images = max_images
+        self.__images = OrderedDict()
+        self.__queue = []
+        self.__hits = 0
+        self.__misses = 0
+
+    def get_image(self, image, opacity):
+
+        """
+        Returns the translucent copy of image for the opacity (0-255), or None if nothing would be visible.
+        """
+
+        level = int(opacity * self.__levels / 255.0 + 0.5)
+        if level <= 0:
+            return None
+        if level >= self.__levels:
+            return image
+
+        key = (image, level)
+        translucent = self.__images.get(key)
+        if translucent is not None:
+            self.__hits += 1
+            self.__images.move_to_end(key)
+            return translucent
+
+        self.__misses += 1
+        alpha = level * 255 // self.__levels
+        translucent = image.copy()
+        if translucent.get_flags() & pygame.SRCALPHA:
+            translucent.fill((255, 255, 255, alpha), special_flags=pygame.BLEND_RGBA_MULT)
+        else:
+            translucent.set_alpha(alpha)
+        self.__images[key] = translucent
+        if len(self.__images) > self.__max_images:
+            self.__images.popitem(last=False)
+        return translucent
+
+    def blit(self, screen, image, rect, opacity):
+        translucent = self.get_image(image, opacity)
+        if translucent is not None:
+            return screen.blit(translucent, rect)
+        return None
+
+    def queue(self, image, rect, opacity):
+        translucent = self.get_image(image, opacity)
+        if translucent is not None:
+            self.__queue.append((translucent, rect))
+
+    def flush(self, screen):
+
+        """
+        Draws all queued translucent objects in one batched blit. Returns the list of rectangles that were drawn to.
+        """
+
+        if len(self.__queue) == 0:
+            return []
+        rects = screen.blits(self.__queue)
+        del self.__queue[:]
+        return rects
+
+    def get_stats(self):
+        return {"hits": self.__hits, "misses": self.__misses, "images": len(self.__images)}
+
+
+alpha_blitter = Alpha_blitter()
+
 
 # 指定不透明度后，将对象传送到窗口。参数（窗口，图像对象，图像矩形区域，不透明度）
 def blit_alpha(screen, image, rect, opacity):
@@ -27,13 +137,7 @@ def blit_alpha(screen, image, rect, opacity):
     :returns
     """
 
-    x = rect[0]
-    y = rect[1]
-    temp = pygame.Surface((image.get_width(), image.get_height())).convert() # 与图像大小相同的临时表面
-    temp.blit(screen, (-x, -y)) # 窗口放在临时表面上
-    temp.blit(image, (0, 0)) # 图像对象放在临时表面上
-    temp.set_alpha(opacity)
-    screen.blit(temp, rect) # 将临时表面会知道窗口指定区域
+    return alpha_blitter.blit(screen, image, rect, opacity)
 
 # 淡入淡出效果
 class Fade_fx(object):
@@ -53,11 +157,13 @@ class Fade_fx(object):
         :returns:
         """
 
+        self.reset(image, rect, time)
+
+    def reset(self, image, rect, time):
         self._image = image
         self._rect = rect
         self._time = time
         self._steps = 255/self._time
-        self._old_time = datetime.datetime.now()
         self._total_time = 0
         self._alpha = 255
 
@@ -78,28 +184,241 @@ class Fade_fx(object):
 
 #管理淡入淡出效果
 class Fades(object):
-    def __init__(self, timer):
+    def __init__(self, timer, pool_size=256):
 
         """
-        Class for managing all the fades in the game window
+        Class for managing all the fades in the game window. Finished fades are returned to a pool of pool_size
+        Fade_fx objects and reused.
         """
 
         self.__fade_list = []
         self.__timer = timer
+        self.__pool = Pool(Fade_fx, pool_size)
 
     def add_fade(self, image, rect, time):
-        self.__fade_list.append(Fade_fx(image, rect, time))
+        self.__fade_list.append(self.__pool.acquire(image, rect, time))
 
     def fade(self):
-        new_fades = []
-        for i,v in enumerate(self.__fade_list):
-            if not v.fade(self.__timer.get_delta()) == -1:
-                new_fades.append(v)
-        self.__fade_list = new_fades
+        time_delta = self.__timer.get_delta()
+        fades = self.__fade_list
+        keep = 0
+        for v in fades:
+            if v.fade(time_delta) == -1:
+                self.__pool.release(v)
+            else:
+                fades[keep] = v
+                keep += 1
+        del fades[keep:]
 
     def get_fades(self):
         return self.__fade_list
 
+    def get_pool_stats(self):
+        return self.__pool.get_stats()
+
+
+class Trail(object):
+    def __init__(self, capacity):
+
+        """
+        Ring buffer holding the trail segments of one projectile. When the buffer is full, the oldest segment is
+        overwritten, so a trail never holds more than capacity segments.
+
+        :param capacity : maximum number of segments
+        :type capacity  : int
+        """
+
+        self.__capacity = capacity
+        self.__x = [0] * capacity
+        self.__y = [0] * capacity
+        self.__length = [0] * capacity
+        self.__direction = [0] * capacity
+        self.__time = [0.0] * capacity
+        self.__head = 0
+        self.__count = 0
+
+    def push(self, x, y, length, direction, time):
+        i = self.__head
+        self.__x[i] = x
+        self.__y[i] = y
+        self.__length[i] = length
+        self.__direction[i] = direction
+        self.__time[i] = time
+        self.__head = (i + 1) % self.__capacity
+        if self.__count < self.__capacity:
+            self.__count += 1
+
+    def expire(self, oldest_time):
+
+        """
+        Drops all segments created before oldest_time. Returns True if the trail is empty afterwards.
+        """
+
+        while self.__count > 0:
+            tail = (self.__head - self.__count) % self.__capacity
+            if self.__time[tail] >= oldest_time:
+                break
+            self.__count -= 1
+        return self.__count == 0
+
+    def clear(self):
+        self.__head = 0
+        self.__count = 0
+
+    def get_segments(self):
+
+        """
+        Returns the segments from oldest to newest as lists of x, y, length, direction and creation time together
+        with the index of the oldest segment and the number of segments.
+        """
+
+        return self.__x, self.__y, self.__length, self.__direction, self.__time, \
+            (self.__head - self.__count) % self.__capacity, self.__count
+
+    def get_capacity(self):
+        return self.__capacity
+
+
+class Trails(object):
+    def __init__(self, timer, lifetime=0.4, segments_per_trail=32, max_trails=128, alpha_steps=16, resolution=2,
+                 max_textures=2048, image_path="./media/trail.png"):
+
+        """
+        Class for drawing the smoke trails of projectiles. Every projectile with a trail gets a Trail ring buffer of
+        segments from a fixed set of buffers. The segments are drawn from pre-rotated trail textures with a fixed
+        number of alpha steps, all segments of a cycle in one batched blit. Memory and blit count are bounded by
+        max_trails * segments_per_trail, no matter how much is shot.
+
+        :param timer                : timer game instance
+        :param lifetime             : fade time of a segment in seconds
+        :param segments_per_trail   : ring buffer size of each trail
+        :param max_trails           : maximum number of trails at the same time
+        :param alpha_steps          : number of alpha levels used while fading
+        :param resolution           : angular resolution of the trail textures in degrees
+        :param max_textures         : maximum number of cached trail textures
+        :param image_path           : path of the trail image
+        :type lifetime              : float
+        :type segments_per_trail    : int
+        :type max_trails            : int
+        :type alpha_steps           : int
+        :type resolution            : int
+        :type max_textures          : int
+        :type image_path            : str
+        """
+
+        self.__timer = timer
+        self.__lifetime = lifetime
+        self.__resolution = resolution
+        self.__max_textures = max_textures
+        self.__image_path = image_path
+        self.__image = None
+        self.__clock = 0.0
+
+        self.__alpha_steps = alpha_steps
+        self.__alpha_levels = [int(255 * (1 - float(i) / alpha_steps)) for i in range(alpha_steps)]
+
+        self.__free_trails = [Trail(segments_per_trail) for i in range(max_trails)]
+        self.__trails = {}
+        self.__last_push = {}
+        self.__textures = OrderedDict()
+        self.__blits = []
+
+    def add_segment(self, owner, segment):
+
+        """
+        Adds a trail segment for the projectile owner. If all trail buffers are in use, the buffer of the trail that
+        was updated least recently is taken over.
+
+        :param owner    : the projectile the segment belongs to
+        :param segment  : segment as center x, center y, length, direction
+        """
+
+        trail = self.__trails.get(owner)
+        if trail is None:
+            if self.__free_trails:
+                trail = self.__free_trails.pop()
+            else:
+                oldest = min(self.__last_push, key=self.__last_push.get)
+                trail = self.__trails.pop(oldest)
+                del self.__last_push[oldest]
+                trail.clear()
+            self.__trails[owner] = trail
+        trail.push(segment[0], segment[1], segment[2], segment[3], self.__clock)
+        self.__last_push[owner] = self.__clock
+
+    def detach(self, owner):
+
+        """
+        Ends the trail of owner. The segments already pushed fade out as usual, but the next segment pushed for the
+        same owner object starts a new trail. Used when projectile objects are recycled.
+        """
+
+        trail = self.__trails.pop(owner, None)
+        if trail is not None:
+            key = object()
+            self.__trails[key] = trail
+            self.__last_push[key] = self.__last_push.pop(owner)
+
+    def fade(self):
+        self.__clock += self.__timer.get_delta()
+        oldest_time = self.__clock - self.__lifetime
+        for owner in [o for o, t in self.__last_push.items() if t < oldest_time]:
+            trail = self.__trails.pop(owner)
+            del self.__last_push[owner]
+            trail.clear()
+            self.__free_trails.append(trail)
+        for trail in self.__trails.values():
+            trail.expire(oldest_time)
+
+    def __get_texture(self, direction, length, alpha_step):
+        key = (int(round(direction / float(self.__resolution))) * self.__resolution % 360, length, alpha_step)
+        texture = self.__textures.get(key)
+        if texture is not None:
+            self.__textures.move_to_end(key)
+            return texture
+
+        if self.__image is None:
+            self.__image = load_image(self.__image_path)
+        if length < self.__image.get_height():
+            image = self.__image.subsurface((0, 0, self.__image.get_width(), length))
+        else:
+            image = self.__image
+        image = pygame.transform.rotate(image, -key[0])
+        image.fill((255, 255, 255, self.__alpha_levels[alpha_step]), special_flags=pygame.BLEND_RGBA_MULT)
+        texture = image, image.get_width() / 2, image.get_height() / 2
+        self.__textures[key] = texture
+        if len(self.__textures) > self.__max_textures:
+            self.__textures.popitem(last=False)
+        return texture
+
+    def draw(self, screen):
+
+        """
+        Draws all trail segments in one batched blit. Returns the list of rectangles that were drawn to.
+        """
+
+        blits = self.__blits
+        del blits[:]
+        clock = self.__clock
+        step_time = self.__lifetime / self.__alpha_steps
+        last_step = self.__alpha_steps - 1
+        for trail in self.__trails.values():
+            xs, ys, lengths, directions, times, start, count = trail.get_segments()
+            capacity = trail.get_capacity()
+            for n in range(count):
+                i = (start + n) % capacity
+                alpha_step = int((clock - times[i]) / step_time)
+                if alpha_step > last_step:
+                    continue
+                image, offset_x, offset_y = self.__get_texture(directions[i], int(lengths[i]), alpha_step)
+                blits.append((image, (xs[i] - offset_x, ys[i] - offset_y)))
+        if len(blits) > 0:
+            return screen.blits(blits)
+        return []
+
+    def count_segments(self):
+        return sum(t.get_segments()[6] for t in self.__trails.values())
+
 
 class Text_fx(object):
     def __init__(self, origin, text, time, movement, font_size=16, positive=True):
@@ -115,6 +434,9 @@ class Text_fx(object):
         positive (bool)       : if positive, text is black, otherwise red
         """
 
+        self.reset(origin, text, time, movement, font_size, positive)
+
+    def reset(self, origin, text, time, movement, font_size=16, positive=True):
         self._text = text
         self._time = time
         self._movement = movement
@@ -131,8 +453,7 @@ class Text_fx(object):
         if not positive:
             self._color = (190,28,28)
 
-        myfont = pygame.font.SysFont('Arial', self._font_size)
-        self._image = myfont.render(self._text, True, self._color)
+        self._image = render_text(self._text, 'Arial', self._font_size, self._color)
         rect = self._image.get_rect()
         self._size_x, self._size_y = rect[2], rect[3]
         self._position = (self._origin[0] - (self._size_x/2), self._origin[1] - (self._size_y/2))
@@ -161,92 +482,262 @@ class Texts(object):
     Class holding all text effect objects in the game
     """
 
-    def __init__(self, timer):
+    def __init__(self, timer, pool_size=64):
         self.__text_list = []
         self.__timer = timer
+        self.__pool = Pool(Text_fx, pool_size)
 
     def add_text(self, origin, text, positive=True, font_size=16):
-        self.__text_list.append(Text_fx(origin, text, 1000, 80, font_size=font_size, positive=positive))
+        self.__text_list.append(self.__pool.acquire(origin, text, 1000, 80, font_size=font_size, positive=positive))
 
     def move(self):
-        new_texts = []
-        for i,v in enumerate(self.__text_list):
-            if not v.move(self.__timer.get_delta()) == -1:
-                new_texts.append(v)
-        self.__text_list = new_texts
+        time_delta = self.__timer.get_delta()
+        texts = self.__text_list
+        keep = 0
+        for v in texts:
+            if v.move(time_delta) == -1:
+                self.__pool.release(v)
+            else:
+                texts[keep] = v
+                keep += 1
+        del texts[keep:]
 
     def get_texts(self):
         return self.__text_list
 
+    def get_pool_stats(self):
+        return self.__pool.get_stats()
+
+
+class Explosion_atlas(object):
+
+    """
+    Sprite sheet holding all frames of the explosion animation. The frames are decoded once and copied side by side
+    onto a single surface. Every frame is handed out as a subsurface of that sheet, so explosions don't need images of
+    their own.
+    """
+
+    FRAME_COUNT = 17
+    FRAME_PATH = "./media/explosion/frame_{}.png"
+
+    __sheet = None
+    __frames = None
+
+    @classmethod
+    def build(cls):
+        frames = [load_image(cls.FRAME_PATH.format(i)) for i in range(1, cls.FRAME_COUNT + 1)]
+        width = max(f.get_width() for f in frames)
+        height = max(f.get_height() for f in frames)
+
+        sheet = pygame.Surface((width * cls.FRAME_COUNT, height), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            sheet = sheet.convert_alpha()
+        sheet.fill((0, 0, 0, 0))
+        for i, f in enumerate(frames):
+            sheet.blit(f, (i * width, 0))
+
+        cls.__sheet = sheet
+        cls.__frames = [sheet.subsurface(pygame.Rect(i * width, 0, frames[i].get_width(), frames[i].get_height()))
+                        for i in range(cls.FRAME_COUNT)]
+
+    @classmethod
+    def get_frame(cls, frame):
+
+        """
+        Returns the image of a frame. Frames are numbered from 1 to FRAME_COUNT like the image files.
+        """
+
+        if cls.__frames is None:
+            cls.build()
+        return cls.__frames[frame - 1]
+
 
 class Explosion(object):
     def __init__(self, origin, pause):
 
         """
         Explosion animation class. Shows the sequence of explosion images at specified intervals to create the
-        illusion of an awesome explosion
+        illusion of an awesome explosion. The explosion itself only holds its position and start time, the frames are
+        taken from the Explosion_atlas and the current frame is set by the Explosions class from the shared clock.
         origin (list of int)  : origin as x,y. Usually the impact point of the bullet Lower center of the image
                                 rectangle
         pause (int)           : pause between the images in ms
-
-        TODO
         """
 
-        self.__frame = 1
-        self.__image = pygame.image.load("./media/explosion/frame_1.png")
-        self.__old_time = datetime.datetime.now()
+        self.reset(origin, pause)
+
+    def reset(self, origin, pause):
         self.__rect = pygame.Rect(origin[0]-63, origin[1]-132, 62, 132)
         self.__pause = pause
-        self.__total_time_delta = 0
+        self.__start_time = None
+        self.__frame = 1
+
+    def start(self, start_time):
+        self.__start_time = start_time
+        self.__frame = 1
 
-    def next_frame(self, timer):
+    def next_frame(self, clock):
 
         """
-        Method to walk through the frames and change image if the specified pause time has elapsed. If the explosion
-        sequence is finished, it returns True, otherwise False.
+        Method to set the frame for the time on the shared clock. If the explosion sequence is finished, it returns
+        True, otherwise False.
         """
 
-        self.__total_time_delta += timer.get_delta()
-        if self.__frame > 17:
+        frame = int((clock - self.__start_time) * 1000 / self.__pause)
+        if frame > Explosion_atlas.FRAME_COUNT:
             return True
-        if self.__total_time_delta*1000 >= self.__pause:
-            self.__image = pygame.image.load("./media/explosion/frame_{}.png".format(self.__frame))
-            self.__total_time_delta = 0
-            self.__frame += 1
+        self.__frame = frame if frame > 1 else 1
         return False
 
     def get_image(self):
-        return self.__image, self.__rect
+        return Explosion_atlas.get_frame(self.__frame), self.__rect
 
 
 class Explosions(object):
 
     """
-    Class holding all instances of explosion objects in the game.
+    Class holding all instances of explosion objects in the game. All explosions are animated from one clock, which
+    is advanced by the timer delta once per cycle.
     """
 
-    def __init__(self, timer):
+    def __init__(self, timer, pool_size=64):
         self.__explosion_list = []
         self.__timer = timer
+        self.__clock = 0.0
+        self.__pool = Pool(Explosion, pool_size)
 
     def add_explosion(self, explosion):
+        explosion.start(self.__clock)
         self.__explosion_list.append(explosion)
 
+    def create_explosion(self, origin, pause):
+
+        """
+        Adds an explosion at origin, reusing a finished explosion object if one is available.
+        """
+
+        self.add_explosion(self.__pool.acquire(origin, pause))
+
     def change_frames(self):
-        new_list = []
-        for e in self.__explosion_list:
-            if not e.next_frame(self.__timer):
-                new_list.append(e)
-        self.__explosion_list = new_list
+        self.__clock += self.__timer.get_delta()
+        explosions = self.__explosion_list
+        keep = 0
+        for e in explosions:
+            if e.next_frame(self.__clock):
+                self.__pool.release(e)
+            else:
+                explosions[keep] = e
+                keep += 1
+        del explosions[keep:]
 
     def get_explosions(self):
         return self.__explosion_list
 
+    def get_pool_stats(self):
+        return self.__pool.get_stats()
+
+
+class Hud(object):
+
+    FIELDS = ("points", "hp", "max_hp", "level")
+
+    def __init__(self, width, font_size, points, destroyer, game_level):
+
+        """
+        Cached HUD layer showing the player points, HP, max HP and the game level. Every field remembers the values
+        it was rendered from and is only rendered again when one of them changes. The layer surface is put together
+        from the field images when a field has changed and is otherwise just blitted onto the screen.
+
+        :param width        : HUD width in px, usually the window width
+        :param font_size    : HUD font size, also the height of the HUD bar
+        :param points       : Points class game instance
+        :param destroyer    : Destroyer class game instance
+        :param game_level   : Game_level class game instance
+        :type width         : int
+        :type font_size     : int
+        :type points        : Points
+        :type destroyer     : Destroyer
+        :type game_level    : Game_level
+        """
+
+        self.__width = width
+        self.__font_size = font_size
+        self.__points = points
+        self.__destroyer = destroyer
+        self.__game_level = game_level
+        self.__layer = None
+        self.__values = {f: None for f in self.FIELDS}
+        self.__images = {f: None for f in self.FIELDS}
+        self.__dirty = {f: True for f in self.FIELDS}
+        self.__layer_dirty = True
+
+    def __read_values(self):
+        hp = self.__destroyer.get_hp()
+        max_hp = self.__destroyer.get_max_hp()
+        return {"points": self.__points.get_points(), "hp": (hp, max_hp), "max_hp": max_hp,
+                "level": self.__game_level.get_level()}
+
+    def __render_field(self, field, value):
+        if field == "points":
+            return render_text('Points: {}'.format(value), 'Arial', self.__font_size)
+        if field == "hp":
+            hp_ratio = value[0] / float(value[1])
+            hp_color = int(255*hp_ratio) if hp_ratio > 0 else 0
+            return render_text('HP: {}'.format(value[0]), 'Arial', self.__font_size, (255, hp_color, hp_color))
+        if field == "max_hp":
+            return render_text("Max HP:{}".format(value), 'Arial', self.__font_size)
+        if field == "level":
+            return render_text("Level: {}".format(value + 1), 'Arial', self.__font_size)
+
+    def update(self):
+
+        """
+        Checks the HUD values for changes and renders the changed fields. Returns True if the layer has changed.
+        """
+
+        values = self.__read_values()
+        for field in self.FIELDS:
+            if values[field] != self.__values[field]:
+                self.__values[field] = values[field]
+                self.__dirty[field] = True
+
+        for field in self.FIELDS:
+            if self.__dirty[field]:
+                self.__images[field] = self.__render_field(field, self.__values[field])
+                self.__dirty[field] = False
+                self.__layer_dirty = True
+
+        if self.__layer_dirty:
+            self.__compose()
+            self.__layer_dirty = False
+            return True
+        return False
+
+    def __compose(self):
+        height = max([self.__font_size] + [i.get_height() for i in self.__images.values()])
+        if self.__layer is None or self.__layer.get_height() != height:
+            self.__layer = pygame.Surface((self.__width, height), pygame.SRCALPHA)
+            if pygame.display.get_surface() is not None:
+                self.__layer = self.__layer.convert_alpha()
+
+        #The texts reach below the HUD bar, so only the bar itself is filled
+        self.__layer.fill((0, 0, 0, 0))
+        self.__layer.fill((150, 150, 150), (0, 0, self.__width, self.__font_size))
+        self.__layer.blit(self.__images["points"], (0, 0))
+        self.__layer.blit(self.__images["hp"], (100, 0))
+        self.__layer.blit(self.__images["max_hp"], (200, 0))
+        level = self.__images["level"]
+        self.__layer.blit(level, (self.__width - level.get_width() - 10, 0))
+
+    def draw(self, screen):
+        self.update()
+        return screen.blit(self.__layer, (0, 0))
+
 
 class Destroyer_gfx(object):
 
     def __init__(self, screen, destroyer, enemies, bullets, torpedos, explosions, fades, texts, points, crates,
-                 game_level, font_size, bg_image):
+                 game_level, font_size, bg_image, trails=None, dirty_rects=False, dirty_threshold=0.5):
 
         """
         Main graphics class. This is where all the elements are drawn.
@@ -263,6 +754,14 @@ class Destroyer_gfx(object):
         crates (Creates)          : Crates class game instance
         font_size (int)           : HUD font size
         bg_image (string)         : path to the background image
+        trails (Trails)           : Trails class game instance
+        dirty_rects (bool)        : if True, only the changed parts of the screen are redrawn and updated
+        dirty_threshold (float)   : share of the screen area above which the whole screen is updated in dirty rect
+                                    mode
+
+        In dirty rect mode the rectangles of everything drawn are recorded. In the next frame only these rectangles
+        are restored from the background and the display is updated with the rectangles of both frames. The mode can
+        be switched while the game is running with set_dirty_rects().
 
         TODO
         """
@@ -281,32 +780,25 @@ class Destroyer_gfx(object):
         self.__font_size = font_size
         self.__crates = crates
         self.__game_level = game_level
+        self.__trails = trails
+        self.__hud = Hud(self.__window_size[0], self.__font_size, self.__points, self.__destroyer, self.__game_level)
+        self.__dirty_rects = dirty_rects
+        self.__overlay = None
+        self.__dirty_threshold = dirty_threshold
+        self.__rects = []
+        self.__previous_rects = []
+        self.__full_redraw = True
         self.make_background()
 
     def __render_hud(self):
 
         """
-        Method for rendering the HUD, showing information on the player HP, points and level.
+        Method for rendering the HUD, showing information on the player HP, points and level. The HUD layer is only
+        rebuilt when one of the values has changed.
         :return:
         """
 
-        myfont = pygame.font.SysFont('Arial', self.__font_size)
-        rect = pygame.Rect(0,0,self.__window_size[0],self.__font_size)
-        pygame.draw.rect(self.__screen, (150,150,150), rect, 0)
-
-        points = myfont.render('Points: {}'.format(self.__points.get_points()), True, (255, 255, 255))
-        self.__screen.blit(points, (0,0))
-
-        hp_ratio = self.__destroyer.get_hp() / float(self.__destroyer.get_max_hp())
-        hp = myfont.render('HP: {}'.format(self.__destroyer.get_hp()), True, (255, 255*hp_ratio,255*hp_ratio))
-        self.__screen.blit(hp, (100,0))
-
-        max_hp = myfont.render("Max HP:{}".format(self.__destroyer.get_max_hp()), True, (255,255,255))
-        self.__screen.blit(max_hp, (200,0))
-
-        level = myfont.render("Level: {}".format(self.__game_level.get_level() +1), True, (255,255,255))
-        size_x = level.get_rect()[2]
-        self.__screen.blit(level, (self.__window_size[0] - size_x - 10, 0))
+        self.__rects.append(self.__hud.draw(self.__screen))
 
 
     def make_background(self):
@@ -321,83 +813,155 @@ class Destroyer_gfx(object):
         self.__background_rect = self.__background.get_rect()
         self.__background_rect.left, self.__background_rect.top = [0,0]
 
+    def set_dirty_rects(self, enabled):
+        self.__dirty_rects = enabled
+        self.invalidate()
+
+    def toggle_dirty_rects(self):
+        self.set_dirty_rects(not self.__dirty_rects)
+        return self.__dirty_rects
+
+    def get_dirty_rects(self):
+        return self.__dirty_rects
+
+    def set_overlay(self, overlay):
+
+        """
+        Sets an overlay drawn on top of the HUD. The overlay needs a draw(screen) method returning the rectangles it
+        drew to.
+        """
+
+        self.__overlay = overlay
+
+    def get_overlay(self):
+        return self.__overlay
+
+    def invalidate(self):
+
+        """
+        Makes the next frame redraw and update the whole screen, e.g. after a menu has been drawn over the game.
+        """
+
+        self.__full_redraw = True
+
     def get_shooting_info(self):
         shooting_power = self.__destroyer.get_shooting_power()
         tower_dir = self.__destroyer.get_direction()
         return shooting_power, tower_dir
 
-    def draw(self):
+    def draw(self, alpha=1.0):
 
         """
-        The drawing method itself. Drawing order:
+        The drawing method itself. Bullets, torpedos and enemies are drawn at alpha between their previous and their
+        current position, so movement looks smooth when the simulation runs at a fixed tick rate. Drawing order:
         1. Background image
         2. Destroyer
         3. Bullets
         4. Crates
-        5. Fades
-        6. Tower
-        7. Torpedos
-        8. Enemies
-        9. Destroyer pipe
-        10. Explosions
-        11. Texts
-        12. HUD
-
+        5. Trails
+        6. Fades
+        7. Tower
+        8. Torpedos
+        9. Enemies
+        10. Destroyer pipe
+        11. Explosions
+        12. Texts
+        13. HUD
+
+        :param alpha : fraction of the simulation step that has elapsed since the current state, 1 draws the current
+                       state
+        :type alpha  : float
         :return:
         """
+        screen = self.__screen
+        rects = self.__rects
+        del rects[:]
+        blit = screen.blit
+        add_rect = rects.append
+
         # 绘制背景图片
-        self.__screen.blit(self.__background, self.__background_rect)
+        if self.__dirty_rects and not self.__full_redraw:
+            for r in self.__previous_rects:
+                blit(self.__background, r, r)
+        else:
+            blit(self.__background, self.__background_rect)
         # 绘制毁灭者
-        self.__screen.blit(self.__destroyer.get_image()[0], self.__destroyer.get_image()[1])
+        add_rect(blit(self.__destroyer.get_image()[0], self.__destroyer.get_image()[1]))
         # 绘制射击力量条
         #Drawing the shoot power bar
         shooting_power, tower_dir = self.get_shooting_info()
         if 0 <= tower_dir < 90 or 270 < tower_dir < 360:
-            self.__screen.fill((255 - shooting_power * 2.55, shooting_power * 2.55, 0),
-                               (self.__window_size[0] / 2 - 25, self.__window_size[1] / 2 + 30,
-                                shooting_power / 2, 3))
-            pygame.draw.rect(self.__screen, (0, 0, 0),
-                             (self.__window_size[0] / 2 - 26, self.__window_size[1] / 2 + 29,
-                              shooting_power / 2 + 1, 4), 1)
+            screen.fill((255 - shooting_power * 2.55, shooting_power * 2.55, 0),
+                        (self.__window_size[0] / 2 - 25, self.__window_size[1] / 2 + 30,
+                         shooting_power / 2, 3))
+            add_rect(pygame.draw.rect(screen, (0, 0, 0),
+                                      (self.__window_size[0] / 2 - 26, self.__window_size[1] / 2 + 29,
+                                       shooting_power / 2 + 1, 4), 1))
         else:
-            self.__screen.fill((255 - shooting_power * 2.55, shooting_power * 2.55, 0),
-                               (self.__window_size[0] / 2 - 25, self.__window_size[1] / 2 - 30,
-                                shooting_power / 2, 3))
-            pygame.draw.rect(self.__screen, (0, 0, 0),
-                             (self.__window_size[0] / 2 - 26, self.__window_size[1] / 2 - 31,
-                              shooting_power / 2 + 1, 4), 1)
+            screen.fill((255 - shooting_power * 2.55, shooting_power * 2.55, 0),
+                        (self.__window_size[0] / 2 - 25, self.__window_size[1] / 2 - 30,
+                         shooting_power / 2, 3))
+            add_rect(pygame.draw.rect(screen, (0, 0, 0),
+                                      (self.__window_size[0] / 2 - 26, self.__window_size[1] / 2 - 31,
+                                       shooting_power / 2 + 1, 4), 1))
 
         # 绘制子弹
         for b in self.__bullets.get_bullets():
-            self.__screen.blit(b.get_image()[0], b.get_image()[1])
-            trail = b.get_trail()
-            if trail is not None:
-                self.__fades.add_fade(trail.get_image(), trail.get_rect(), 0.4)
+            add_rect(blit(b.get_image()[0], b.get_draw_rect(alpha)))
         # 绘制箱子
         for c in self.__crates.get_crates():
-            self.__screen.blit(c.get_image()[0], c.get_image()[1])
+            add_rect(blit(c.get_image()[0], c.get_image()[1]))
+        # 绘制子弹尾迹
+        if self.__trails is not None:
+            rects.extend(self.__trails.draw(screen))
         # 绘制淡出效果
         for f in self.__fades.get_fades():
-            blit_alpha(self.__screen, f.get_image()[0], f.get_image()[1], f.get_alpha())
+            alpha_blitter.queue(f.get_image()[0], f.get_image()[1], f.get_alpha())
+        rects.extend(alpha_blitter.flush(screen))
         # 绘制塔
-        self.__screen.blit(self.__destroyer.get_tower()[0], self.__destroyer.get_tower()[1])
+        add_rect(blit(self.__destroyer.get_tower()[0], self.__destroyer.get_tower()[1]))
         # 绘制鱼雷
         for t in self.__torpedos.get_torpedos():
-            self.__screen.blit(t.get_image()[0], t.get_image()[1])
+            add_rect(blit(t.get_image()[0], t.get_draw_rect(alpha)))
         # 绘制敌人
         for e in self.__enemies.get_enemies():
-            self.__screen.blit(e.get_image()[0], e.get_image()[1])
+            add_rect(blit(e.get_image()[0], e.get_draw_rect(alpha)))
 
         # 绘制爆炸
         for e in self.__explosions.get_explosions():
-            self.__screen.blit(e.get_image()[0], e.get_image()[1])
+            add_rect(blit(e.get_image()[0], e.get_image()[1]))
         # 绘制文字
         for f in self.__texts.get_texts():
-            blit_alpha(self.__screen, f.get_image()[0], f.get_image()[1], f.get_alpha())
+            alpha_blitter.queue(f.get_image()[0], f.get_image()[1], f.get_alpha())
+        rects.extend(alpha_blitter.flush(screen))
         # 绘制HUD
         self.__render_hud()
+        # 绘制性能分析图
+        if self.__overlay is not None:
+            rects.extend(self.__overlay.draw(screen))
         # 更新显示
-        pygame.display.update()
+        self.__update_display()
+
+    def __update_display(self):
+
+        """
+        Updates the display. In dirty rect mode only the merged rectangles drawn in this and the last frame are
+        updated, unless they cover more than the dirty threshold of the screen.
+        """
+
+        if self.__dirty_rects and not self.__full_redraw:
+            dirty = merge_rects(self.__previous_rects + self.__rects)
+            area = 0
+            for r in dirty:
+                area += r.width * r.height
+            if area > self.__dirty_threshold * self.__window_size[0] * self.__window_size[1]:
+                pygame.display.update()
+            else:
+                pygame.display.update(dirty)
+        else:
+            pygame.display.update()
+        self.__full_redraw = False
+        self.__previous_rects, self.__rects = self.__rects, self.__previous_rects
 
     def get_screen(self):
         return self.__screen
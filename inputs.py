@@ -0,0 +1,67 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+import pygame
+
+
+class Key_state(dict):
+
+    """
+    Key state of one simulation step as a dictionary of pygame key constants to pressed flags. Keys that are not in
+    the dictionary are not pressed, so it can be indexed like the result of pygame.key.get_pressed().
+    """
+
+    def __missing__(self, key):
+        return False
+
+
+class Keyboard_input(object):
+    def __init__(self):
+
+        """
+        Input source reading the keyboard state of the game window.
+        """
+
+        pass
+
+    def get_keys(self, tick):
+        return pygame.key.get_pressed()
+
+
+class Scripted_input(object):
+
+    #Keys the game reacts to
+    KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE)
+
+    def __init__(self, script=None):
+
+        """
+        Input source for runs without a player. The script is a function returning the keys pressed in a simulation
+        step. Without a script, the tower keeps turning right and firing.
+
+        :param script   : function taking the simulation step number and returning an iterable of pygame key
+                          constants that are pressed in this step
+        :type script    : function
+        """
+
+        self.__script = script if script is not None else self.turn_and_fire
+
+    @staticmethod
+    def turn_and_fire(tick):
+        return pygame.K_RIGHT, pygame.K_SPACE
+
+    def get_keys(self, tick):
+        return Key_state((key, True) for key in self.__script(tick))
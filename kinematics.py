@@ -0,0 +1,260 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+import pygame
+import numpy
+
+#Movement per direction, 0=north, 1=east, 2=south, 3=west
+DIRECTION_X = (0.0, 1.0, 0.0, -1.0)
+DIRECTION_Y = (-1.0, 0.0, 1.0, 0.0)
+
+
+class Kinematics(object):
+    def __init__(self, window_size, use_rect=False, pack_limit=8, capacity=64):
+
+        """
+        Packed movement state of enemy ships or torpedos. Real position, speed, speed multiplier, direction and size of
+        the attached units are kept in NumPy arrays and moved together in one vectorized step per cycle, which also
+        computes their rectangles, positions and off-screen flags. Packed units are views: Enemy reads its rectangle,
+        position and direction from the store instead of its own attributes, see Enemy.set_kinematics().
+
+        A vectorized step has a fixed cost of about 25 microseconds, which only pays off with enough units. Below
+        pack_limit units the store keeps the units unpacked and moves them one by one with Enemy.move(). The units are
+        packed when their number reaches pack_limit and unpacked when it drops below half of it. Step and off-screen
+        test of ships cost the same packed and unpacked at about 8 units, so levels with 8 or more enemies on the
+        screen are moved packed.
+
+        Moving, rounding and the off-screen rules are the same as in Enemy.move() and Enemy.is_out_of_window(), so a
+        game plays the same whether the units are packed or not.
+
+        Requires numpy.
+
+        :param window_size  : window size as x,y
+        :param use_rect     : test the rectangle instead of the rounded position against the window edges, see
+                              Enemy.is_out_of_window()
+        :param pack_limit   : number of units from which they are moved in packed arrays
+        :param capacity     : initial array size, the arrays grow when needed
+        :type window_size   : list
+        :type use_rect      : bool
+        :type pack_limit    : int
+        :type capacity      : int
+        """
+
+        self.__window_size = window_size
+        self.__use_rect = use_rect
+        self.__pack_limit = pack_limit
+        self.__packed = False
+        self.__owners = []
+        self.__handles = []
+        self.__rows = {}
+        self.__rects = []
+        self.__previous_rects = []
+        self.__positions = []
+        self.__arrays = {}
+        self.__capacity = 0
+        self.__allocate(capacity)
+
+    def __allocate(self, capacity):
+        n = len(self.__owners) if self.__packed else 0
+        arrays = {}
+        for name in ("x", "y", "speed", "multiplier", "vx", "vy", "offset_x", "offset_y"):
+            arrays[name] = numpy.zeros(capacity, dtype=numpy.float64)
+        for name in ("direction", "w", "h", "out_x", "out_y", "out_limit"):
+            arrays[name] = numpy.zeros(capacity, dtype=numpy.int64)
+        arrays["out"] = numpy.zeros(capacity, dtype=numpy.bool_)
+        if n > 0:
+            for name, array in arrays.items():
+                array[:n] = self.__arrays[name][:n]
+        self.__arrays = arrays
+        self.__capacity = capacity
+
+    def __set_direction(self, i, direction):
+
+        """
+        Sets the movement vector, the rectangle offset and the off-screen test of row i for a direction. Ships going
+        north or south are centered horizontally on their position, the others vertically. A unit is off-screen when
+        out_x * x + out_y * y >= out_limit for its edge x,y.
+        """
+
+        arrays = self.__arrays
+        arrays["direction"][i] = direction
+        arrays["vx"][i] = DIRECTION_X[direction]
+        arrays["vy"][i] = DIRECTION_Y[direction]
+        vertical = direction % 2 == 0
+        arrays["offset_x"][i] = -(arrays["w"][i] / 2) if vertical else 0.0
+        arrays["offset_y"][i] = 0.0 if vertical else -(arrays["h"][i] / 2)
+        edge_tests = ((0, -1, 0), (1, 0, self.__window_size[0]), (0, 1, self.__window_size[1]),
+                      (-1, 0, arrays["w"][i]))
+        arrays["out_x"][i], arrays["out_y"][i], arrays["out_limit"][i] = edge_tests[direction]
+
+    def __pack_row(self, i, unit):
+        arrays = self.__arrays
+        real_position, speed, multiplier, image_size, direction, rect, previous_rect, position = unit.get_motion()
+        arrays["x"][i], arrays["y"][i] = real_position
+        arrays["speed"][i] = speed
+        arrays["multiplier"][i] = multiplier
+        arrays["w"][i], arrays["h"][i] = image_size
+        self.__set_direction(i, direction)
+        arrays["out"][i] = unit.is_out_of_window(self.__window_size, self.__use_rect)
+        self.__rects[i] = rect
+        self.__previous_rects[i] = previous_rect
+        self.__positions[i] = position
+        unit.set_kinematics(self, i)
+
+    def __unpack_row(self, i, unit):
+        arrays = self.__arrays
+        unit.set_kinematics(None)
+        unit.set_motion((float(arrays["x"][i]), float(arrays["y"][i])), int(arrays["direction"][i]), self.__rects[i],
+                        self.__previous_rects[i], self.__positions[i])
+
+    def __pack(self):
+        n = len(self.__owners)
+        if n > self.__capacity:
+            self.__allocate(n * 2)
+        self.__rects = [None] * n
+        self.__previous_rects = [None] * n
+        self.__positions = [None] * n
+        for i, unit in enumerate(self.__owners):
+            self.__pack_row(i, unit)
+        self.__packed = True
+
+    def __unpack(self):
+        for i, unit in enumerate(self.__owners):
+            self.__unpack_row(i, unit)
+        self.__rects = []
+        self.__previous_rects = []
+        self.__positions = []
+        self.__packed = False
+
+    def attach(self, unit, handle):
+
+        """
+        Adds unit to the store.
+
+        :param unit     : Enemy instance
+        :param handle   : handle of the unit in its container, returned with the off-screen units
+        """
+
+        i = len(self.__owners)
+        if self.__packed and i == self.__capacity:
+            self.__allocate(self.__capacity * 2)
+        self.__rows[unit] = i
+        self.__owners.append(unit)
+        self.__handles.append(handle)
+        if self.__packed:
+            self.__rects.append(None)
+            self.__previous_rects.append(None)
+            self.__positions.append(None)
+            self.__pack_row(i, unit)
+        elif i + 1 >= self.__pack_limit:
+            self.__pack()
+
+    def detach(self, unit):
+
+        """
+        Removes unit from the store. A packed unit gets its movement state written back. The last row is moved into
+        the free row.
+        """
+
+        i = self.__rows.pop(unit)
+        last = len(self.__owners) - 1
+        lists = [self.__owners, self.__handles]
+        if self.__packed:
+            self.__unpack_row(i, unit)
+            lists += [self.__rects, self.__previous_rects, self.__positions]
+            if i != last:
+                for array in self.__arrays.values():
+                    array[i] = array[last]
+        if i != last:
+            for values in lists:
+                values[i] = values[last]
+            moved = self.__owners[i]
+            self.__rows[moved] = i
+            if self.__packed:
+                moved.set_kinematics(self, i)
+        for values in lists:
+            del values[last]
+        if self.__packed and last < self.__pack_limit // 2:
+            self.__unpack()
+
+    def step(self, time_delta, level=0):
+
+        """
+        Moves all units like Enemy.move() and updates their rectangles, positions and off-screen flags.
+        """
+
+        if not self.__packed:
+            for unit in self.__owners:
+                unit.move(time_delta, level)
+            return
+
+        n = len(self.__owners)
+        arrays = self.__arrays
+        speed = arrays["speed"][:n]
+        delta = time_delta * (speed + speed * arrays["multiplier"][:n] * level)
+        x = arrays["x"][:n]
+        y = arrays["y"][:n]
+        x += arrays["vx"][:n] * delta
+        y += arrays["vy"][:n] * delta
+
+        rect_x = numpy.trunc(x + arrays["offset_x"][:n]).astype(numpy.int64)
+        rect_y = numpy.trunc(y + arrays["offset_y"][:n]).astype(numpy.int64)
+        position_x = numpy.rint(x).astype(numpy.int64)
+        position_y = numpy.rint(y).astype(numpy.int64)
+
+        self.__previous_rects = self.__rects
+        self.__rects = list(map(pygame.Rect, rect_x.tolist(), rect_y.tolist(), arrays["w"][:n].tolist(),
+                                arrays["h"][:n].tolist()))
+        self.__positions = list(zip(position_x.tolist(), position_y.tolist()))
+
+        edge_x, edge_y = (rect_x, rect_y) if self.__use_rect else (position_x, position_y)
+        numpy.greater_equal(arrays["out_x"][:n] * edge_x + arrays["out_y"][:n] * edge_y, arrays["out_limit"][:n],
+                            out=arrays["out"][:n])
+
+    def get_out_of_window(self):
+
+        """
+        Returns the units that have left the game window.
+
+        :returns: list of (handle, unit)
+        """
+
+        if not self.__packed:
+            return [(handle, unit) for handle, unit in zip(self.__handles, self.__owners)
+                    if unit.is_out_of_window(self.__window_size, self.__use_rect)]
+        return [(self.__handles[i], self.__owners[i])
+                for i in numpy.flatnonzero(self.__arrays["out"][:len(self.__owners)]).tolist()]
+
+    def get_rect(self, i):
+        return self.__rects[i]
+
+    def get_previous_rect(self, i):
+        return self.__previous_rects[i]
+
+    def get_position(self, i):
+        return self.__positions[i]
+
+    def get_direction(self, i):
+        return int(self.__arrays["direction"][i])
+
+    def set_direction(self, i, direction):
+        self.__set_direction(i, direction)
+
+    def is_packed(self):
+        return self.__packed
+
+    def count(self):
+        return len(self.__owners)
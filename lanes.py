@@ -0,0 +1,141 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+from bisect import bisect_right
+
+
+class Lane_index(object):
+    def __init__(self, size):
+
+        """
+        Sorted interval index of the occupied horizontal bands (lanes) of the game window. Every band is a half-open
+        range of y values [start, end) stored under a key. The free y values between the bands are kept as sorted,
+        disjoint segments together with the running count of free values before each segment, so counting the free
+        values in a range and picking the n-th free value are binary searches. The segments are rebuilt from the bands
+        when a band has been added or removed since the last query.
+
+        :param size : number of y values, the window height. Bands are clipped to [0, size)
+        :type size  : int
+        """
+
+        self.__size = size
+        self.__bands = {}
+        self.__starts = []
+        self.__ends = []
+        self.__free_before = []
+        self.__dirty = True
+
+    def add(self, key, start, end):
+        self.__bands[key] = (start, end)
+        self.__dirty = True
+
+    def remove(self, key):
+        if self.__bands.pop(key, None) is not None:
+            self.__dirty = True
+
+    def __len__(self):
+        return len(self.__bands)
+
+    def __rebuild(self):
+        starts = []
+        ends = []
+        free_before = []
+        free = 0
+        y = 0
+        for start, end in sorted(self.__bands.values()):
+            if end <= y:
+                continue
+            if start > y:
+                starts.append(y)
+                ends.append(min(start, self.__size))
+                free_before.append(free)
+                free += ends[-1] - y
+            y = end
+            if y >= self.__size:
+                break
+        if y < self.__size:
+            starts.append(y)
+            ends.append(self.__size)
+            free_before.append(free)
+        self.__starts = starts
+        self.__ends = ends
+        self.__free_before = free_before
+        self.__dirty = False
+
+    def __free_below(self, y):
+
+        """
+        Returns the number of free y values smaller than y.
+        """
+
+        i = bisect_right(self.__starts, y) - 1
+        if i < 0:
+            return 0
+        return self.__free_before[i] + min(y, self.__ends[i]) - self.__starts[i]
+
+    def count_free(self, low, high):
+
+        """
+        Returns the number of free y values in [low, high).
+        """
+
+        if self.__dirty:
+            self.__rebuild()
+        if high <= low:
+            return 0
+        return self.__free_below(high) - self.__free_below(low)
+
+    def get_free(self, low, high, n):
+
+        """
+        Returns the n-th free y value in [low, high), counting from 0. n must be smaller than count_free(low, high).
+        """
+
+        if self.__dirty:
+            self.__rebuild()
+        target = self.__free_below(low) + n
+        i = bisect_right(self.__free_before, target) - 1
+        return self.__starts[i] + target - self.__free_before[i]
+
+    def sample(self, ranges, rng):
+
+        """
+        Picks a random free y value from one of the ranges. A range is picked with the share of its free values, so
+        the result is distributed like picking a range at random and then a y value in it, retried until the y value
+        is free. Returns None if no free y value is left in any of the ranges.
+
+        :param ranges   : list of (low, high) ranges
+        :param rng      : random number generator
+        :type ranges    : list
+        :type rng       : random.Random
+
+        :returns: y value or None
+        """
+
+        weights = [self.count_free(low, high) / float(high - low) if high > low else 0.0 for low, high in ranges]
+        total = sum(weights)
+        if total == 0:
+            return None
+        pick = rng.random() * total
+        chosen = None
+        for (low, high), weight in zip(ranges, weights):
+            if weight > 0:
+                chosen = low, high
+                if pick < weight:
+                    break
+                pick -= weight
+        low, high = chosen
+        return self.get_free(low, high, rng.randrange(self.count_free(low, high)))
@@ -17,6 +17,8 @@
 
 from gfx import *
 from units import *
+import random
+from spatial_hash import Spatial_hash
 import pygame
 
 # 处理游戏得分
@@ -52,75 +54,40 @@ class Out_window(object):
         self.__torpedos = torpedos
         self.__window_size = window_size
 
-    # 检查是否有窗口外的子弹。返回要删除的子弹索引列表
+    # 检查是否有窗口外的子弹。返回要删除的子弹句柄列表。NumPy子弹存储在移动时已删除窗口外的子弹
     def check_bullets(self):
-        bullet_remove_list = []
-        bullet_list = self.__bullets.get_bullets()
-
-        for b, _bullet in enumerate(bullet_list):
-            if not (self.__window_size[0] >= _bullet.get_position()[0] >= 0) or \
-                    not (self.__window_size[1] >= _bullet.get_position()[1] >= 0):
-                bullet_remove_list.append(b)
-        return bullet_remove_list
+        return [b for b, _bullet in self.__bullets.get_out_of_window()]
 
     # 检查敌人是否超出游戏窗口。返回一个需要移除的敌人列表。
     def check_enemies(self):
         enemies_remove_list = []
-        for e, _enemy in enumerate(self.__enemies.get_enemies()):
-            rect = _enemy.get_extent()
-            # 如果敌人向上移动且超出窗口，则将其从列表中移除并减少玩家的分数。
-            if _enemy.get_direction() == 0:
-                if rect[1] <= 0:
-                    enemies_remove_list.append(e)
-                    self.__points.reduce_points(_enemy.get_params()["points"])
-            # 如果敌人向右移动且超出窗口，则将其从列表中移除并减少玩家的分数。
-            if _enemy.get_direction() == 1:
-                if rect[0] >= self.__window_size[0]:
-                    enemies_remove_list.append(e)
-                    self.__points.reduce_points(_enemy.get_params()["points"])
-            # 如果敌人向下移动且超出窗口，则将其从列表中移除并减少玩家的分数。
-            if _enemy.get_direction() == 2:
-                if rect[1] > self.__window_size:
-                    enemies_remove_list.append(e)
-                    self.__points.reduce_points(_enemy.get_params()["points"])
-            # 如果敌人向左移动且超出窗口，则将其从列表中移除并减少玩家的分数。
-            if _enemy.get_direction() == 3:
-                if rect[2] <= 0:
-                    enemies_remove_list.append(e)
-                    self.__points.reduce_points(_enemy.get_params()["points"])
+        # 超出窗口的敌人由移动步骤标记，将其从列表中移除并减少玩家的分数。
+        for e, _enemy in self.__enemies.get_out_of_window():
+            enemies_remove_list.append(e)
+            self.__points.reduce_points(_enemy.get_params()["points"])
         return enemies_remove_list
 
     # 检查鱼雷是否超出游戏窗口。返回一个需要移除的鱼雷列表。
     def check_torpedos(self):
         torpedos_remove_list = []
-        for t, _torpedo in enumerate(self.__torpedos.get_torpedos()):
-            rect = _torpedo.get_rect()
+        out_of_window = set(t for t, _torpedo in self.__torpedos.get_out_of_window())
+        for t, _torpedo in zip(self.__torpedos.get_handles(), self.__torpedos.get_torpedos()):
             # 如果鱼雷击中了驱逐舰，则将其从列表中移除，并添加爆炸效果、减少驱逐舰的生命值和玩家的分数。
             if _torpedo.get_image()[1].colliderect(self.__destroyer.get_image()[1]):
                 torpedos_remove_list.append(t)
-                self.__explosions.add_explosion(Explosion(_torpedo.get_position(), 20))
+                self.__explosions.create_explosion(_torpedo.get_position(), 20)
                 self.__texts.add_text(_torpedo.get_position(), "-{}".
                                       format(_torpedo.get_params()["points"]), positive=False)
                 self.__destroyer.reduce_hp(_torpedo.get_damage())
-            # 如果鱼雷向上，右，下，左移动且超出窗口，则将其从列表中移除。
-            elif _torpedo.get_direction() == 0:
-                if rect[1] <= 0:
-                    torpedos_remove_list.append(t)
-            elif _torpedo.get_direction() == 1:
-                if rect[0] >= self.__window_size[0]:
-                    torpedos_remove_list.append(t)
-            elif _torpedo.get_direction() == 2:
-                if rect[1] >= self.__window_size[1]:
-                    torpedos_remove_list.append(t)
-            elif _torpedo.get_direction() == 3:
-                if rect[2] <= 0:
-                    torpedos_remove_list.append(t)
+            # 如果鱼雷超出窗口，则将其从列表中移除。
+            elif t in out_of_window:
+                torpedos_remove_list.append(t)
         return torpedos_remove_list
 # 初始化游戏逻辑
 class Destroyer_logic(object):
 
     def __init__(self, timer, destroyer, destroyer_options, enemies, bullets, torpedos, explosions, fades, texts,
-                 points, crates, window_size):
+                 points, crates, window_size, rng=random):
 
         self.__destroyer = destroyer
         self.__bullets = bullets
@@ -134,34 +101,44 @@ class Destroyer_logic(object):
         self.__crates = crates
         self.__timer = timer
         self.__destroyer_options = destroyer_options
+        self.__rng = rng
         self.__collision_manager = Out_window(bullets, enemies, torpedos, window_size, points, destroyer, explosions, texts)
+        # 敌人和箱子碰撞检测的空间哈希网格，每个周期从容器重建。子弹的碰撞由子弹容器的collide()查找
+        self.__crate_grid = Spatial_hash()
 
     # 检查子弹和敌人之间的碰撞以及这种情况下会发生什么。返回要删除的子弹和敌人的列表。
     def __check_bullets_enemies(self):
         enemy_remove_list = []
         bullet_remove_list = []
         enemy_list = self.__enemies.get_enemies()
+        enemy_handles = self.__enemies.get_handles()
         bullet_list = self.__bullets.get_bullets()
+        bullet_handles = self.__bullets.get_handles()
+        enemy_rects = [_enemy.get_image()[1] for _enemy in enemy_list]
+
+        # 友方子弹击中敌人，敌方子弹击中驱逐舰（敌人索引为None），按子弹顺序处理
+        hits = self.__bullets.collide(enemy_rects)
+        hits += [(b, None) for b, _ in self.__bullets.collide([self.__destroyer.get_image()[1]], friendly=False)]
+        hits.sort(key=lambda hit: hit[0])
 
-        for b, _bullet in enumerate(bullet_list):
-            if _bullet.is_friendly():
-                for e, _enemy in enumerate(enemy_list):
-                    if _bullet.get_image()[1].colliderect(_enemy.get_image()[1]):
-                        bullet_remove_list.append(b)
-                        self.__explosions.add_explosion(Explosion(_bullet.get_position(), 20))
-                        if _enemy.reduce_hp(_bullet.get_damage()):
-                            enemy_remove_list.append(e)
-                            self.__points.add_points(_enemy.get_params()["points"])
-                            self.__fades.add_fade(_enemy.get_image()[0], _enemy.get_image()[1], 0.5)
-                            self.__texts.add_text(_bullet.get_position(), "+{}".
-                                                  format(_enemy.get_params()["points"]))
+        for b, e in hits:
+            _bullet = bullet_list[b]
+            if e is not None:
+                _enemy = enemy_list[e]
+                bullet_remove_list.append(bullet_handles[b])
+                self.__explosions.create_explosion(_bullet.get_position(), 20)
+                if _enemy.reduce_hp(_bullet.get_damage()):
+                    enemy_remove_list.append(enemy_handles[e])
+                    self.__points.add_points(_enemy.get_params()["points"])
+                    self.__fades.add_fade(_enemy.get_image()[0], _enemy.get_image()[1], 0.5)
+                    self.__texts.add_text(_bullet.get_position(), "+{}".
+                                          format(_enemy.get_params()["points"]))
             else:
-                if _bullet.get_image()[1].colliderect(self.__destroyer.get_image()[1]):
-                    bullet_remove_list.append(b)
-                    self.__explosions.add_explosion(Explosion(_bullet.get_position(), 20))
-                    self.__texts.add_text(_bullet.get_position(), "-{}".
-                                          format(_bullet.get_damage(), positive=False))
-                    self.__destroyer.reduce_hp(_bullet.get_damage())
+                bullet_remove_list.append(bullet_handles[b])
+                self.__explosions.create_explosion(_bullet.get_position(), 20)
+                self.__texts.add_text(_bullet.get_position(), "-{}".
+                                      format(_bullet.get_damage(), positive=False))
+                self.__destroyer.reduce_hp(_bullet.get_damage())
         return bullet_remove_list, enemy_remove_list
 
     # 检查子弹和鱼雷之间的碰撞，以及在这种情况下会发生什么。返回要删除的子弹和鱼雷的列表。
@@ -170,22 +147,22 @@ class Destroyer_logic(object):
         torpedo_remove_list = []
         bullet_remove_list = []
         torpedo_list = self.__torpedos.get_torpedos()
+        torpedo_handles = self.__torpedos.get_handles()
         bullet_list = self.__bullets.get_bullets()
-        # 遍历子弹列表
-        for b,_bullet in enumerate(bullet_list):
-            if _bullet.is_friendly():
-                # 遍历鱼雷列表
-                for t, _torpedo in enumerate(torpedo_list):
-                    # 如果子弹和鱼雷发生碰撞，将它们添加到要移除的列表中
-                    if _bullet.get_image()[1].colliderect(_torpedo.get_image()[1]):
-                        bullet_remove_list.append(b)
-                        torpedo_remove_list.append(t)
-                        # 添加得分、爆炸、淡出和文本效果
-                        self.__points.add_points(_torpedo.get_params()["points"])
-                        self.__explosions.add_explosion(Explosion(_bullet.get_position(), 20))
-                        self.__fades.add_fade(_torpedo.get_image()[0], _torpedo.get_image()[1], 0.5)
-                        self.__texts.add_text(_bullet.get_position(), "+{}".
-                                              format(_torpedo.get_params()["points"]))
+        bullet_handles = self.__bullets.get_handles()
+        torpedo_rects = [_torpedo.get_image()[1] for _torpedo in torpedo_list]
+        # 遍历与鱼雷碰撞的友方子弹，将它们添加到要移除的列表中
+        for b, t in self.__bullets.collide(torpedo_rects):
+            _bullet = bullet_list[b]
+            _torpedo = torpedo_list[t]
+            bullet_remove_list.append(bullet_handles[b])
+            torpedo_remove_list.append(torpedo_handles[t])
+            # 添加得分、爆炸、淡出和文本效果
+            self.__points.add_points(_torpedo.get_params()["points"])
+            self.__explosions.create_explosion(_bullet.get_position(), 20)
+            self.__fades.add_fade(_torpedo.get_image()[0], _torpedo.get_image()[1], 0.5)
+            self.__texts.add_text(_bullet.get_position(), "+{}".
+                                  format(_torpedo.get_params()["points"]))
         return bullet_remove_list, torpedo_remove_list
 
     # Defining the effect of each type of crate
@@ -202,15 +179,15 @@ class Destroyer_logic(object):
             self.__texts.add_text(bullet_position, "HP refilled!")
         elif crate.get_type() == 3:
             for e in self.__enemies.get_enemies():
-                self.__bullets.add_bullet(Destroyer_bullet_1(self.__timer, e.get_center_point(), 0))
+                self.__bullets.fire(Destroyer_bullet_1, e.get_center_point(), 0)
             self.__texts.add_text(bullet_position, "C'EST LA BOMBE!")
         elif crate.get_type() == 4:
             x = crate.get_position()[0]
             y = crate.get_position()[1]
-            self.__bullets.add_bullet(Mine(self.__timer, (x, y - 40), 0))
-            self.__bullets.add_bullet(Mine(self.__timer, (x + 40, y), 0))
-            self.__bullets.add_bullet(Mine(self.__timer, (x, y + 40), 0))
-            self.__bullets.add_bullet(Mine(self.__timer, (x - 40, y), 0))
+            self.__bullets.fire(Mine, (x, y - 40), 0, rng=self.__rng)
+            self.__bullets.fire(Mine, (x + 40, y), 0, rng=self.__rng)
+            self.__bullets.fire(Mine, (x, y + 40), 0, rng=self.__rng)
+            self.__bullets.fire(Mine, (x - 40, y), 0, rng=self.__rng)
             self.__texts.add_text(bullet_position, "Mines!")
         elif crate.get_type() == 5:
             self.__destroyer_options.set_reload_time(100, 10)
@@ -225,31 +202,37 @@ class Destroyer_logic(object):
         bullet_remove_list = []
         crate_remove_list = []
         bullet_list = self.__bullets.get_bullets()
+        bullet_handles = self.__bullets.get_handles()
         crate_list = self.__crates.get_crates()
+        crate_handles = self.__crates.get_handles()
+        crate_rects = [_crate.get_rect() for _crate in crate_list]
 
-        # 遍历子弹列表
-        for b, _bullet in enumerate(bullet_list):
-            if _bullet.is_friendly():
-                # 遍历箱子列表
-                for c, _crate in enumerate(crate_list):
-                    # 如果子弹和箱子发生碰撞，将它们添加到要移除的列表中
-                    if _bullet.get_image()[1].colliderect(_crate.get_rect()):
-                        bullet_remove_list.append(b)
-                        crate_remove_list.append(c)
-                        # 添加得分和爆炸效果
-                        self.__points.add_points(_crate.get_points())
-                        self.__explosions.add_explosion(Explosion(_bullet.get_position(), 20))
-                        self.apply_crate_effect(_crate, _bullet.get_position())
+        # 遍历与箱子碰撞的友方子弹，将它们添加到要移除的列表中
+        for b, c in self.__bullets.collide(crate_rects):
+            _bullet = bullet_list[b]
+            _crate = crate_list[c]
+            bullet_remove_list.append(bullet_handles[b])
+            crate_remove_list.append(crate_handles[c])
+            # 添加得分和爆炸效果
+            self.__points.add_points(_crate.get_points())
+            self.__explosions.create_explosion(_bullet.get_position(), 20)
+            self.apply_crate_effect(_crate, _bullet.get_position())
 
         return bullet_remove_list, crate_remove_list
 
     def __check_enemies_crates(self):
         crates_remove_list = []
         crate_list = self.__crates.get_crates()
-        for e, _enemy in enumerate(self.__enemies.get_enemies()):
-            for c, _crate in enumerate(crate_list):
-                if _enemy.get_rect().colliderect(_crate.get_rect()):
-                    crates_remove_list.append(c)
+        if len(crate_list) == 0:
+            return crates_remove_list
+        crate_handles = self.__crates.get_handles()
+        crate_rects = [_crate.get_rect() for _crate in crate_list]
+        self.__crate_grid.rebuild(crate_rects)
+        for _enemy in self.__enemies.get_enemies():
+            enemy_rect = _enemy.get_rect()
+            for c in self.__crate_grid.query(enemy_rect):
+                if enemy_rect.colliderect(crate_rects[c]):
+                    crates_remove_list.append(crate_handles[c])
         return crates_remove_list
 
     def check(self):
@@ -261,16 +244,17 @@ class Destroyer_logic(object):
         bullet_remove_list_4, crate_remove_list_1 = self.__check_bullets_crates()
         crate_remove_list_2 = self.__check_enemies_crates()
 
-        bullet_remove_list = list(set(bullet_remove_list_1 + bullet_remove_list_2 + bullet_remove_list_3 +
-                                      bullet_remove_list_4))
-        enemy_remove_list = list(set(enemy_remove_list_1 + enemy_remove_list_2))
-        torpedo_remove_list = list(set(torpedo_remove_list_1 + torpedo_remove_list_2))
-        crate_remove_list = list(set(crate_remove_list_1 + crate_remove_list_2))
+        # 标记要删除的对象句柄，重复的句柄只删除一次，然后每个周期统一删除一次
+        self.__bullets.remove_bullets(bullet_remove_list_1 + bullet_remove_list_2 + bullet_remove_list_3 +
+                                      bullet_remove_list_4)
+        self.__enemies.remove_enemies(enemy_remove_list_1 + enemy_remove_list_2)
+        self.__torpedos.remove_torpedos(torpedo_remove_list_1 + torpedo_remove_list_2)
+        self.__crates.remove_crates(crate_remove_list_1 + crate_remove_list_2)
 
-        self.__bullets.remove_bullets(bullet_remove_list)
-        self.__enemies.remove_enemies(enemy_remove_list)
-        self.__torpedos.remove_torpedos(torpedo_remove_list)
-        self.__crates.remove_crates(crate_remove_list)
+        self.__bullets.apply_removals()
+        self.__enemies.apply_removals()
+        self.__torpedos.apply_removals()
+        self.__crates.apply_removals()
 
         if len(self.__enemies.get_enemies()) == 0:
             self.__enemies.add_enemy()
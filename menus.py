@@ -76,8 +76,8 @@ class Menu(object):
         self._arrow_image_right.set_rect(self._arrow_positions[option][1])
         #定义按键和对应操作的字典
         key_actions = {
-            "down": lambda: option + 1 if option < max_option - 1 else 0,
-            "up": lambda: option - 1 if option > 0 else max_option - 1,
+            "down": lambda: (option + 1 if option < max_option - 1 else 0, False),
+            "up": lambda: (option - 1 if option > 0 else max_option - 1, False),
             "escape": lambda: (-1, True),
             "return": lambda: (option, True)
         }
@@ -86,13 +86,14 @@ class Menu(object):
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     sys.exit()
-                if event.type is pygame.KEYDOWN:
+                if event.type == pygame.KEYDOWN:
                     key = pygame.key.name(event.key)
                     # 处理按键事件
                     if key in key_actions:
                         option, exit = key_actions[key]()
-                        self._arrow_image_left.set_rect(self._arrow_positions[option][0])
-                        self._arrow_image_right.set_rect(self._arrow_positions[option][1])
+                        if option in self._arrow_positions:
+                            self._arrow_image_left.set_rect(self._arrow_positions[option][0])
+                            self._arrow_image_right.set_rect(self._arrow_positions[option][1])
 
             # 绘制菜单
             self.paint()
@@ -0,0 +1,90 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+
+class Occupancy_grid(object):
+    def __init__(self, area, cell_size=32):
+
+        """
+        Coarse grid of the positions an object can be placed at. A cell is blocked as soon as any position in it would
+        make the object collide with an obstacle, so every position of a free cell is a valid position. sample() picks
+        a free cell and a position in it directly, which takes bounded time however crowded the area is.
+
+        :param area         : positions the object can be placed at as x, y, width, height
+        :param cell_size    : edge length of the grid cells in px
+        :type area          : list
+        :type cell_size     : int
+        """
+
+        self.__x, self.__y, self.__width, self.__height = area
+        self.__cell_size = cell_size
+        self.__columns = max(1, -(-self.__width // cell_size))
+        self.__rows = max(1, -(-self.__height // cell_size))
+        self.__empty = bytes(self.__columns * self.__rows)
+        self.__cells = bytearray(self.__empty)
+
+    def clear(self):
+        self.__cells[:] = self.__empty
+
+    def block(self, rect, size):
+
+        """
+        Blocks the cells of all positions at which an object of the given size would collide with rect, like
+        pygame.Rect.colliderect().
+
+        :param rect : obstacle rectangle as x, y, width, height
+        :param size : object size as width, height
+        """
+
+        cell_size = self.__cell_size
+        #Positions x with rect.x - width < x < rect.right collide
+        x_min = max(0, (int(rect[0]) - size[0] + 1 - self.__x) // cell_size)
+        x_max = min(self.__columns - 1, (int(rect[0] + rect[2]) - 1 - self.__x) // cell_size)
+        y_min = max(0, (int(rect[1]) - size[1] + 1 - self.__y) // cell_size)
+        y_max = min(self.__rows - 1, (int(rect[1] + rect[3]) - 1 - self.__y) // cell_size)
+        if x_min > x_max:
+            return
+        cells = self.__cells
+        columns = self.__columns
+        blocked = b"\x01" * (x_max - x_min + 1)
+        for row in range(y_min, y_max + 1):
+            start = row * columns + x_min
+            cells[start:start + len(blocked)] = blocked
+
+    def count_free(self):
+        return self.__cells.count(0)
+
+    def sample(self, rng):
+
+        """
+        Returns a random position in a random free cell, or None if all cells are blocked.
+
+        :param rng  : random number generator
+        :type rng   : random.Random
+
+        :returns: x,y or None
+        """
+
+        free = [i for i, blocked in enumerate(self.__cells) if not blocked]
+        if not free:
+            return None
+        i = free[rng.randrange(len(free))]
+        column = i % self.__columns
+        row = i // self.__columns
+        x = self.__x + column * self.__cell_size
+        y = self.__y + row * self.__cell_size
+        return (rng.randrange(x, min(x + self.__cell_size, self.__x + self.__width)),
+                rng.randrange(y, min(y + self.__cell_size, self.__y + self.__height)))
@@ -0,0 +1,68 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+
+class Pool(object):
+    def __init__(self, factory, capacity=256):
+
+        """
+        Free list of reusable game objects. acquire() takes an object from the free list and calls its reset() method
+        with the given arguments, or creates a new one with factory if the free list is empty. release() puts an object
+        back on the free list, unless the list already holds capacity objects.
+
+        :param factory  : class or function creating a new object from the acquire() arguments. The objects must have
+                          a reset() method taking the same arguments.
+        :param capacity : maximum number of objects kept on the free list
+        :type capacity  : int
+        """
+
+        self.__factory = factory
+        self.__capacity = capacity
+        self.__free = []
+        self.__in_use = 0
+        self.__high_water = 0
+        self.__created = 0
+
+    def acquire(self, *args, **kwargs):
+        if self.__free:
+            obj = self.__free.pop()
+            obj.reset(*args, **kwargs)
+        else:
+            obj = self.__factory(*args, **kwargs)
+            self.__created += 1
+        self.__in_use += 1
+        if self.__in_use > self.__high_water:
+            self.__high_water = self.__in_use
+        return obj
+
+    def release(self, obj):
+        self.__in_use -= 1
+        if len(self.__free) < self.__capacity:
+            self.__free.append(obj)
+
+    def set_capacity(self, capacity):
+        self.__capacity = capacity
+        del self.__free[capacity:]
+
+    def get_stats(self):
+
+        """
+        Returns the pool counters: objects in use (occupancy), the highest number of objects in use at the same time,
+        objects on the free list, the free list capacity and the number of objects created.
+        """
+
+        return {"in_use": self.__in_use, "high_water": self.__high_water, "free": len(self.__free),
+                "capacity": self.__capacity, "created": self.__created}
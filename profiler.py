@@ -0,0 +1,252 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+import csv
+from collections import deque
+from time import perf_counter_ns
+import pygame
+from assets import render_text
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0
+    return ordered[int((len(ordered) - 1) * fraction)]
+
+
+class Stage_profiler(object):
+    def __init__(self, stages, window=300):
+
+        """
+        Times the stages of the main loop. start_frame() starts the clock, mark(name) adds the time since the previous
+        mark (or the frame start) to the stage name, end_frame() closes the frame. Times are taken with
+        perf_counter_ns and kept for the last window frames, from which get_stats() computes rolling percentiles.
+        Stages that run several times per frame, like the simulation stages with a fixed tick rate, are summed.
+
+        :param stages   : names of the stages in loop order. They are the columns of the CSV export, stages not in
+                          the list are timed but not exported
+        :param window   : number of frames the percentiles are computed over
+        :type stages    : list of str
+        :type window    : int
+        """
+
+        self.__stages = list(stages)
+        self.__frames = deque(maxlen=window)
+        self.__current = {}
+        self.__frame_start = None
+        self.__last = None
+        self.__frame_count = 0
+        self.__csv_file = None
+        self.__csv_writer = None
+
+    def start_frame(self):
+        self.__frame_start = self.__last = perf_counter_ns()
+
+    def mark(self, name):
+        now = perf_counter_ns()
+        current = self.__current
+        current[name] = current.get(name, 0) + now - self.__last
+        self.__last = now
+
+    def end_frame(self):
+        if self.__frame_start is None:
+            return
+        total = perf_counter_ns() - self.__frame_start
+        self.__frames.append((total, self.__current))
+        self.__frame_count += 1
+        if self.__csv_writer is not None:
+            current = self.__current
+            self.__csv_writer.writerow([self.__frame_count, total / 1e6] +
+                                       [current.get(name, 0) / 1e6 for name in self.__stages])
+        self.__current = {}
+        self.__frame_start = None
+
+    def get_frame_times(self):
+
+        """
+        Returns the frame times of the window in ns, oldest first.
+        """
+
+        return [frame[0] for frame in self.__frames]
+
+    def get_frames(self):
+        return self.__frames
+
+    def get_frame_count(self):
+        return self.__frame_count
+
+    def get_stages(self):
+        return self.__stages
+
+    def get_stats(self):
+
+        """
+        Returns the rolling statistics in ms: p50, p95, p99 and mean of every stage and of the whole frame, and the
+        frame time jitter as the mean absolute difference between consecutive frame times.
+        """
+
+        frames = self.__frames
+        stats = {}
+        names = list(self.__stages)
+        for total, current in frames:
+            for name in current:
+                if name not in names:
+                    names.append(name)
+        for name in names:
+            times = sorted(current.get(name, 0) for total, current in frames)
+            stats[name] = self.__summary(times)
+        frame_times = [total for total, current in frames]
+        stats["frame"] = self.__summary(sorted(frame_times))
+        if len(frame_times) > 1:
+            jitter = sum(abs(b - a) for a, b in zip(frame_times, frame_times[1:])) / (len(frame_times) - 1)
+        else:
+            jitter = 0
+        stats["frame"]["jitter"] = jitter / 1e6
+        return stats
+
+    @staticmethod
+    def __summary(ordered):
+        mean = sum(ordered) / len(ordered) if ordered else 0
+        return {"p50": percentile(ordered, 0.50) / 1e6, "p95": percentile(ordered, 0.95) / 1e6,
+                "p99": percentile(ordered, 0.99) / 1e6, "mean": mean / 1e6}
+
+    def start_csv(self, path):
+
+        """
+        Starts writing one CSV row per frame to path: frame number, frame time and the time of every stage in ms.
+        """
+
+        self.stop_csv()
+        self.__csv_file = open(path, "w", newline="")
+        self.__csv_writer = csv.writer(self.__csv_file)
+        self.__csv_writer.writerow(["frame", "frame_ms"] + ["{}_ms".format(name) for name in self.__stages])
+
+    def stop_csv(self):
+        if self.__csv_file is not None:
+            self.__csv_file.close()
+        self.__csv_file = None
+        self.__csv_writer = None
+
+    def is_exporting(self):
+        return self.__csv_writer is not None
+
+
+class Profiler_overlay(object):
+
+    #Colors of the stages in the graph, repeated if there are more stages
+    COLORS = [(230, 25, 75), (60, 180, 75), (255, 225, 25), (0, 130, 200), (245, 130, 48), (145, 30, 180),
+              (70, 240, 240), (240, 50, 230), (210, 245, 60), (250, 190, 190), (0, 128, 128), (230, 190, 255),
+              (170, 110, 40), (255, 250, 200), (128, 0, 0), (170, 255, 195), (128, 128, 0), (255, 215, 180),
+              (0, 0, 128), (128, 128, 128)]
+
+    def __init__(self, profiler, position=(10, 40), size=(300, 120), budget_ms=1000.0 / 60, font_size=12,
+                 stats_interval=30):
+
+        """
+        Overlay drawing the frame times of the profiler window as a stacked bar graph, one bar per frame and one color
+        per stage, with a line at the frame budget. Next to the graph the p50/p95/p99 of the frame and of the most
+        expensive stages are listed. The graph is scrolled by one pixel per frame, so only the bars of the new frames
+        are drawn. Nothing is computed while the overlay is hidden.
+
+        :param profiler         : Stage_profiler instance
+        :param position         : top left corner of the overlay
+        :param size             : size of the graph in px
+        :param budget_ms        : frame budget drawn as a line, the graph height is twice the budget
+        :param font_size        : font size of the statistics text
+        :param stats_interval   : the statistics text is updated every stats_interval frames
+        """
+
+        self.__profiler = profiler
+        self.__position = position
+        self.__size = size
+        self.__budget = budget_ms * 1e6
+        self.__font_size = font_size
+        self.__stats_interval = stats_interval
+        self.__visible = False
+        self.__frames_since_stats = stats_interval
+        self.__lines = []
+        self.__surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.__drawn_frames = 0
+
+    def toggle(self):
+        self.__visible = not self.__visible
+        self.__frames_since_stats = self.__stats_interval
+        self.__drawn_frames = 0
+
+    def is_visible(self):
+        return self.__visible
+
+    def draw(self, screen):
+
+        """
+        Draws the overlay if it is visible. Returns the list of rectangles drawn to.
+        """
+
+        if not self.__visible:
+            return []
+
+        surface = self.__surface
+        width, height = self.__size
+        scale = height / (2.0 * self.__budget)
+        stages = self.__profiler.get_stages()
+        frames = self.__profiler.get_frames()
+        frame_count = self.__profiler.get_frame_count()
+        new = min(frame_count - self.__drawn_frames, len(frames), width)
+        self.__drawn_frames = frame_count
+        if new >= width or new >= len(frames):
+            surface.fill((0, 0, 0, 160))
+        elif new > 0:
+            surface.scroll(-new, 0)
+            surface.fill((0, 0, 0, 160), (width - new, 0, new, height))
+        x = width - new
+        for i in range(len(frames) - new, len(frames)):
+            total, current = frames[i]
+            y = height
+            for stage_index, name in enumerate(stages):
+                duration = current.get(name, 0)
+                if duration:
+                    bar = duration * scale
+                    pygame.draw.line(surface, self.COLORS[stage_index % len(self.COLORS)], (x, y), (x, y - bar))
+                    y -= bar
+            pygame.draw.line(surface, (255, 255, 255), (x, y), (x, height - total * scale))
+            x += 1
+        budget_y = height - self.__budget * scale
+        pygame.draw.line(surface, (255, 255, 255), (0, budget_y), (width, budget_y))
+
+        rects = [screen.blit(surface, self.__position)]
+
+        self.__frames_since_stats += 1
+        if self.__frames_since_stats >= self.__stats_interval:
+            self.__frames_since_stats = 0
+            self.__lines = self.__make_lines(stages)
+        y = self.__position[1] + height + 2
+        for text, color in self.__lines:
+            image = render_text(text, "Arial", self.__font_size, color)
+            rects.append(screen.blit(image, (self.__position[0], y)))
+            y += image.get_height()
+        return rects
+
+    def __make_lines(self, stages, count=5):
+        stats = self.__profiler.get_stats()
+        frame = stats["frame"]
+        lines = [("frame p50 {:.2f} p95 {:.2f} p99 {:.2f} jitter {:.2f} ms".format(
+            frame["p50"], frame["p95"], frame["p99"], frame["jitter"]), (255, 255, 255))]
+        ranked = sorted((s for s in stats if s != "frame"), key=lambda s: stats[s]["p95"], reverse=True)
+        for name in ranked[:count]:
+            color = self.COLORS[stages.index(name) % len(self.COLORS)] if name in stages else (255, 255, 255)
+            lines.append(("{} p50 {:.2f} p95 {:.2f} p99 {:.2f}".format(
+                name, stats[name]["p50"], stats[name]["p95"], stats[name]["p99"]), color))
+        return lines
@@ -0,0 +1,114 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+import json
+import zlib
+from inputs import Key_state, Scripted_input
+
+#Version of the replay file format
+REPLAY_VERSION = 1
+
+
+def encode_keys(keys):
+
+    """
+    Packs the state of the keys the game reacts to into one byte, one bit per key of Scripted_input.KEYS.
+    """
+
+    bits = 0
+    for i, key in enumerate(Scripted_input.KEYS):
+        if keys[key]:
+            bits |= 1 << i
+    return bits
+
+
+def decode_keys(bits):
+    return Key_state((key, True) for i, key in enumerate(Scripted_input.KEYS) if bits & (1 << i))
+
+
+class Replay_recorder(object):
+    def __init__(self, source):
+
+        """
+        Input source recording the key state of every simulation step it hands out from source. get_keys() must be
+        called exactly once per simulation step. save() writes the
+        recording as a replay file: one line of JSON with the game settings, followed by one byte of key bits per
+        step, compressed with zlib. The simulation step length is fixed by the tick rate in the settings, so the key
+        bits are all that changes from step to step.
+
+        :param source   : input source that is recorded
+        """
+
+        self.__source = source
+        self.__ticks = bytearray()
+
+    def get_keys(self, tick):
+        bits = encode_keys(self.__source.get_keys(tick))
+        self.__ticks.append(bits)
+        return decode_keys(bits)
+
+    def count(self):
+        return len(self.__ticks)
+
+    def save(self, path, settings, result=None):
+
+        """
+        Writes the replay file.
+
+        :param path     : file path
+        :param settings : game settings needed to reproduce the run, e.g. seed and tick rate
+        :param result   : end-of-run values stored for comparison with the replay, e.g. score and hp
+        :type settings  : dict
+        :type result    : dict
+        """
+
+        header = {"version": REPLAY_VERSION, "ticks": len(self.__ticks), "settings": settings, "result": result}
+        with open(path, "wb") as f:
+            f.write(json.dumps(header, sort_keys=True).encode("utf-8"))
+            f.write(b"\n")
+            f.write(zlib.compress(bytes(self.__ticks), 9))
+
+
+class Replay_input(object):
+    def __init__(self, path):
+
+        """
+        Input source playing back the key states of a replay file. Also holds the settings and the recorded result of
+        the file.
+        """
+
+        with open(path, "rb") as f:
+            header, data = f.read().split(b"\n", 1)
+        header = json.loads(header.decode("utf-8"))
+        if header["version"] != REPLAY_VERSION:
+            raise ValueError("Unsupported replay file version {}".format(header["version"]))
+        self.__settings = header["settings"]
+        self.__result = header["result"]
+        self.__ticks = zlib.decompress(data)
+        if len(self.__ticks) != header["ticks"]:
+            raise ValueError("Replay file {} is truncated".format(path))
+
+    def get_keys(self, tick):
+        return decode_keys(self.__ticks[tick])
+
+    def get_settings(self):
+        return self.__settings
+
+    def get_result(self):
+        return self.__result
+
+    def count(self):
+        return len(self.__ticks)
@@ -0,0 +1,88 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+
+from heapq import heappush, heappop
+
+
+class Scheduler(object):
+    def __init__(self, clock):
+
+        """
+        Min-heap of timed callbacks on the game time. schedule() registers a callback that is called by run() once
+        the game time has reached its due time. Each call of run() only pops the events that are due, so waiting
+        timers cost nothing per cycle. The game time only advances with the simulation steps, so all timers stop
+        while the game is paused.
+
+        Events due at the same time are called in the order they were scheduled. cancel() only marks an event, it is
+        dropped when it reaches the top of the heap.
+
+        :param clock    : function returning the game time in seconds
+        """
+
+        self.__clock = clock
+        self.__heap = []
+        self.__sequence = 0
+        self.__fired = 0
+
+    def schedule(self, delay, callback, *args):
+
+        """
+        Calls callback with args once delay seconds of game time have passed.
+
+        :param delay    : delay in seconds from the current game time
+        :type delay     : float
+
+        :returns: event that can be passed to cancel()
+        """
+
+        event = [self.__clock() + delay, self.__sequence, callback, args]
+        self.__sequence += 1
+        heappush(self.__heap, event)
+        return event
+
+    def cancel(self, event):
+
+        """
+        Cancels a scheduled event. Events that have already been called are ignored.
+        """
+
+        event[2] = None
+
+    def run(self):
+
+        """
+        Calls the callbacks of all events that are due at the current game time, in order of their due times.
+        Events scheduled by the callbacks are called in the same run if they are already due.
+
+        :returns: number of callbacks called
+        """
+
+        now = self.__clock()
+        heap = self.__heap
+        fired = 0
+        while heap and heap[0][0] <= now:
+            event = heappop(heap)
+            callback = event[2]
+            if callback is not None:
+                event[2] = None
+                callback(*event[3])
+                fired += 1
+        self.__fired += fired
+        return fired
+
+    def get_stats(self):
+        return {"pending": len(self.__heap), "fired": self.__fired}
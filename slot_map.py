@@ -0,0 +1,144 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+
+class Slot_map(object):
+    def __init__(self):
+
+        """
+        Container with stable handles. insert() returns a handle that stays valid until the item is removed, no matter
+        how many other items are inserted or removed. A handle is a pair of slot index and generation. The generation
+        of a slot is increased every time its item is removed, so old handles to a reused slot are recognized as stale.
+
+        The items are kept in a dense list for iteration. Removing an item moves the last item into its place, so
+        insert and remove take constant time, but the iteration order is not the insertion order.
+
+        Removals can be deferred with defer_remove() and applied together with flush(), so items can be marked for
+        removal while the container is iterated.
+        """
+
+        self.__items = []
+        self.__handles = []
+        self.__slot_generations = []
+        self.__slot_indices = []
+        self.__free_slots = []
+        self.__pending = set()
+
+    def insert(self, item):
+        if self.__free_slots:
+            slot = self.__free_slots.pop()
+        else:
+            slot = len(self.__slot_generations)
+            self.__slot_generations.append(0)
+            self.__slot_indices.append(None)
+        handle = (slot, self.__slot_generations[slot])
+        self.__slot_indices[slot] = len(self.__items)
+        self.__items.append(item)
+        self.__handles.append(handle)
+        return handle
+
+    def get(self, handle):
+
+        """
+        Returns the item of handle, or None if the item has been removed.
+        """
+
+        index = self.__index_of(handle)
+        if index is None:
+            return None
+        return self.__items[index]
+
+    def remove(self, handle):
+
+        """
+        Removes the item of handle right away and returns it. Stale handles are ignored and return None.
+        """
+
+        index = self.__index_of(handle)
+        if index is None:
+            return None
+        items = self.__items
+        handles = self.__handles
+        item = items[index]
+        last = len(items) - 1
+        if index != last:
+            items[index] = items[last]
+            handles[index] = handles[last]
+            self.__slot_indices[handles[index][0]] = index
+        items.pop()
+        handles.pop()
+
+        slot = handle[0]
+        self.__slot_generations[slot] += 1
+        self.__slot_indices[slot] = None
+        self.__free_slots.append(slot)
+        return item
+
+    def defer_remove(self, handle):
+        self.__pending.add(handle)
+
+    def flush(self):
+
+        """
+        Applies the deferred removals. Returns the removed items. The removals are applied in handle order, so the
+        resulting item order does not depend on the order the handles were marked in.
+        """
+
+        if not self.__pending:
+            return []
+        removed = []
+        for handle in sorted(self.__pending):
+            item = self.remove(handle)
+            if item is not None:
+                removed.append(item)
+        self.__pending.clear()
+        return removed
+
+    def clear(self):
+        for handle in list(self.__handles):
+            self.remove(handle)
+        self.__pending.clear()
+
+    def items(self):
+
+        """
+        Returns the dense list of items. The list is owned by the container and changes with every insert and remove.
+        """
+
+        return self.__items
+
+    def handles(self):
+
+        """
+        Returns the handles of the items, in the same order as items().
+        """
+
+        return self.__handles
+
+    def __index_of(self, handle):
+        slot, generation = handle
+        if slot >= len(self.__slot_generations) or self.__slot_generations[slot] != generation:
+            return None
+        return self.__slot_indices[slot]
+
+    def __contains__(self, handle):
+        return self.__index_of(handle) is not None
+
+    def __len__(self):
+        return len(self.__items)
+
+    def __iter__(self):
+        return iter(self.__items)
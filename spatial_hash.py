@@ -0,0 +1,90 @@
+########################################################################################################################
+# Destroyer - a small boat shooter game.                                                                               #
+# Copyright (C) 2018 by Hendrik Braun                                                                                  #
+#                                                                                                                      #
+# This program is free software: you can redistribute it and/or modify it under the terms of the                       #
+# GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or         #
+# (at your option) any later version.                                                                                  #
+#                                                                                                                      #
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied   #
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more        #
+# details.                                                                                                             #
+#                                                                                                                      #
+# You should have received a copy of the GNU General Public License along with this program.                           #
+# If not, see <http://www.gnu.org/licenses/>.                                                                          #
+########################################################################################################################
+
+
+class Spatial_hash(object):
+    def __init__(self, cell_size=64):
+
+        """
+        Uniform grid for finding collision candidates. Items are stored with their rectangle in every grid cell the
+        rectangle touches. A query returns the items of the cells touched by the query rectangle, which are the only
+        items that can collide with it. The exact test is left to the caller.
+
+        :param cell_size : edge length of the grid cells in px
+        :type cell_size  : int
+        """
+
+        self.__cell_size = cell_size
+        self.__cells = {}
+
+    def clear(self):
+        self.__cells.clear()
+
+    def insert(self, item, rect):
+        cell_size = self.__cell_size
+        cells = self.__cells
+        x_min = int(rect[0]) // cell_size
+        y_min = int(rect[1]) // cell_size
+        x_max = int(rect[0] + rect[2]) // cell_size
+        y_max = int(rect[1] + rect[3]) // cell_size
+        for x in range(x_min, x_max + 1):
+            for y in range(y_min, y_max + 1):
+                cell = cells.get((x, y))
+                if cell is None:
+                    cells[(x, y)] = [item]
+                else:
+                    cell.append(item)
+
+    def rebuild(self, rects):
+
+        """
+        Clears the grid and inserts the indices of rects as items.
+
+        :param rects : rectangles of the items
+        :type rects  : list of pygame.Rect
+        """
+
+        self.__cells.clear()
+        for i, rect in enumerate(rects):
+            self.insert(i, rect)
+
+    def query(self, rect):
+
+        """
+        Returns the items in the cells touched by rect. Every item is returned once and the items are sorted, so
+        callers iterating over the result see the items in the same order as in the list the grid was built from.
+
+        :returns: list of items
+        """
+
+        cell_size = self.__cell_size
+        cells = self.__cells
+        x_min = int(rect[0]) // cell_size
+        y_min = int(rect[1]) // cell_size
+        x_max = int(rect[0] + rect[2]) // cell_size
+        y_max = int(rect[1] + rect[3]) // cell_size
+
+        if x_min == x_max and y_min == y_max:
+            cell = cells.get((x_min, y_min))
+            return cell if cell is not None else []
+
+        found = set()
+        for x in range(x_min, x_max + 1):
+            for y in range(y_min, y_max + 1):
+                cell = cells.get((x, y))
+                if cell is not None:
+                    found.update(cell)
+        return sorted(found)
@@ -1,5 +1,6 @@
 import pygame
 from gfx import blit_alpha
+from assets import load_image, render_text
 import units
 
 class Sprite(object):
@@ -14,7 +15,7 @@ class Sprite(object):
 
     def __init__(self, image, x=0,y=0):
         if isinstance(image, str):
-            self._original_image = pygame.image.load(image)
+            self._original_image = load_image(image)
         else:
             self._original_image = image
         self._image = self._original_image
@@ -97,6 +98,5 @@ class Sprite(object):
 
     @classmethod
     def from_text(cls, text, x=0,y=0, font_name="Arial", font_size=20, color=(255,255,255)):
-        myfont = pygame.font.SysFont(font_name, font_size)
-        image = myfont.render(text, True, color)
+        image = render_text(text, font_name, font_size, color)
         return Sprite(image, x,y)
\ No newline at end of file
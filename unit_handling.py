@@ -15,6 +15,17 @@
 ########################################################################################################################
 
 from units import *
+import random
+from pool import Pool
+from slot_map import Slot_map
+from lanes import Lane_index
+from occupancy import Occupancy_grid
+from spatial_hash import Spatial_hash
+
+try:
+    from kinematics import Kinematics
+except ImportError:
+    Kinematics = None
 
 class Enemies():
     """
@@ -43,7 +54,7 @@ class Enemies():
     }
 
     def __init__(self, timer, wait_time_range, max_enemies, torpedos, crates, bullets,  game_level, window_size,
-                 top_distance, max_torpedos=1):
+                 top_distance, max_torpedos=1, rng=random, vectorized=True):
         """
         Class for handling all enemy ship objects.
         :param wait_time_range  : range of minimum wait time to maximum wait time for spawn of next enemy
@@ -55,6 +66,8 @@ class Enemies():
         :param window_size      : window size in x,y
         :param top_distance     : minimum y position for spwaning enemies in order to avoid HUD
         :param max_torpedos     : maximum number of torpedos on the screen at the same time
+        :param rng              : random number generator for enemy types, positions, speeds and torpedos
+        :param vectorized       : move the ships in a Kinematics store if numpy is available, otherwise one by one
         :type wait_time_range   : set
         :type max_enemies       : int
         :type torpedos          : Torpedos
@@ -63,12 +76,16 @@ class Enemies():
         :type window_size       : list
         :type top_distance      : int
         :type max_torpedos      : int
+        :type rng               : random.Random
+        :type vectorized        : bool
 
 
         :returns:
         """
         self.__timer = timer
-        self.__enemy_list = []
+        self.__scheduler = timer.get_scheduler()
+        self.__rng = rng
+        self.__enemies = Slot_map()
         self.__wait_time_range = wait_time_range
         self.__max_enemies = max_enemies
         self.__next_enemy_in = 0
@@ -83,34 +100,19 @@ class Enemies():
         self.__total_enemies = 0
         self.__sunk_enemies_count = 0
         self.__total_time = 0
-        self.__unit_type_count = {i:0 for i in range(len(self.__ship_ratios[0]))}
+        self.__level_counts = {}
+        self.__kinematics = Kinematics(window_size) if vectorized and Kinematics is not None else None
+        self.__lanes = Lane_index(window_size[1])
 
     def add_enemy(self):
         """
         Method for evaluating if an enemy is to be added, based on the actual number and the time passed since the
-        last spawn.
+        last spawn. Ships are spawned in a free lane, a y position that is not within 40 pixels of another ship. If
+        no lane is free, no ship is spawned and the spawn is tried again in the next cycle.
 
-        :returns:
+        :returns: handle of the new ship, or None
         """
 
-        def check_y_position(y):
-            """
-            Method to check if any other enemy is on the same position or within a frame of 80 pixels. If so, the
-            position is regarded as bad and a new ship will not be spawned within that range.
-
-            :returns: boolean
-            """
-
-            # Прокрутить текущий список врагов
-            for e in self.__enemy_list:
-                # Получить информацию о местоположении врага
-                rect = e.get_extent()
-                # Возвращаем True, если позиция y находится в пределах 40 пикселей от врага
-                if rect[1] - 40 < y < rect[3] + 40:
-                    return True
-            # В противном случае вернуть False
-            return False
-
         # Определить внутренний метод создания корабля на основе его типа, скорости, начального положения и ориентации
         def build_my_ship(ship_type, speed, origin, direction):
             # Создавайте разные корабли в зависимости от типа корабля
@@ -131,7 +133,7 @@ class Enemies():
             """
 
             # случайно сгенерированный тип корабля
-            ship_type = randrange(1,100,1)
+            ship_type = self.__rng.randrange(1,100,1)
             # Получить количество типов кораблей
             ship_type_count = len(self.__ship_ratios)
             # Получить пропорцию корабля по уровню игры
@@ -153,7 +155,7 @@ class Enemies():
                 param_dict = Fregatte.get_params()
 
             # частота появления кораблей
-            speed = randrange(param_dict["min_speed"], param_dict["max_speed"], 1)
+            speed = self.__rng.randrange(param_dict["min_speed"], param_dict["max_speed"], 1)
 
             # Если метод возрождения корабля равен 1, используйте фиксированное положение возрождения и ориентацию.
             if param_dict["spawn_method"] == 1:
@@ -164,24 +166,16 @@ class Enemies():
                 return build_my_ship(ship_type, speed, (x,y), direction)
 
             # Если это не фиксированная позиция и направление генерации, их нужно генерировать случайным образом
-            good_y = False
-
-            # Цикл до тех пор, пока не будет найдена хорошая позиция y
-            # Используется для определения того, находится ли позиция y в верхней или нижней половине.
-            while not good_y:
-                # Произвольно сгенерировать позицию по оси y
-                y_rand = randrange(0,2,1)
-                if y_rand == 0:
-                    y = randrange(self.__top_distance + 10, self.__window_size[1]/2-param_dict["min_dist"])
-                if y_rand == 1:
-                    y = randrange(self.__window_size[1]/2+param_dict["min_dist"], self.__window_size[1]-10)
-
-                # Проверяем правильность позиции y, если да, выходим из цикла
-                if not check_y_position(y):
-                    good_y = True
+            # Случайная свободная позиция y в верхней или нижней половине, None если свободной полосы нет
+            y = self.__lanes.sample([(self.__top_distance + 10, int(self.__window_size[1]/2-param_dict["min_dist"])),
+                                     (int(self.__window_size[1]/2+param_dict["min_dist"]), self.__window_size[1]-10)],
+                                    self.__rng)
+            if y is None:
+                self.__count("no_lane", 1)
+                return None
 
             # Случайным образом генерировать направления
-            dir_rand = randrange(0,2,1)
+            dir_rand = self.__rng.randrange(0,2,1)
             direction = 1 if dir_rand == 0 else 3
             # Определить начальную позицию в соответствии с направлением
             if direction == 1:
@@ -194,21 +188,53 @@ class Enemies():
 
         # обновить общее время
         self.__total_time += self.__timer.get_delta()
-        # Если в данный момент врага нет, создайте врага
-        if len(self.__enemy_list) == 0:
-            self.__enemy_list.append(make_ship())
-            self.__total_enemies += 1
-            self.__next_enemy_in = randrange(self.__wait_time_range[0], self.__wait_time_range[1], 1)
+        # Если в данный момент врага нет или текущее количество врагов меньше максимального количества врагов,
+        # а общее время больше, чем время появления следующего врага, создайте врага
+        if len(self.__enemies) == 0 or \
+                (len(self.__enemies) < self.__max_enemies and self.__total_time > self.__next_enemy_in):
+            ship = make_ship()
+            if ship is None:
+                return None
+            self.__next_enemy_in = self.__rng.randrange(self.__wait_time_range[0], self.__wait_time_range[1], 1)
             self.__total_time = 0
-        else:
-            # Если текущее количество врагов меньше максимального количества врагов,
-            # а общее время больше, чем время появления следующего врага, создайте врага
-            if len(self.__enemy_list) < self.__max_enemies:
-                if self.__total_time > self.__next_enemy_in:
-                    self.__enemy_list.append(make_ship())
-                    self.__total_enemies += 1
-                    self.__next_enemy_in = randrange(self.__wait_time_range[0], self.__wait_time_range[1], 1)
-                    self.__total_time = 0
+            return self.add_ship(ship)
+        return None
+
+    def add_ship(self, ship):
+
+        """
+        Adds an already built ship, bypassing the spawn timing and the random placement of add_enemy(). Used to set up
+        scenarios and benchmark worlds.
+
+        :returns: handle of the ship
+        """
+
+        self.__total_enemies += 1
+        self.__count(type(ship).__name__, 1)
+        self.__count("spawned", 1)
+        handle = self.__enemies.insert(ship)
+        if self.__kinematics is not None:
+            self.__kinematics.attach(ship, handle)
+        #Ship lanes reach 40 pixels beyond the ship extent
+        extent = ship.get_extent()
+        self.__lanes.add(ship, int(extent[1]) - 39, int(extent[3]) + 40)
+        self.__schedule_shot(handle, ship)
+        return handle
+
+    def __count(self, key, plus):
+        counts = self.__level_counts.get(self.__game_level.get_level())
+        if counts is None:
+            counts = self.__level_counts[self.__game_level.get_level()] = {"spawned": 0, "sunk": 0}
+        counts[key] = counts.get(key, 0) + plus
+
+    def get_level_counts(self):
+
+        """
+        Returns the number of enemies spawned and sunk per game level, and the number of spawned ships per ship class,
+        as a dictionary of game level to a dictionary of counts.
+        """
+
+        return self.__level_counts
 
     def move(self):
 
@@ -216,22 +242,55 @@ class Enemies():
         Move all ships.
         """
 
-        for e in self.__enemy_list:
+        if self.__kinematics is not None:
+            self.__kinematics.step(self.__timer.get_delta(), self.__game_level.get_level())
+            return
+        for e in self.__enemies:
             e.move(self.__timer.get_delta(), self.__game_level.get_level())
 
+    def get_out_of_window(self):
+
+        """
+        Returns the ships that have left the game window.
+
+        :returns: list of (handle, ship)
+        """
+
+        if self.__kinematics is not None:
+            return self.__kinematics.get_out_of_window()
+        return [(handle, e) for handle, e in zip(self.__enemies.handles(), self.__enemies.items())
+                if e.is_out_of_window(self.__window_size)]
+
     def shoot(self):
         """
         Method for making the existing ships shoot torpedos under defined cicumstances, being that they have are on
         or have passed the center of the screen, they are equipped with a torpedo (which is defined in the parameter
         dictionary in the ship class) and there are less than the allowed maximum amount of torpedos on the screen at
-        this point in time. If there are more, the ship looses it's torpedo.
+        this point in time. If there are more, the ship looses it's torpedo. The guns are fired by the scheduler of
+        the game timer, see __fire_gun().
          :returns:
         """
-        for e in self.__enemy_list:
-            if e.has_torpedo() and not e.get_torpedo_shot():
+        for e in self.__enemies:
+            if e.has_torpedo(self.__rng) and not e.get_torpedo_shot():
                 self.__shoot_torpedo(e)
-            if e.shoot(self.__timer.get_delta()):
-                self.__shoot_bullet(e)
+
+    def __schedule_shot(self, handle, ship):
+        delay = ship.next_shot()
+        if delay is not None:
+            self.__scheduler.schedule(delay, self.__fire_gun, handle)
+
+    def __fire_gun(self, handle):
+
+        """
+        Scheduler callback firing the next shot of the gun pattern of a ship. The timer of a removed ship runs out
+        here, its handle is stale.
+        """
+
+        ship = self.__enemies.get(handle)
+        if ship is None:
+            return
+        self.__shoot_bullet(ship)
+        self.__schedule_shot(handle, ship)
 
     def __shoot_torpedo(self, e):
         if e.get_direction() == 1:
@@ -272,37 +331,39 @@ class Enemies():
                     e.set_torpedo_shot()
 
     def __shoot_bullet(self, e):
+        bearing = get_bearing(e.get_center_point(), (self.__window_size[0] / 2, self.__window_size[1] / 2))[0]
         if e.get_gun_type() == 0:
-            bearing = get_bearing(e.get_center_point(), (self.__window_size[0] / 2, self.__window_size[1] / 2))[0]
-            self.__bullets.add_bullet(Standard_enemy_bullet(self.__timer, e.get_center_point(), bearing))
+            self.__bullets.fire(Standard_enemy_bullet, e.get_center_point(), bearing)
         elif e.get_gun_type() == 1:
-            try:
-                bearing = get_bearing(e.get_center_point(), (self.__window_size[0] / 2, self.__window_size[1] / 2))[0]
-                self.__bullets.add_bullet(Fregatte_bullet(self.__timer, e.get_center_point(), bearing))
-            except:
-                pass
-                # The above code extracts the logic for shooting torpedo and bullet into two separate methods,
+            self.__bullets.fire(Fregatte_bullet, e.get_center_point(), bearing)
 
+    # The above code extracts the logic for shooting torpedo and bullet into two separate methods,
     # __shoot_torpedo() and __shoot_bullet() respectively. This makes the code more readable and easier to maintain.
 
     def get_enemies(self):
-        return self.__enemy_list
+        return self.__enemies.items()
+
+    def get_handles(self):
+        return self.__enemies.handles()
 
-    def remove_enemies(self, indices):
+    def remove_enemies(self, handles):
 
         """
-        Removes the enemies at given indices. Called from the Destroyer_logic class game instance.
-        indices (list of int) : indices of the enemies that are to be deleted.
+        Marks the enemies of the given handles for removal. Called from the Destroyer_logic class game instance. The
+        enemies are removed by the next call of apply_removals().
+        handles (list of tuple) : handles of the enemies that are to be deleted.
 
         :returns:
         """
 
-        if len(indices) > 0:
-            new_list = []
-            for e,v in enumerate(self.__enemy_list):
-                if not e in indices:
-                    new_list.append(v)
-            self.__enemy_list = new_list
+        for handle in handles:
+            self.__enemies.defer_remove(handle)
+
+    def apply_removals(self):
+        for e in self.__enemies.flush():
+            self.__lanes.remove(e)
+            if self.__kinematics is not None:
+                self.__kinematics.detach(e)
 
     def set_max_enemies(self, count):
         self.__max_enemies = count
@@ -315,6 +376,8 @@ class Enemies():
 
     def inc_sunk_count(self, plus):
         self.__sunk_enemies_count += plus
+        if plus:
+            self.__count("sunk", plus)
 
     def reset_sunk_count(self):
         self.__sunk_enemies_count = 0
@@ -323,68 +386,192 @@ class Enemies():
         self.__wait_time_range = range
 
 class Torpedos(object):
-    def __init__(self, timer):
-        self.__torpedo_list = []
+    def __init__(self, timer, window_size, vectorized=True):
+
+        """
+        Class for handling the torpedos. Like the ships of the Enemies class, the torpedos are moved in a Kinematics
+        store if numpy is available.
+
+        :param timer        : timer game instance
+        :param window_size  : window size as x,y
+        :param vectorized   : move the torpedos in a Kinematics store if numpy is available
+        :type window_size   : list
+        :type vectorized    : bool
+        """
+
+        self.__torpedos = Slot_map()
         self.__timer = timer
+        self.__window_size = window_size
+        self.__kinematics = Kinematics(window_size, use_rect=True) if vectorized and Kinematics is not None else None
 
     def get_torpedos(self):
-        return self.__torpedo_list
+        return self.__torpedos.items()
+
+    def get_handles(self):
+        return self.__torpedos.handles()
 
     def add_torpedo(self, torpedo):
-        self.__torpedo_list.append(torpedo)
+        handle = self.__torpedos.insert(torpedo)
+        if self.__kinematics is not None:
+            self.__kinematics.attach(torpedo, handle)
+        return handle
 
     def move(self):
-        for t in self.__torpedo_list:
+        if self.__kinematics is not None:
+            self.__kinematics.step(self.__timer.get_delta())
+            return
+        for t in self.__torpedos:
             t.move(self.__timer.get_delta())
 
-    def remove_torpedos(self, indices):
-        if len(indices) > 0:
-            new_list = []
-            for e,v in enumerate(self.__torpedo_list):
-                if not e in indices:
-                    new_list.append(v)
-            self.__torpedo_list = new_list
+    def get_out_of_window(self):
+        if self.__kinematics is not None:
+            return self.__kinematics.get_out_of_window()
+        return [(handle, t) for handle, t in zip(self.__torpedos.handles(), self.__torpedos.items())
+                if t.is_out_of_window(self.__window_size, use_rect=True)]
+
+    def remove_torpedos(self, handles):
+        for handle in handles:
+            self.__torpedos.defer_remove(handle)
+
+    def apply_removals(self):
+        removed = self.__torpedos.flush()
+        if self.__kinematics is not None:
+            for t in removed:
+                self.__kinematics.detach(t)
 
     def count(self):
-        return len(self.__torpedo_list)
+        return len(self.__torpedos)
 
 
 class Bullets(object):
 
-    def __init__(self, timer, origin, window_size):
+    def __init__(self, timer, origin, window_size, trails=None, pool_size=256):
+
+        """
+        Class for handling the bullets in the game. Bullets created with fire() come from a pool per bullet class and
+        are returned to it when they leave the window or hit something. Bullets are kept in a Slot_map, removals are
+        marked with remove_bullets() and applied by apply_removals().
+
+        :param timer        : timer game instance
+        :param origin       : origin of the destroyer bullets as x,y
+        :param window_size  : window size as x,y
+        :param trails       : Trails game instance the trail segments are handed to
+        :param pool_size    : number of unused bullets kept per bullet class
+        :type window_size   : list
+        :type trails        : Trails
+        :type pool_size     : int
+        """
+
         self.__timer = timer
         self.__origin = origin
         self.__window_size = window_size
-        self.__bullet_list = []
+        self.__trails = trails
+        self.__pool_size = pool_size
+        self.__pools = {}
+        self.__bullets = Slot_map()
+        self.__grid = Spatial_hash()
 
     def add_bullet(self, bullet):
-        self.__bullet_list.append(bullet)
+        return self.__bullets.insert(bullet)
 
-    def move(self):
-        pop_list = []
-        for i in range(len(self.__bullet_list)):
-            if self.__bullet_list[i].move() == -1:
-                pop_list.append(i)
+    def fire(self, bullet_class, origin, direction, **kwargs):
+
+        """
+        Adds a bullet of bullet_class, reusing a pooled bullet if one is available. Additional keyword arguments are
+        passed on to the bullet class.
+        """
+
+        pool = self.__pools.get(bullet_class)
+        if pool is None:
+            pool = Pool(bullet_class, self.__pool_size)
+            self.__pools[bullet_class] = pool
+        return self.__bullets.insert(pool.acquire(self.__timer, origin, direction, **kwargs))
 
-        for p in pop_list:
-            self.__bullet_list.pop(p)
+    def __release(self, bullet):
+        if self.__trails is not None:
+            self.__trails.detach(bullet)
+        pool = self.__pools.get(type(bullet))
+        if pool is not None:
+            pool.release(bullet)
+
+    def move(self):
+        for handle, bullet in zip(self.__bullets.handles(), self.__bullets.items()):
+            if bullet.move() == -1:
+                self.__bullets.defer_remove(handle)
+            elif self.__trails is not None:
+                trail = bullet.get_trail()
+                if trail is not None:
+                    self.__trails.add_segment(bullet, trail)
 
     def get_bullets(self):
-        return self.__bullet_list
+        return self.__bullets.items()
+
+    def get_handles(self):
+        return self.__bullets.handles()
+
+    def get_out_of_window(self):
 
-    def remove_bullets(self, indices):
-        if len(indices)>0:
-            new_list = []
-            for b,v in enumerate(self.__bullet_list):
-                if not b in indices:
-                    new_list.append(v)
-            self.__bullet_list = new_list
+        """
+        Returns the bullets outside of the game window.
+
+        :returns: list of (handle, bullet)
+        """
+
+        window_size = self.__window_size
+        out = []
+        for handle, bullet in zip(self.__bullets.handles(), self.__bullets.items()):
+            position = bullet.get_position()
+            if not (window_size[0] >= position[0] >= 0) or not (window_size[1] >= position[1] >= 0):
+                out.append((handle, bullet))
+        return out
+
+    def collide(self, rects, friendly=True):
+
+        """
+        Finds the friendly or the hostile bullets that collide with rects. The rects are put into a Spatial_hash and
+        every bullet is tested against the rects of the cells it touches.
+
+        :param rects    : rectangles to test the bullets against
+        :param friendly : test the friendly bullets if True, the hostile ones otherwise
+        :type rects     : list of pygame.Rect
+        :type friendly  : bool
+
+        :returns: list of (bullet index, rect index), sorted by bullet index and then by rect index
+        """
+
+        if not rects:
+            return []
+        grid = self.__grid
+        grid.rebuild(rects)
+        hits = []
+        for b, bullet in enumerate(self.__bullets.items()):
+            if bool(bullet.is_friendly()) == friendly:
+                bullet_rect = bullet.get_image()[1]
+                for t in grid.query(bullet_rect):
+                    if bullet_rect.colliderect(rects[t]):
+                        hits.append((b, t))
+        return hits
+
+    def remove_bullets(self, handles):
+        for handle in handles:
+            self.__bullets.defer_remove(handle)
+
+    def apply_removals(self):
+        for bullet in self.__bullets.flush():
+            self.__release(bullet)
+
+    def count(self):
+        return len(self.__bullets)
+
+    def get_pool_stats(self):
+        return {bullet_class.__name__: pool.get_stats() for bullet_class, pool in self.__pools.items()}
 
 
 class Crates(object):
     """Repair, Armor, Life, Bomb, Mine, Machine gun"""
 
     __crate_ratios = [(1,20), (20,30), (30,35), (35,60), (60,80), (80,100)]
+    __crate_classes = [Repair_crate, Armor_crate, Life_crate, Bomb_crate, Mine_crate, MG_crate]
 
     __wait_range_per_level = {
         0:(20,25),
@@ -399,7 +586,7 @@ class Crates(object):
         9:(10,15),
     }
 
-    def __init__(self, timer, window_size, y_margin, destroyer, game_level, timeout=8, max_crates=2):
+    def __init__(self, timer, window_size, y_margin, destroyer, game_level, timeout=8, max_crates=2, rng=random):
         """
         Class for handling crates in the game. Crates appear on randomized positions in the game at random time
         intervals.
@@ -411,16 +598,19 @@ class Crates(object):
         :param game_level   : game instance of the game level class
         :param timeout      : defines how long in seconds crates are in existence after spawning.
         :param max_crates   : the maximum number of crates on the screen at the same point in time
+        :param rng          : random number generator for crate types, positions and spawn times
         :type window_size   : list
         :type y_margin      : int
         :type destroyer     : Destroyer
         :type game_level    : Game_level
         :type timeout       : int
         :type max_crates    : int
+        :type rng           : random.Random
 
         :returns:
         """
         self._timer = timer
+        self._rng = rng
         self._window_size = window_size
         self._game_level = game_level
         self._wait_range = self.__wait_range_per_level[self._game_level.get_level()]
@@ -428,86 +618,67 @@ class Crates(object):
         self._y_margin = y_margin
         self._destroyer = destroyer
         self._enemies = None
-        self._crates_list = []
+        self._crates = Slot_map()
         self._total_time = 0
-        self._pause = randrange(self._wait_range[0], self._wait_range[1], 1)
+        self._pause = self._rng.randrange(self._wait_range[0], self._wait_range[1], 1)
         self._timeout = timeout
+        #Crate positions: 50 px from the left and right edges, below the HUD and 50 px above the bottom edge
+        self._grid = Occupancy_grid((50, y_margin, window_size[0] - 100, window_size[1] - 50 - y_margin))
 
     def make_crate(self, timer):
 
         """
         Checks if the time randomized during the last crate spawning event has elapsed. If that is the case, a new
-        crate is created based on randomized values. The randomized values are checked against existing ship and the
-        destroyer positions. The values are randomized until no collision is found.
-        TODO: Randomize crate types
+        crate of a random type is created at a random position that does not collide with a ship or the destroyer.
+        The position is sampled from the free cells of an occupancy grid built from the ship and destroyer
+        rectangles. If no cell is free, the crate is created in one of the next cycles.
 
-        :returns:
+        :returns: handle of the new crate, or None
         """
 
         self._total_time += self._timer.get_delta()
         if self._total_time > self._pause:
-            rand = randrange(1,100,1)
+            rand = self._rng.randrange(1,100,1)
 
             for i in range(len(self.__crate_ratios)):
                 if self.__crate_ratios[i][0] <= rand < self.__crate_ratios[i][1]:
                     crate_type = i
                     break
 
-            good_pos = False
-            enemies = self._enemies.get_enemies()
-            destroyer = self._destroyer.get_image()
-            crate_size = Crate.get_size()
-
-            while not good_pos:
-                good_pos_int = 0
-                x = randrange(50,self._window_size[0]-50, 1)
-                y = randrange(self._y_margin, self._window_size[1] - 50, 1)
-
-                for e in enemies:
-                    #rect = pygame.Rect(0, e.get_rect()[1], self._window_size[0], e.get_rect()[3])
-                    if e.get_rect().colliderect(pygame.Rect(x,y,crate_size[0], crate_size[1])):
-                        good_pos_int += 1
-
-                if destroyer[1].colliderect(pygame.Rect(x,y,crate_size[0], crate_size[1])):
-                    good_pos_int += 1
-
-                if good_pos_int == 0:
-                    good_pos = True
-
-            if crate_type == 0:
-                self._crates_list.append(Repair_crate((x,y),100, 100))
-            if crate_type == 1:
-                self._crates_list.append(Armor_crate((x,y),100, 100))
-            if crate_type == 2:
-                self._crates_list.append(Life_crate((x,y),100, 100))
-            if crate_type == 3:
-                self._crates_list.append(Bomb_crate((x,y),100, 100))
-            if crate_type == 4:
-                self._crates_list.append(Mine_crate((x,y),100, 100))
-            if crate_type == 5:
-                self._crates_list.append(MG_crate((x,y),100,100))
+            crate_class = self.__crate_classes[crate_type]
+            crate_size = crate_class.get_size()
+            grid = self._grid
+            grid.clear()
+            for e in self._enemies.get_enemies():
+                grid.block(e.get_rect(), crate_size)
+            grid.block(self._destroyer.get_image()[1], crate_size)
+            position = grid.sample(self._rng)
+            if position is None:
+                return None
 
             self._wait_range = self.__wait_range_per_level[self._game_level.get_level()]
-            self._pause = randrange(self._wait_range[0], self._wait_range[1], 1)
+            self._pause = self._rng.randrange(self._wait_range[0], self._wait_range[1], 1)
             self._total_time = 0
+            return self.add_crate(crate_class(position, 100, 100))
+
+    def add_crate(self, crate):
+        handle = self._crates.insert(crate)
+        #Crates that are shot earlier leave a stale handle, the removal is ignored
+        self._timer.get_scheduler().schedule(self._timeout, self._crates.defer_remove, handle)
+        return handle
 
     def get_crates(self):
-        return self._crates_list
-
-    def remove_crates(self, indices):
-        if len(indices)>0:
-            new_list = []
-            for b,v in enumerate(self._crates_list):
-                if not b in indices:
-                    new_list.append(v)
-            self._crates_list = new_list
-
-    def check(self):
-        remove_list = []
-        for c,v in enumerate(self._crates_list):
-            if v.get_age() > self._timeout:
-                remove_list.append(c)
-        self.remove_crates(remove_list)
+        return self._crates.items()
+
+    def get_handles(self):
+        return self._crates.handles()
+
+    def remove_crates(self, handles):
+        for handle in handles:
+            self._crates.defer_remove(handle)
+
+    def apply_removals(self):
+        self._crates.flush()
 
     def set_enemies(self, enemies):
 
@@ -16,10 +16,15 @@
 
 from math import sin, asin, cos, radians, sqrt, atan, degrees
 import pygame
-import datetime
-from math import floor
-from random import randrange
+from math import floor, ceil
+import random
 import sprite
+from assets import load_image, Rotation_cache
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 def project_point(original_x, original_y, bearing, distance):
@@ -83,7 +88,7 @@ def get_bearing(point_1, point_2):
 
     :param point_1: coordinates of first point as set(x,y)
     :param point_2: coorindate of second point as set(x,y)
-    :return: bearing as int, distance as int
+    :return: bearing as float, distance as float
     """
     delta_x = (point_2[0] - point_1[0])
     delta_y = (point_2[1] - point_1[1])
@@ -91,15 +96,15 @@ def get_bearing(point_1, point_2):
     distance = sqrt(pow(delta_x, 2)+pow(delta_y, 2))
 
     if delta_x == 0 and delta_y == 0:
-        return 0,0
+        return 0.0, 0.0
     if delta_x == 0 and delta_y < 0:
-        return 0
+        return 0.0, distance
     if delta_x == 0 and delta_y > 0:
-        return 180
+        return 180.0, distance
     if delta_x < 0 and delta_y == 0:
-        return 270
+        return 270.0, distance
     if delta_x > 0 and delta_y == 0:
-        return 90
+        return 90.0, distance
 
     if delta_y < 0 < delta_x:
         return degrees(asin(delta_x/distance)),distance
@@ -113,24 +118,119 @@ def get_bearing(point_1, point_2):
     elif delta_x < 0 and delta_y < 0:
         return 360 + degrees(asin(delta_x/distance)), distance
 
+def project_points(original_x, original_y, bearing, distance):
+
+    """
+    Vectorized version of project_point for NumPy arrays. All parameters can be arrays of the same length or scalars.
+    Requires numpy.
+
+    :returns: array of x, array of y
+    """
+
+    angle = numpy.radians(bearing)
+    return original_x + numpy.sin(angle) * distance, original_y - numpy.cos(angle) * distance
+
+
+def get_bearings(points_1, points_2):
+
+    """
+    Vectorized version of get_bearing for NumPy arrays of points with the shape (n, 2). Requires numpy.
+
+    :returns: array of bearings in degrees between 0 and 360, array of distances
+    """
+
+    delta = numpy.asarray(points_2, dtype=numpy.float64) - numpy.asarray(points_1, dtype=numpy.float64)
+    distances = numpy.hypot(delta[..., 0], delta[..., 1])
+    bearings = numpy.degrees(numpy.arctan2(delta[..., 0], -delta[..., 1])) % 360
+    #Identical points have the bearing 0 like in get_bearing
+    return numpy.where(distances == 0, 0.0, bearings), distances
+
+
+def interpolate_rect(previous, current, alpha):
+
+    """
+    Returns the rectangle between the previous and the current rectangle of a moving object. alpha is the fraction of
+    the way from previous to current, 0 gives previous and 1 gives current. Used to draw the objects between two
+    simulation steps.
+    """
+
+    if previous is None or alpha >= 1:
+        return current
+    return pygame.Rect(previous[0] + (current[0] - previous[0]) * alpha,
+                       previous[1] + (current[1] - previous[1]) * alpha, current[2], current[3])
+
+
+class Trig_table(object):
+    def __init__(self, resolution=0.25):
+
+        """
+        Precomputed sine and cosine values of bearings at an angular resolution in degrees. Bearings are rounded to
+        the resolution, so the bearing error is at most resolution/2 and a projected point is moved by at most
+        2 * sin(radians(resolution / 4)) times the distance. The resolution is in degrees and has to be converted to
+        radians for the sine.
+
+        :param resolution : angular resolution in degrees
+        :type resolution  : float
+        """
+
+        self.__resolution = float(resolution)
+        self.__size = int(round(360 / self.__resolution))
+        self.__sin = [sin(radians(i * self.__resolution)) for i in range(self.__size)]
+        self.__cos = [cos(radians(i * self.__resolution)) for i in range(self.__size)]
+
+    def unit_vector(self, bearing):
+
+        """
+        Returns the x and y movement for a distance of 1 along the bearing.
+        """
+
+        i = int(round(bearing / self.__resolution)) % self.__size
+        return self.__sin[i], -self.__cos[i]
+
+    def project_point(self, original_x, original_y, bearing, distance):
+        i = int(round(bearing / self.__resolution)) % self.__size
+        return [original_x + self.__sin[i] * distance, original_y - self.__cos[i] * distance]
+
+    def get_resolution(self):
+        return self.__resolution
+
+
+#Trig table used for the unit vectors of bullets. If None, the exact values are calculated.
+trig_table = None
+
+
+def set_trig_table(table):
+    global trig_table
+    trig_table = table
+
+
+def unit_vector(bearing):
+
+    """
+    Returns the x and y movement for a distance of 1 along the bearing, from the trig table if one is set.
+    """
+
+    if trig_table is not None:
+        return trig_table.unit_vector(bearing)
+    angle = radians(bearing)
+    return sin(angle), -cos(angle)
+
+
 class Destroyer_options(object):
     def __init__(self, timer):
         """This class handles the Destroyer class options related to the destroyer weapon, such as reload time, power
         reduction etc. When setting one of the options, a timer can be passed with the set method. If no timer is
         passed, the change of the option will be permanent. With a timer, the change will be reverted to the default
-        options specified below. The timer is run by calling the check() method from the main game loop.
+        options specified below. The timers are registered on the scheduler of the game timer, check() returns the
+        seconds of the text countdown.
         """
 
         self.__timer = timer
+        self.__scheduler = timer.get_scheduler()
 
-        #Default timer values
-        self.__b_type_timer = -1
-        self.__r_time_timer = -1
-        self.__p_reduction_timer = -1
-        self.__p_refill_timer = -1
-        self.__t_turn_speed_timer = -1
-        self.__text_timer = -1
-        self.__last_second = -1
+        #Pending scheduler events per option
+        self.__timers = {}
+        self.__countdown = None
 
         #Default option values
         self.__b_type = 0
@@ -148,97 +248,115 @@ class Destroyer_options(object):
 
     def set_bullet_type(self, bullet_type, timer=-1):
         self.__bullet_type = bullet_type
-        self.__b_type_timer = timer
+        self.__set_timer("bullet_type", timer, self.reset_bullet_type)
 
     def get_bullet_type(self):
         return self.__bullet_type
 
     def set_reload_time(self, time, timer=-1):
         self.__reload_time = time
-        self.__r_time_timer = timer
+        self.__set_timer("reload_time", timer, self.reset_reload_time)
 
     def get_reload_time(self):
         return self.__reload_time
 
     def set_power_reduction(self, reduction, timer=-1):
         self.__power_reduction = reduction
-        self.__p_reduction_timer = timer
+        self.__set_timer("power_reduction", timer, self.reset_power_reduction)
 
     def get_power_reduction(self):
         return self.__power_reduction
 
     def set_power_refill(self, refill, timer=-1):
         self.__power_refill = refill
-        self.__p_refill_timer = timer
+        self.__set_timer("power_refill", timer, self.reset_power_refill)
 
     def get_power_refill(self):
         return self.__power_refill
 
     def reset_bullet_type(self):
         self.__bullet_type = self.__b_type
-        self.__b_type_timer = -1
+        self.__set_timer("bullet_type", -1)
 
     def reset_reload_time(self):
         self.__reload_time = self.__r_time
-        self.__r_time_timer = -1
+        self.__set_timer("reload_time", -1)
 
     def reset_power_reduction(self):
         self.__power_reduction = self.__p_reduction
-        self.__p_reduction_timer = -1
+        self.__set_timer("power_reduction", -1)
 
     def reset_power_refill(self):
         self.__power_refill = self.__p_refill
-        self.__p_refill_timer = -1
+        self.__set_timer("power_refill", -1)
 
     def set_text_timer(self, time):
-        self.__text_timer = time
-        self.__last_second = time
+
+        """
+        Starts a countdown of time seconds. check() returns the seconds left at the start of every second.
+        """
+
+        seconds = int(ceil(time))
+        self.__set_timer("text", max(time - seconds, 0), self.__count_down, seconds)
+
+    def __count_down(self, seconds):
+        self.__countdown = seconds
+        if seconds > 1:
+            self.__set_timer("text", 1, self.__count_down, seconds - 1)
+        else:
+            self.__set_timer("text", -1)
+
+    def __set_timer(self, option, delay, callback=None, *args):
+
+        """
+        Cancels the pending timer of the option and schedules callback after delay seconds of game time. A negative
+        delay only cancels the pending timer.
+        """
+
+        event = self.__timers.pop(option, None)
+        if event is not None:
+            self.__scheduler.cancel(event)
+        if delay >= 0:
+            self.__timers[option] = self.__scheduler.schedule(delay, callback, *args)
+
+    def get_time(self):
+
+        """
+        Returns the game time in seconds. Game time only advances with the simulation steps, so the weapon timing of
+        the destroyer is the same in every run of the same input.
+        """
+
+        return self.__timer.get_time()
 
     def check(self):
 
-        if self.__b_type_timer <= 0.0:
-            self.reset_bullet_type()
-        elif self.__b_type_timer > 0:
-            self.__b_type_timer -= self.__timer.get_delta()
-
-        if self.__r_time_timer <= 0.0:
-            self.reset_reload_time()
-        elif self.__r_time_timer > 0:
-            self.__r_time_timer -= self.__timer.get_delta()
-
-        if self.__p_reduction_timer <= 0.0:
-            self.reset_power_reduction()
-        elif self.__p_reduction_timer > 0:
-            self.__p_reduction_timer -= self.__timer.get_delta()
-
-        if self.__p_refill_timer <= 0.0:
-            self.reset_power_refill()
-        elif self.__p_refill_timer > 0:
-            self.__p_refill_timer -= self.__timer.get_delta()
-
-        if self.__text_timer <= 0:
-            self.__text_timer = -1
-        elif self.__text_timer > 0:
-            self.__text_timer -= self.__timer.get_delta()
-            if self.__text_timer < self.__last_second:
-                self.__last_second = floor(self.__text_timer)
-                return int(self.__last_second) + 1
-        return None
+        """
+        Returns the seconds left of the text countdown if a new second of the countdown has started since the last
+        call, otherwise None.
+        """
+
+        countdown = self.__countdown
+        self.__countdown = None
+        return countdown
 
 class Destroyer(object):
 
-    def __init__(self, type, hp, options, window_size):
+    def __init__(self, type, hp, options, window_size, tower_resolution=2, rotation_cache_bytes=16 * 1024 * 1024):
 
         """
         Class for the players ship.
-        :param type         : Destroyer type. So far only 0 is implemented
-        :param reload_time  : reload time between shots in ms
-        :param hp           : HP for destroyer
-        :param window_size  : window size as x,y
-        :type type          : int
-        :type reload_time   : int
-        :type hp            : int
-        :type window_size   : list
+        :param type                 : Destroyer type. So far only 0 is implemented
+        :param reload_time          : reload time between shots in ms
+        :param hp                   : HP for destroyer
+        :param window_size          : window size as x,y
+        :param tower_resolution     : angular resolution of the cached tower rotations in degrees
+        :param rotation_cache_bytes : memory cap of each tower rotation cache in bytes
+        :type type                  : int
+        :type reload_time           : int
+        :type hp                    : int
+        :type window_size           : list
+        :type tower_resolution      : int
+        :type rotation_cache_bytes  : int
 
         :returns:
         """
@@ -251,14 +369,14 @@ class Destroyer(object):
         self.__last_shot = None
         self.__window_size = window_size
         self.__shooting_power = 100
-        self.__last_shooting_power_check = datetime.datetime.now()
+        self.__last_shooting_power_check = options.get_time()
         self.__options = options
         self.__tower_height = None
 
         if type == 0:
             self.__pipe_length = 30
 
-            self.__image = pygame.image.load("./media/warship.png")
+            self.__image = load_image("./media/warship.png")
             rect = self.__image.get_rect()
             self.__image_size = rect[2], rect[3]
 
@@ -266,15 +384,14 @@ class Destroyer(object):
                                       self.__window_size[1]/2 - self.__image_size[1]/2,
                                       self.__image_size[0], self.__image_size[1])
 
-            self.__tower_image_orig = pygame.image.load("./media/tower.png")
+            self.__tower_image_orig = load_image("./media/tower.png")
             self.__tower_height = self.__tower_image_orig.get_rect().height
             self.__center = (window_size[0]/2, window_size[1]/2)
-            self.__tower_image = pygame.transform.rotate(self.__tower_image_orig, self.__tower_direction)
-            self.__tower_rect = self.__tower_image.get_rect(center=self.__center)
+            self.__tower_rotations = Rotation_cache(self.__tower_image_orig, tower_resolution, rotation_cache_bytes)
 
-            self.__muzzle_image = pygame.image.load("./media/muzzle_flash.png")
-            self.__muzzle_flash = pygame.transform.rotate(self.__muzzle_image, self.__tower_direction)
-            self.__muzzle_rect = self.__muzzle_flash.get_rect(center=self.__center)
+            self.__muzzle_image = load_image("./media/muzzle_flash.png")
+            self.__muzzle_rotations = Rotation_cache(self.__muzzle_image, tower_resolution, rotation_cache_bytes)
+            self.__rotate_tower()
 
         self.__reload_time = options.get_reload_time()
 
@@ -289,11 +406,24 @@ class Destroyer(object):
                 self.__tower_direction = self.__tower_direction + 360
             self.__tower_direction -= steps
 
-        self.__tower_image = pygame.transform.rotate(self.__tower_image_orig, -self.__tower_direction)
-        self.__tower_rect = self.__tower_image.get_rect(center=self.__center)
+        self.__rotate_tower()
+
+    def __rotate_tower(self):
+
+        """
+        Sets the tower and muzzle flash images for the current tower direction from the rotation caches.
+        """
+
+        self.__tower_image, offset = self.__tower_rotations.get(self.__tower_direction)
+        self.__tower_rect = pygame.Rect(self.__center[0] - offset[0], self.__center[1] - offset[1],
+                                        self.__tower_image.get_width(), self.__tower_image.get_height())
 
-        self.__muzzle_flash = pygame.transform.rotate(self.__muzzle_image, -self.__tower_direction)
-        self.__muzzle_rect = self.__muzzle_flash.get_rect(center=self.__center)
+        self.__muzzle_flash, offset = self.__muzzle_rotations.get(self.__tower_direction)
+        self.__muzzle_rect = pygame.Rect(self.__center[0] - offset[0], self.__center[1] - offset[1],
+                                         self.__muzzle_flash.get_width(), self.__muzzle_flash.get_height())
+
+    def get_rotation_stats(self):
+        return {"tower": self.__tower_rotations.get_stats(), "muzzle_flash": self.__muzzle_rotations.get_stats()}
 
     def get_image(self):
         return self.__image, self.__rect
@@ -311,13 +441,14 @@ class Destroyer(object):
         if self.__shooting_power < 20:
             return False
         else:
+            now = self.__options.get_time()
             if self.__last_shot is None:
-                self.__last_shot = datetime.datetime.now()
+                self.__last_shot = now
                 return True
             else:
-                delta = datetime.datetime.now() - self.__last_shot
-                if delta.total_seconds()*1000 > self.__options.get_reload_time():
-                    self.__last_shot = datetime.datetime.now()
+                delta = now - self.__last_shot
+                if delta*1000 > self.__options.get_reload_time():
+                    self.__last_shot = now
                     if self.__shooting_power < 80:
                         self.__shooting_power -= self.__options.get_power_reduction()
                     else:
@@ -334,8 +465,8 @@ class Destroyer(object):
         using permanent fire. Fast regeneration above 50 to not drain too much when using single shots.
         :return:
         """
-        new_time = datetime.datetime.now()
-        delta = (new_time - self.__last_shooting_power_check).total_seconds()
+        new_time = self.__options.get_time()
+        delta = new_time - self.__last_shooting_power_check
         if self.__shooting_power > 20:
             self.__shooting_power += self.__options.get_power_refill() * delta
         else:
@@ -463,29 +594,104 @@ class Enemy(object):
         self._image = None
         self._image_size = None
         self._rect = None
+        self._previous_rect = None
         self._has_torpedo = None
         self._torpedo_shot = False
-        self._gun_time_delta = 0
         self._gun_pattern_pos = 0
+        self._kinematics = None
+        self._row = None
 
     def get_extent(self):
-        return pygame.Rect(self._position[0], self._position[1], self._position[0] + self._rect[2], self._position[1] + \
-               self._rect[3])
+        position = self.get_position()
+        return pygame.Rect(position[0], position[1], position[0] + self._image_size[0], position[1] + \
+               self._image_size[1])
 
     def get_rect(self):
+        if self._kinematics is not None:
+            return self._kinematics.get_rect(self._row)
         return self._rect
 
     def get_direction(self):
+        if self._kinematics is not None:
+            return self._kinematics.get_direction(self._row)
         return self._direction
 
     def get_position(self):
+        if self._kinematics is not None:
+            return self._kinematics.get_position(self._row)
         return self._position
 
     def set_direction(self, direction):
+        if self._kinematics is not None:
+            self._kinematics.set_direction(self._row, direction)
+        self._direction = direction
+
+    def get_motion(self):
+
+        """
+        Returns the movement state of the enemy: real position, speed in px/sec, game speed multiplier, image size,
+        direction, rectangle, previous rectangle and rounded position. Used to pack the enemy into a Kinematics store.
+
+        :returns: tuple
+        """
+
+        return (self._real_position, self._px_per_second, self._param_dict["game_speed_multiplier"] or 0,
+                self._image_size, self._direction, self._rect, self._previous_rect, self._position)
+
+    def set_motion(self, real_position, direction, rect, previous_rect, position):
+
+        """
+        Sets the movement state written back by a Kinematics store when the enemy is unpacked.
+        """
+
+        self._real_position = real_position
         self._direction = direction
+        self._rect = rect
+        self._previous_rect = previous_rect
+        self._position = position
+
+    def set_kinematics(self, kinematics, row=None):
+
+        """
+        Binds the enemy to a row of a Kinematics store. While bound, rectangle, position and direction are read from
+        the store. None unbinds the enemy, it then moves itself with move().
+
+        :param kinematics   : Kinematics store, or None
+        :param row          : row of the enemy in the store
+        :type kinematics    : Kinematics
+        :type row           : int
+        """
+
+        self._kinematics = kinematics
+        self._row = row
 
     def get_center_point(self):
-        return self._position[0] + self._image_size[0]/2, self._position[1] + self._image_size[1]/2
+        position = self.get_position()
+        return position[0] + self._image_size[0]/2, position[1] + self._image_size[1]/2
+
+    def is_out_of_window(self, window_size, use_rect=False):
+
+        """
+        Returns True if the enemy has left the game window in its direction of movement. Ships are tested with their
+        rounded position, torpedos with their rectangle (use_rect).
+
+        :param window_size  : window size as x,y
+        :param use_rect     : test the rectangle instead of the position
+        :type window_size   : list
+        :type use_rect      : bool
+
+        :returns: boolean
+        """
+
+        x, y = self.get_rect()[:2] if use_rect else self.get_position()
+        direction = self.get_direction()
+        if direction == 0:
+            return y <= 0
+        if direction == 1:
+            return x >= window_size[0]
+        if direction == 2:
+            return y >= window_size[1]
+        return x + self._image_size[0] <= 0
 
     def move(self, time_delta, level=0):
 
@@ -494,6 +700,8 @@ class Enemy(object):
         last cycle and the movement speed as pixels per seconds set in the parameter dictionary. The distance is
         also adjusted for the specified game speed multiplier based on the level parameter
 
+        Enemies packed in a Kinematics store are moved by the store instead, see Kinematics.step().
+
         :param level    : game level
         :type level     : int
 
@@ -502,6 +710,7 @@ class Enemy(object):
         vector_delta = time_delta * (self._px_per_second + (self._px_per_second *
                                                      self._param_dict["game_speed_multiplier"] *
                                                      level))
+        self._previous_rect = self._rect
 
         if self._direction == 0:
             self._real_position = self._real_position[0], self._real_position[1] - vector_delta
@@ -526,22 +735,30 @@ class Enemy(object):
         self._position = int(round(self._real_position[0],0)), int(round(self._real_position[1],0))
 
     def get_image(self):
-        return self._image, self._rect
+        return self._image, self.get_rect()
+
+    def get_draw_rect(self, alpha):
+        if self._kinematics is not None:
+            return interpolate_rect(self._kinematics.get_previous_rect(self._row), self.get_rect(), alpha)
+        return interpolate_rect(self._previous_rect, self._rect, alpha)
 
-    def has_torpedo(self):
+    def has_torpedo(self, rng=random):
 
         """
         Method to check if the instance of the enemy vessel has a torpedo. When run for the first time, a torpedo
         might be attached based on the chance of the enemy boat being equipped with a torpedo specified in the
         parameter dictionary. When called afterwards, it returns if a torpedo is attached or not.
 
+        :param rng  : random number generator used for the torpedo chance
+        :type rng   : random.Random
+
         :returns: boolean
         """
 
         if self._param_dict["has_torpedo"]:
             if self._has_torpedo is None:
                 chance = self._param_dict["torpedo_chance"]*10
-                rand = randrange(1,10,1)
+                rand = rng.randrange(1,10,1)
                 if rand <= chance:
                     self._has_torpedo = True
                     return True
@@ -560,18 +777,24 @@ class Enemy(object):
     def get_gun_type(self):
         return self._param_dict["gun_type"]
 
-    def shoot(self, time_delta):
-        self._gun_time_delta += time_delta
-        if self._param_dict["has_gun"]:
-            gun_pattern = self._param_dict["gun_pattern"]
-            if self._gun_time_delta >= gun_pattern[self._gun_pattern_pos]:
-                self._gun_time_delta = 0
-                if self._gun_pattern_pos == len(gun_pattern)-1:
-                    self._gun_pattern_pos = 0
-                else:
-                    self._gun_pattern_pos += 1
-                return True
-        return False
+    def next_shot(self):
+
+        """
+        Returns the waiting time in seconds until the next shot of the gun pattern and moves on to the next position
+        of the pattern. Returns None if the ship has no gun.
+
+        :returns: float
+        """
+
+        if not self._param_dict["has_gun"]:
+            return None
+        gun_pattern = self._param_dict["gun_pattern"]
+        delay = gun_pattern[self._gun_pattern_pos]
+        if self._gun_pattern_pos == len(gun_pattern)-1:
+            self._gun_pattern_pos = 0
+        else:
+            self._gun_pattern_pos += 1
+        return delay
 
     def set_torpedo_shot(self):
         self._torpedo_shot = True
@@ -635,7 +858,7 @@ class Submarine(Enemy):
         self._param_dict = self.param_dict
 
         #Setting image related parameters
-        self._image = pygame.image.load("./media/submarine.png")
+        self._image = load_image("./media/submarine.png")
         if self._direction == 1:
             self._image = pygame.transform.rotate(self._image, 180)
 
@@ -679,7 +902,7 @@ class Fregatte(Enemy):
         self._param_dict = self.param_dict
 
         #Setting image related parameters
-        self._image = pygame.image.load("./media/fregatte.png")
+        self._image = load_image("./media/fregatte.png")
         if self._direction == 1:
             self._image = pygame.transform.rotate(self._image, 180)
 
@@ -723,7 +946,7 @@ class Gunboat(Enemy):
         self._param_dict = self.param_dict
 
         #Setting image related parameters
-        self._image = pygame.image.load("./media/torpedoboat.png")
+        self._image = load_image("./media/torpedoboat.png")
         if self._direction == 1:
             self._image = pygame.transform.rotate(self._image, 180)
         rect = self._image.get_rect()
@@ -766,7 +989,7 @@ class Torpedoboat(Enemy):
         self._param_dict = self.param_dict
 
         #Setting image related parameters
-        self._image = pygame.image.load("./media/torpedoboat2.png")
+        self._image = load_image("./media/torpedoboat2.png")
         if self._direction == 1:
             self._image = pygame.transform.rotate(self._image, 180)
         rect = self._image.get_rect()
@@ -808,7 +1031,7 @@ class Torpedo_0(Enemy):
         self._param_dict = self.param_dict
 
         #Setting image related parameters
-        self._image = pygame.image.load("./media/torpedo1.png")
+        self._image = load_image("./media/torpedo1.png")
         if self._direction == 0:
             self._image = pygame.transform.rotate(self._image, 180)
         rect = self._image.get_rect()
@@ -853,7 +1076,7 @@ class Torpedo_2(Enemy):
         self._param_dict = self.param_dict
 
         #Setting image related parameters
-        self._image = pygame.image.load("./media/torpedo2.png")
+        self._image = load_image("./media/torpedo2.png")
         if self._direction == 0:
             self._image = pygame.transform.rotate(self._image, 180)
         rect = self._image.get_rect()
@@ -898,7 +1121,7 @@ class Torpedo_1(Enemy):
         self._param_dict = self.param_dict
 
         #Setting image related parameters
-        self._image = pygame.image.load("./media/torpedo1.png")
+        self._image = load_image("./media/torpedo1.png")
         if self._direction == 0:
             self._image = pygame.transform.rotate(self._image, 180)
         rect = self._image.get_rect()
@@ -943,7 +1166,7 @@ class Rowing_boat(Enemy):
         self._param_dict = self.param_dict
 
         #Setting image related parameters
-        self._image = pygame.image.load("./media/torpedo1.png")
+        self._image = load_image("./media/torpedo1.png")
         rect = self._image.get_rect()
         self._image_size = rect[2], rect[3]
         self._rect = pygame.Rect(self._position[0], self._position[1]-self._image_size[1]/2,
@@ -966,6 +1189,14 @@ class Bullet(object):
         "trail_type":None
     }
 
+    #Image of the bullet type, pointing north
+    _image_path = None
+
+    #Rotated bullet images per bullet class. Directions are quantized to the resolution in degrees.
+    ROTATION_RESOLUTION = 2
+    ROTATION_CACHE_BYTES = 2 * 1024 * 1024
+    __rotation_caches = {}
+
     def __init__(self, timer, origin, direction):
 
         """
@@ -991,8 +1222,9 @@ class Bullet(object):
         self._is_friendly = None
         self._speed = None
         self._damage = None
-        self._trail_image = None
         self._trail = None
+        self._rect = None
+        self._previous_rect = None
         self._original_size_x = None
         self._original_size_y = None
 
@@ -1005,6 +1237,8 @@ class Bullet(object):
         if self._shift_direction == -180:
             self._shift_direction *= -1
 
+        self._unit_vector = unit_vector(self._direction)
+
 
     def move(self):
 
@@ -1017,31 +1251,81 @@ class Bullet(object):
 
         time_delta = self._timer.get_delta()
         vector_delta = time_delta * self._speed
+        self._previous_rect = self._rect
 
-        self._position = project_point(self._position[0], self._position[1], self._direction, vector_delta)
+        self._position = [self._position[0] + self._unit_vector[0] * vector_delta,
+                          self._position[1] + self._unit_vector[1] * vector_delta]
 
         self._rect = pygame.Rect(self._position[0] - self._image_size[0] / 2, self._position[1] - self._image_size[1] / 2,
                                   self._image_size[0], self._image_size[1])
 
         if self._param_dict["has_trail"]:
-            self._trail = sprite.Sprite(self._trail_image.extract_by_height(vector_delta +2 ))
-
-            #Projekt the center of the trail sprite so it is right behind the rocket
+            #Projekt the center of the trail segment so it is right behind the rocket. The segment covers the distance
+            #moved in this cycle and is drawn by the Trails class.
             new_center = project_point(self._rect.center[0], self._rect.center[1], self._shift_direction,
                                        floor(self._original_size_y/2) + floor(vector_delta/2))
-            self._trail.rotate(self._direction)
-            self._trail.set_center(new_center[0], new_center[1])
+            self._trail = (new_center[0], new_center[1], vector_delta + 2, self._direction)
 
     def get_position(self):
         return [int(floor(self._position[0])), int(floor(self._position[1]))]
 
+    def reset(self, timer, origin, direction, **kwargs):
+
+        """
+        Reinitializes a pooled bullet as a new bullet of the same class.
+        """
+
+        self.__init__(timer, origin, direction, **kwargs)
+
     def __del__(self):
         pass
 
+    @classmethod
+    def __get_rotation_cache(cls):
+        cache = Bullet.__rotation_caches.get(cls)
+        if cache is None:
+            cache = Rotation_cache(load_image(cls._image_path), cls.ROTATION_RESOLUTION, cls.ROTATION_CACHE_BYTES)
+            Bullet.__rotation_caches[cls] = cache
+        return cache
+
+    @classmethod
+    def get_rotated_image(cls, direction):
+
+        """
+        Returns the image of the bullet class rotated to the direction, together with its size. The rotated images are
+        shared by all bullets of a class; rotations that are not pinned by warm_rotations() are kept as long as the
+        memory cap of the class cache allows.
+
+        :param direction : direction of the bullet as bearing
+        :type direction  : int
+
+        :returns: pygame.Surface, (size x, size y)
+        """
+
+        image = cls.__get_rotation_cache().get(direction)[0]
+        return image, (image.get_width(), image.get_height())
+
+    @classmethod
+    def warm_rotations(cls, directions):
+        cls.__get_rotation_cache().warm(directions)
+
+    @classmethod
+    def get_rotation_stats(cls):
+        return cls.__get_rotation_cache().get_stats()
+
     def get_image(self):
         return self._image, self._rect
 
+    def get_draw_rect(self, alpha):
+        return interpolate_rect(self._previous_rect, self._rect, alpha)
+
     def get_trail(self):
+
+        """
+        Returns the trail segment of the last movement as center x, center y, length and direction, or None if the
+        bullet has no trail.
+        """
+
         if self._trail is not None:
             return self._trail
         else: return None
@@ -1052,6 +1336,25 @@ class Bullet(object):
     def is_friendly(self):
         return self._is_friendly
 
+    def get_direction(self):
+        return self._direction
+
+    def get_speed(self):
+        return self._speed
+
+    def has_trail(self):
+        return bool(self._param_dict["has_trail"])
+
+    def get_trail_offset(self):
+
+        """
+        Returns the distance from the bullet center to the start of its trail in px.
+        """
+
+        if self._original_size_y is None:
+            return 0
+        return floor(self._original_size_y/2)
+
 
 class Destroyer_bullet_1(Bullet):
     _param_dict = {
@@ -1062,25 +1365,23 @@ class Destroyer_bullet_1(Bullet):
         "trail_type":0
     }
 
+    _image_path = "./media/missile1.png"
+
     def __init__(self, timer, origin, direction):
         Bullet.__init__(self, timer, origin, direction)
-        self._image = pygame.image.load("./media/missile1.png")
-        self._original_size_x = self._image.get_rect().width
-        self._original_size_y = self._image.get_rect().height
+        original_image = load_image(self._image_path)
+        self._original_size_x = original_image.get_width()
+        self._original_size_y = original_image.get_height()
 
         self._is_friendly = self._param_dict["is_friendly"]
         self._damage = self._param_dict["damage"]
         self._speed = self._param_dict["speed"]
 
-        self._image = pygame.transform.rotate(self._image, - self._direction)
-        rect = self._image.get_rect()
-        self._image_size = rect[2], rect[3]
+        self._image, self._image_size = self.get_rotated_image(self._direction)
 
         self._rect = pygame.Rect(self._position[0] - self._image_size[0] / 2, self._position[1] - self._image_size[1] / 2,
                                   self._image_size[0], self._image_size[1])
 
-        self._trail_image = sprite.Sprite("./media/trail.png")
-
 class Fregatte_bullet(Bullet):
     _param_dict = {
         "speed":600,
@@ -1090,25 +1391,23 @@ class Fregatte_bullet(Bullet):
         "trail_type":0
     }
 
+    _image_path = "./media/missile2.png"
+
     def __init__(self, timer, origin, direction):
         Bullet.__init__(self, timer, origin, direction)
-        self._image = pygame.image.load("./media/missile2.png")
-        self._original_size_x = self._image.get_rect().width
-        self._original_size_y = self._image.get_rect().height
+        original_image = load_image(self._image_path)
+        self._original_size_x = original_image.get_width()
+        self._original_size_y = original_image.get_height()
 
         self._is_friendly = self._param_dict["is_friendly"]
         self._damage = self._param_dict["damage"]
         self._speed = self._param_dict["speed"]
 
-        self._image = pygame.transform.rotate(self._image, - self._direction)
-        rect = self._image.get_rect()
-        self._image_size = rect[2], rect[3]
+        self._image, self._image_size = self.get_rotated_image(self._direction)
 
         self._rect = pygame.Rect(self._position[0] - self._image_size[0] / 2, self._position[1] - self._image_size[1] / 2,
                                  self._image_size[0], self._image_size[1])
 
-        self._trail_image = sprite.Sprite("./media/trail.png")
-
 class Standard_enemy_bullet(Bullet):
     _param_dict = {
         "speed":800,
@@ -1118,16 +1417,15 @@ class Standard_enemy_bullet(Bullet):
         "trail_type":None
     }
 
+    _image_path = "./media/canonball.png"
+
     def __init__(self, timer,origin, direction):
         Bullet.__init__(self, timer, origin, direction)
-        self._image = pygame.image.load("./media/canonball.png")
         self._damage = self._param_dict["damage"]
         self._speed = self._param_dict["speed"]
         self._is_friendly = self._param_dict["is_friendly"]
 
-        self._image = pygame.transform.rotate(self._image, - self._direction)
-        rect = self._image.get_rect()
-        self._image_size = rect[2], rect[3]
+        self._image, self._image_size = self.get_rotated_image(self._direction)
 
         self._rect = pygame.Rect(self._position[0] - self._image_size[0] / 2, self._position[1] - self._image_size[1] / 2,
                                  self._image_size[0], self._image_size[1])
@@ -1142,13 +1440,16 @@ class Mine(Bullet):
         "trail_type":None
     }
 
-    def __init__(self, timer,origin, direction):
+    _image_path = "./media/mine.png"
+
+    def __init__(self, timer,origin, direction, rng=random):
         Bullet.__init__(self, timer, origin, direction)
-        self._image = pygame.image.load("./media/mine.png")
+        self._image = load_image(self._image_path)
         self._damage = self._param_dict["damage"]
         self._speed = self._param_dict["speed"]
         self._is_friendly = self._param_dict["is_friendly"]
-        self._direction = randrange(0,359,1)
+        self._direction = rng.randrange(0,359,1)
+        self._unit_vector = unit_vector(self._direction)
 
         #self._image = pygame.transform.rotate(self._image, - self._direction)
         rect = self._image.get_rect()
@@ -1158,6 +1459,11 @@ class Mine(Bullet):
                                  self._image_size[0], self._image_size[1])
 
 class Crate(object):
+
+    image_path = "./media/crate.png"
+    #Image sizes per crate class, see get_size()
+    _sizes = {}
+
     def __init__(self, origin, return_points, effect_points=100):
 
         """
@@ -1180,7 +1486,6 @@ class Crate(object):
 
         self._origin = origin
         self._return_points = return_points
-        self._create_time = datetime.datetime.now()
         self._effect_points = effect_points
 
     def get_image(self):
@@ -1192,17 +1497,6 @@ class Crate(object):
     def get_position(self):
         return self._sprite.get_rect()[0], self._sprite.get_rect()[1]
 
-    def get_age(self):
-
-        """
-        Returns the age of the crate in seconds. Used to check wether the instance of a crate has exceeded the
-        best before date and is ready for the trash bin...
-
-        :returns: integer
-        """
-
-        return (datetime.datetime.now() -  self._create_time).total_seconds()
-
     def get_rect(self):
         return self._sprite.get_rect()
 
@@ -1213,43 +1507,67 @@ class Crate(object):
         return self._effect_points
 
     @classmethod
-    def get_size(self):
-        image = pygame.image.load("./media/crate.png")
-        rect = image.get_rect()
-        return rect[2], rect[3]
+    def get_size(cls):
+
+        """
+        Returns the image size of the crate class. The size is read from the image once per class.
+        """
+
+        size = Crate._sizes.get(cls)
+        if size is None:
+            size = Crate._sizes[cls] = load_image(cls.image_path).get_size()
+        return size
 
 class Repair_crate(Crate):
+
+    image_path = "./media/crate_repair.png"
+
     def __init__(self, origin, return_points, effect_points=100):
         Crate.__init__(self,origin, return_points, effect_points)
-        self._sprite = sprite.Sprite("./media/crate_repair.png", origin[0], origin[1])
+        self._sprite = sprite.Sprite(self.image_path, origin[0], origin[1])
         self._type = 0
 
 class Armor_crate(Crate):
+
+    image_path = "./media/crate_reinforcement.png"
+
     def __init__(self, origin, return_points, effect_points=100):
         Crate.__init__(self,origin, return_points, effect_points)
-        self._sprite = sprite.Sprite("./media/crate_reinforcement.png", origin[0], origin[1])
+        self._sprite = sprite.Sprite(self.image_path, origin[0], origin[1])
         self._type = 1
 
 class Life_crate(Crate):
+
+    image_path = "./media/crate_heart.png"
+
     def __init__(self, origin, return_points, effect_points=100):
         Crate.__init__(self,origin, return_points, effect_points)
-        self._sprite = sprite.Sprite("./media/crate_heart.png", origin[0], origin[1])
+        self._sprite = sprite.Sprite(self.image_path, origin[0], origin[1])
         self._type = 2
 
 class Bomb_crate(Crate):
+
+    image_path = "./media/crate_bomb.png"
+
     def __init__(self, origin, return_points, effect_points=100):
         Crate.__init__(self,origin, return_points, effect_points)
-        self._sprite = sprite.Sprite("./media/crate_bomb.png", origin[0], origin[1])
+        self._sprite = sprite.Sprite(self.image_path, origin[0], origin[1])
         self._type = 3
 
 class Mine_crate(Crate):
+
+    image_path = "./media/crate_mine.png"
+
     def __init__(self, origin, return_points, effect_points=100):
         Crate.__init__(self,origin, return_points, effect_points)
-        self._sprite = sprite.Sprite("./media/crate_mine.png", origin[0], origin[1])
+        self._sprite = sprite.Sprite(self.image_path, origin[0], origin[1])
         self._type = 4
 
 class MG_crate(Crate):
+
+    image_path = "./media/crate_mg.png"
+
     def __init__(self, origin, return_points, effect_points=100):
         Crate.__init__(self,origin, return_points, effect_points)
-        self._sprite = sprite.Sprite("./media/crate_mg.png", origin[0], origin[1])
+        self._sprite = sprite.Sprite(self.image_path, origin[0], origin[1])
         self._type = 5